@@ -1,18 +1,52 @@
+import asyncio
 import logging
-from dataclasses import dataclass
+import time
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Any, Callable, cast
 
+from aiohttp import ClientError
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import CONF_EMAIL, CONF_PASSWORD
-from homeassistant.core import HomeAssistant
-from homeassistant.util import Throttle
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.device_registry import DeviceInfo
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.storage import Store
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 
+from custom_components.daikinone.commands import DaikinCommandQueue, DaikinPendingCommands
+from custom_components.daikinone.confirmation import DaikinOneConfirmationWaiter
 from custom_components.daikinone.const import (
     CONF_OPTION_ENTITY_UID_SCHEMA_VERSION_KEY,
+    CONF_OPTION_MAX_POLL_INTERVAL_KEY,
+    CONF_OPTION_MIN_POLL_INTERVAL_KEY,
+    CONF_OPTION_STALENESS_LIMIT_KEY,
+    DEFAULT_MAX_POLL_INTERVAL,
+    DEFAULT_MIN_POLL_INTERVAL,
+    DEFAULT_STALENESS_LIMIT,
     PLATFORMS,
     DOMAIN,
-    MIN_TIME_BETWEEN_UPDATES,
+    MANUFACTURER,
+    METRICS_COORDINATOR,
+    POLL_STAGGER,
+    STORAGE_SAVE_DELAY,
+    STORAGE_VERSION,
 )
-from custom_components.daikinone.daikinone import DaikinOne, DaikinUserCredentials
+from custom_components.daikinone.daikinone import (
+    DaikinChanges,
+    DaikinFieldKey,
+    DaikinOne,
+    DaikinThermostat,
+    DaikinThermostatCommand,
+    DaikinUserCredentials,
+)
+from custom_components.daikinone.exceptions import DaikinServiceException
+from custom_components.daikinone.metrics import DaikinPhase
+from custom_components.daikinone.profiler import DaikinOneProfiler
+from custom_components.daikinone.scheduler import DaikinOnePollScheduler
 
 log = logging.getLogger(__name__)
 
@@ -23,46 +57,519 @@ class DaikinOneData:
     entry: ConfigEntry
     daikin: DaikinOne
 
-    async def update(self, no_throttle: bool = False) -> None:
-        """Get the latest data from Daikin cloud"""
-        await self._update(no_throttle=no_throttle)  # type: ignore
+    coordinator: "DaikinOneCoordinator" = field(init=False)
+    confirmations: DaikinOneConfirmationWaiter = field(init=False)
+    pending: DaikinPendingCommands = field(default_factory=DaikinPendingCommands, init=False)
+    commands: DaikinCommandQueue = field(init=False)
+    store: Store[dict[str, Any]] = field(init=False)
 
-    @Throttle(MIN_TIME_BETWEEN_UPDATES)
-    async def _update(self) -> None:
+    _pending_update: asyncio.Task[None] | None = field(default=None, init=False)
+    _changes: DaikinChanges | None = field(default=None, init=False)
+    _registered_devices: dict[str, tuple[str, str]] = field(default_factory=dict[str, tuple[str, str]], init=False)
+
+    def __post_init__(self) -> None:
+        self.coordinator = DaikinOneCoordinator(self._hass, self)
+        self.confirmations = DaikinOneConfirmationWaiter(self._refresh_thermostats)
+        self.commands = DaikinCommandQueue(self.daikin.set_thermostat)
+        self.store = Store(self._hass, STORAGE_VERSION, f"{DOMAIN}.{self.entry.entry_id}")
+
+    async def async_restore(self) -> bool:
+        """Restore the state saved by the last run, returns whether there were any thermostats to restore"""
+        state = await self.store.async_load()
+        if state is None:
+            return False
+
+        try:
+            self.daikin.restore_state(state)
+        except (KeyError, TypeError, ValueError) as e:
+            log.warning(f"Ignoring saved Daikin One state that could not be restored: {e!r}")
+            return False
+
+        return bool(self.daikin.get_thermostats())
+
+    @callback
+    def async_schedule_save(self) -> None:
+        """Save the latest state a while from now, bursts of updates are written once"""
+        self.store.async_delay_save(self.daikin.export_state, STORAGE_SAVE_DELAY.total_seconds())
+
+    @callback
+    def async_track_thermostats(self, add: Callable[[list[DaikinThermostat]], None]) -> CALLBACK_TYPE:
+        """
+        Call back with the thermostats known now, then again with any that first show up in a later refresh. After a
+        warm start the known thermostats are the saved ones, so one added to the account since then only turns up with
+        the first refresh. Returns a callback that stops tracking.
+        """
+        known = set(self.daikin.get_thermostats())
+        add(list(self.daikin.get_thermostats().values()))
+
+        @callback
+        def add_new() -> None:
+            new = [t for thermostat_id, t in self.daikin.get_thermostats().items() if thermostat_id not in known]
+            if new:
+                known.update(t.id for t in new)
+                add(new)
+
+        return self.coordinator.async_add_listener(add_new)
+
+    async def update(self) -> None:
         """
-        @Throttle throws off the type checker so use internal implementation that can be type ignored in one place
-        instead of everywhere that calls update
+        Get the latest data from Daikin cloud. How often this runs is up to the coordinator's poll scheduler.
+        Concurrent callers share a single in-flight request and all wait for it to finish, so there is only ever one
+        fetch running regardless of how many callers ask.
         """
+        if self._pending_update is None:
+            self._pending_update = self._hass.async_create_task(self._update())
+            self._pending_update.add_done_callback(self._clear_pending_update)
+
+        # shield so a cancelled caller does not cancel the update for everyone else waiting on it
+        await asyncio.shield(self._pending_update)
+
+    def _clear_pending_update(self, _: "asyncio.Task[None]") -> None:
+        self._pending_update = None
+
+    async def _update(self) -> None:
         log.debug("Updating Daikin One data from cloud")
-        await self.daikin.update()
+        self._record_changes(await self.daikin.update())
+        self.async_schedule_save()
+        self._update_device_registry()
+
+    def get_thermostat_device_info(self, thermostat_id: str) -> DeviceInfo:
+        """Return device information for the given thermostat, from its cached metadata"""
+        metadata = self.daikin.get_metadata(thermostat_id)
+        return DeviceInfo(
+            identifiers={(DOMAIN, thermostat_id)},
+            name=f"{metadata.name} Thermostat",
+            manufacturer=MANUFACTURER,
+            model=metadata.model,
+            sw_version=metadata.firmware_version,
+        )
+
+    def _update_device_registry(self) -> None:
+        """Update model and firmware of registered devices after a firmware update or equipment swap"""
+        devices: dict[str, tuple[str, str]] = {}
+        for thermostat in self.daikin.get_thermostats().values():
+            metadata = self.daikin.get_metadata(thermostat.id)
+            devices[thermostat.id] = (metadata.model, metadata.firmware_version)
+            for equipment in thermostat.equipment.values():
+                devices[equipment.id] = (equipment.model, equipment.firmware_version)
+
+        # the first update after setup only records what the entities registered with
+        changed = {k: v for k, v in devices.items() if self._registered_devices.get(k, v) != v}
+        self._registered_devices = devices
+        if not changed:
+            return
+
+        registry = dr.async_get(self._hass)
+        for device_id, (model, sw_version) in changed.items():
+            device = registry.async_get_device(identifiers={(DOMAIN, device_id)})
+            if device is not None:
+                log.info(f"Updating device {device_id} to model {model} firmware {sw_version}")
+                registry.async_update_device(device.id, model=model, sw_version=sw_version)
+
+    async def _refresh_thermostats(self, thermostat_ids: set[str]) -> dict[str, DaikinThermostat]:
+        """
+        Fetch just the given thermostats, or the whole account in one request if there are several. What was fetched
+        is published to entities right away, the fetched snapshots without pending command values are returned.
+        """
+        if len(thermostat_ids) == 1:
+            self._record_changes(await self.daikin.update_thermostat(next(iter(thermostat_ids))))
+            self.async_schedule_save()
+        else:
+            await self.update()
+
+        self.coordinator.async_set_updated_data(self.get_thermostats())
+        return self.daikin.get_thermostats()
+
+    def get_thermostats(self) -> dict[str, DaikinThermostat]:
+        """Get the latest thermostat snapshots, with values set by commands that are not confirmed yet overlaid"""
+        thermostats, overlay_changes = self.pending.apply(self.daikin.get_thermostats())
+        if overlay_changes:
+            self._record_changes(
+                DaikinChanges(
+                    full=False,
+                    thermostats=frozenset(thermostat_id for thermostat_id, _, _ in overlay_changes),
+                    fields=frozenset(overlay_changes),
+                )
+            )
+        return thermostats
+
+    async def async_send_command(
+        self,
+        thermostat_id: str,
+        command: DaikinThermostatCommand,
+        write_limit: asyncio.Semaphore | None = None,
+    ) -> bool:
+        """
+        Send a command through the thermostat's command queue. Its changes are shown right away and held until the
+        cloud confirms them, returns whether that happened before the confirmation timeout. The update itself is sent
+        while holding `write_limit` if given.
+
+        Settings the thermostat already has are not sent again. This is checked against the published snapshots,
+        which include the values of pending and queued commands, so re-asserting a value that is still on its way is
+        skipped as well while setting it back to the previous value is not.
+        """
+        current = self.coordinator.data.get(thermostat_id) if self.coordinator.data else None
+        if current is not None:
+            remaining = command.without_applied(current)
+            if remaining is None:
+                log.debug("Skipping command for thermostat %s, nothing would change", thermostat_id)
+                self.commands.stats.skipped += 1
+                return True
+            command = remaining
+
+        # follow the equipment closely while it reacts to the command
+        self.coordinator.async_note_command()
+
+        changes = command.changes()
+        self.pending.add(thermostat_id, changes, self.daikin.get_thermostats().get(thermostat_id))
+        self.coordinator.async_set_updated_data(self.get_thermostats())
+
+        try:
+            sent = await self.commands.submit(thermostat_id, command, write_limit)
+        except (DaikinServiceException, ClientError, TimeoutError):
+            self.pending.discard(thermostat_id, changes)
+            self.coordinator.async_set_updated_data(self.get_thermostats())
+            raise
+
+        # wait for what was actually sent, later commands merged into the same update may have replaced our values
+        confirmed = await self.confirmations.wait(thermostat_id, sent.is_applied)
+        log.debug("Finished waiting for updated value" if confirmed else "Gave up waiting for updated value")
+        return confirmed
+
+    def _record_changes(self, changes: DaikinChanges) -> None:
+        self._changes = changes if self._changes is None else self._changes.merge(changes)
+
+    def take_changes(self) -> DaikinChanges | None:
+        """
+        Get everything that changed since this was last called, across however many updates ran in between. None means
+        the changes are unknown and everything should be considered changed.
+        """
+        changes, self._changes = self._changes, None
+        return changes
+
+
+@dataclass
+class DaikinOneWriteStats:
+    """
+    Counts entity state writes made and suppressed because the published state did not change, and entities not called
+    back at all because none of the fields they subscribed to changed.
+    """
+
+    cycles: int = 0
+    written: int = 0
+    suppressed: int = 0
+    skipped: int = 0
+    cycle_written: int = 0
+    cycle_suppressed: int = 0
+    cycle_skipped: int = 0
+
+    def start_cycle(self) -> None:
+        self.cycles += 1
+        self.cycle_written = 0
+        self.cycle_suppressed = 0
+        self.cycle_skipped = 0
+
+    def record_skipped(self, count: int) -> None:
+        self.skipped += count
+        self.cycle_skipped = count
+
+    def record(self, written: bool) -> None:
+        if written:
+            self.written += 1
+            self.cycle_written += 1
+        else:
+            self.suppressed += 1
+            self.cycle_suppressed += 1
+
+
+type DaikinOneSubscription = frozenset[DaikinFieldKey]
+
+
+class DaikinOneCoordinator(DataUpdateCoordinator[dict[str, DaikinThermostat]]):
+    """
+    Owns the poll loop for a Daikin One account. Entities do not poll on their own, they are called back with the new
+    thermostat snapshot once per refresh so they all change state together.
+
+    Entities can pass the (thermostat id, equipment id, field) keys they read as a DaikinOneSubscription context. Those
+    are only called back when one of their fields changed, or when availability changed or the changes are unknown.
+    Listeners without a subscription are always called back.
+
+    The poll interval is picked after every refresh by a DaikinOnePollScheduler within the bounds configured in the
+    entry options. Interval changes are announced on `poll_interval_signal`.
+
+    While a DaikinOneProfiler is set as `profiler`, refreshes are profiled by it.
+
+    A failed refresh keeps the last snapshots around. Entities go on showing them and only become unavailable once a
+    thermostat was not fetched successfully for longer than the staleness limit from the entry options, listeners are
+    called back whenever a thermostat crosses that limit.
+    """
+
+    def __init__(self, hass: HomeAssistant, data: DaikinOneData):
+        self.scheduler = DaikinOnePollScheduler(
+            min_interval=timedelta(
+                seconds=data.entry.options.get(
+                    CONF_OPTION_MIN_POLL_INTERVAL_KEY, DEFAULT_MIN_POLL_INTERVAL.total_seconds()
+                )
+            ),
+            max_interval=timedelta(
+                seconds=data.entry.options.get(
+                    CONF_OPTION_MAX_POLL_INTERVAL_KEY, DEFAULT_MAX_POLL_INTERVAL.total_seconds()
+                )
+            ),
+        )
+
+        # snapshots of unchanged thermostats are reused, so an unchanged refresh compares equal by identity and skips
+        # notifying listeners entirely
+        super().__init__(hass, log, name=DOMAIN, update_interval=self.scheduler.interval, always_update=False)
+        self._data = data
+        self.write_stats = DaikinOneWriteStats()
+        self.poll_interval_signal = f"{DOMAIN}_{data.entry.entry_id}_poll_interval"
+        self.staleness_limit = timedelta(
+            seconds=data.entry.options.get(CONF_OPTION_STALENESS_LIMIT_KEY, DEFAULT_STALENESS_LIMIT.total_seconds())
+        )
+
+        self._subscriptions: dict[DaikinFieldKey, set[CALLBACK_TYPE]] = {}
+        self._notified_success = False
+        self._notified_stale: frozenset[str] = frozenset()
+        self._poll_offset = timedelta()
+        self._unsub_staleness_check: CALLBACK_TYPE | None = None
+        self.profiler: DaikinOneProfiler | None = None
+
+    @callback
+    def async_add_listener(self, update_callback: CALLBACK_TYPE, context: Any = None) -> Callable[[], None]:
+        remove_listener = super().async_add_listener(update_callback, context)
+        if not isinstance(context, frozenset):
+            return remove_listener
+
+        subscription = cast(DaikinOneSubscription, context)
+        for key in subscription:
+            self._subscriptions.setdefault(key, set()).add(update_callback)
+
+        @callback
+        def remove_subscription() -> None:
+            remove_listener()
+            for key in subscription:
+                subscribers = self._subscriptions.get(key)
+                if subscribers is not None:
+                    subscribers.discard(update_callback)
+                    if not subscribers:
+                        del self._subscriptions[key]
+
+        return remove_subscription
+
+    async def _async_refresh(
+        self,
+        log_failures: bool = True,
+        raise_on_auth_failed: bool = False,
+        scheduled: bool = False,
+        raise_on_entry_error: bool = False,
+    ) -> None:
+        if self.profiler is None:
+            await super()._async_refresh(log_failures, raise_on_auth_failed, scheduled, raise_on_entry_error)
+            return
+
+        with self.profiler.cycle():
+            await super()._async_refresh(log_failures, raise_on_auth_failed, scheduled, raise_on_entry_error)
+
+    @callback
+    def async_update_listeners(self) -> None:
+        with self._data.daikin.get_metrics().time(METRICS_COORDINATOR, DaikinPhase.DISPATCH):
+            self._async_dispatch()
+
+    @callback
+    def _async_dispatch(self) -> None:
+        # every listener callback belongs to the same cycle, so the per cycle write counts cover exactly one refresh
+        self.write_stats.start_cycle()
+
+        changes = self._data.take_changes()
+        stale = self._stale_thermostats()
+        availability_changed = self._notified_success != self.last_update_success or self._notified_stale != stale
+        self._notified_success = self.last_update_success
+        self._notified_stale = stale
+        self._schedule_staleness_check()
+
+        if changes is None or changes.full or availability_changed or not self.last_update_success:
+            for update_callback, _ in list(self._listeners.values()):
+                self._async_call_listener(update_callback)
+            return
+
+        woken: set[CALLBACK_TYPE] = set()
+        for key in changes.fields:
+            woken.update(self._subscriptions.get(key, ()))
+
+        skipped = 0
+        for update_callback, context in list(self._listeners.values()):
+            if update_callback in woken or not isinstance(context, frozenset):
+                self._async_call_listener(update_callback)
+            else:
+                skipped += 1
+        self.write_stats.record_skipped(skipped)
+
+    @callback
+    def _async_call_listener(self, update_callback: CALLBACK_TYPE) -> None:
+        """Call back a listener, an entity that fails to update must not keep the ones after it from updating"""
+        try:
+            update_callback()
+        except Exception:
+            log.exception("Error updating Daikin One entity from %s", update_callback)
+
+    def is_fresh(self, thermostat_id: str) -> bool:
+        """Whether the snapshot of the given thermostat is recent enough to be shown"""
+        age = self._data.daikin.get_snapshot_age(thermostat_id)
+        return age is not None and age < self.staleness_limit.total_seconds()
+
+    def _stale_thermostats(self) -> frozenset[str]:
+        return frozenset(t for t in self._data.daikin.get_thermostats() if not self.is_fresh(t))
+
+    @callback
+    def _schedule_staleness_check(self) -> None:
+        """Check again once the oldest snapshot that is still fresh goes stale"""
+        if self._unsub_staleness_check is not None:
+            self._unsub_staleness_check()
+            self._unsub_staleness_check = None
+
+        ages = [self._data.daikin.get_snapshot_age(t) for t in self._data.daikin.get_thermostats()]
+        fresh = [age for age in ages if age is not None and age < self.staleness_limit.total_seconds()]
+        if fresh:
+            delay = self.staleness_limit.total_seconds() - max(fresh)
+            self._unsub_staleness_check = async_call_later(self.hass, delay, self._async_check_staleness)
+
+    @callback
+    def _async_check_staleness(self, _: Any) -> None:
+        self._unsub_staleness_check = None
+        if self._stale_thermostats() != self._notified_stale:
+            self.async_update_listeners()
+        else:
+            self._schedule_staleness_check()
+
+    @callback
+    def async_refresh_in_background(self) -> None:
+        """Request a refresh without waiting for it, entities keep showing the last snapshots in the meantime"""
+        self.hass.async_create_background_task(self.async_request_refresh(), f"{DOMAIN} refresh")
+
+    async def async_shutdown(self) -> None:
+        await super().async_shutdown()
+        if self._unsub_staleness_check is not None:
+            self._unsub_staleness_check()
+            self._unsub_staleness_check = None
+
+    @callback
+    def async_note_command(self) -> None:
+        """Poll faster for a while after a command was sent, takes effect from the next scheduled refresh"""
+        self.scheduler.note_command()
+        self._set_poll_interval(self.scheduler.interval)
+
+    @callback
+    def async_stagger_polls(self, offset: timedelta) -> None:
+        """
+        Push the poll after the next refresh back by the given offset, within the minimum poll interval. Later polls
+        keep the shifted phase, so accounts set up with different offsets keep polling at different times.
+        """
+        self._poll_offset = offset % self.scheduler.min_interval
+
+    def _take_poll_offset(self) -> timedelta:
+        offset, self._poll_offset = self._poll_offset, timedelta()
+        return offset
+
+    @callback
+    def _set_poll_interval(self, interval: timedelta) -> None:
+        if interval != self.update_interval:
+            log.debug("Polling Daikin One every %s", interval)
+            self.update_interval = interval
+            async_dispatcher_send(self.hass, self.poll_interval_signal)
+
+    async def _async_update_data(self) -> dict[str, DaikinThermostat]:
+        try:
+            await self._data.update()
+        except (DaikinServiceException, ClientError, TimeoutError) as e:
+            self._set_poll_interval(self.scheduler.on_failure() + self._take_poll_offset())
+            raise UpdateFailed(f"Failed to update Daikin One data: {e!r}") from e
+
+        thermostats = self._data.get_thermostats()
+        self._set_poll_interval(self.scheduler.on_success(thermostats.values()) + self._take_poll_offset())
+        return thermostats
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up the given config entry"""
 
     log.info(f"Setting up Daikin One integration for {entry.data[CONF_EMAIL]}")
+    started = time.monotonic()
 
-    # create daikin one connector
+    # create daikin one connector, using the shared home assistant session so connections are pooled
     data = DaikinOneData(
-        hass, entry, DaikinOne(DaikinUserCredentials(entry.data[CONF_EMAIL], entry.data[CONF_PASSWORD]))
+        hass,
+        entry,
+        DaikinOne(
+            DaikinUserCredentials(entry.data[CONF_EMAIL], entry.data[CONF_PASSWORD]),
+            async_get_clientsession(hass),
+        ),
     )
-    await data.update()
-    hass.data[DOMAIN] = data
+
+    # with the state saved by the last run, entities are set up right away and the first refresh runs in the background
+    warm_start = await data.async_restore()
+    if warm_start:
+        data.coordinator.data = data.get_thermostats()
+    else:
+        await data.coordinator.async_config_entry_first_refresh()
+    accounts: dict[str, DaikinOneData] = hass.data.setdefault(DOMAIN, {})
+    accounts[entry.entry_id] = data
+
+    # spread the polls of several accounts instead of hitting the cloud for all of them at once
+    data.coordinator.async_stagger_polls(POLL_STAGGER * (len(accounts) - 1))
+
+    # poll interval bounds are read on setup, reload to apply changed options
+    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
 
     # load platforms
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
+    # services import the platforms, which import this module
+    from custom_components.daikinone.services import async_register_services
+
+    async_register_services(hass)
+
+    if warm_start:
+        entry.async_create_background_task(hass, data.coordinator.async_refresh(), f"{DOMAIN} first refresh")
+
+    log.info(
+        f"Set up Daikin One integration in {time.monotonic() - started:.2f}s from "
+        f"{'saved' if warm_start else 'fetched'} state"
+    )
+
     return True
 
 
+async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Reload the config entry"""
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload the config entry and platforms"""
     ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
     if ok:
-        hass.data.pop(DOMAIN)
+        accounts: dict[str, DaikinOneData] = hass.data[DOMAIN]
+        data = accounts.pop(entry.entry_id)
+        if data.coordinator.profiler is not None:
+            data.coordinator.profiler.close()
+        data.commands.cancel()
+        data.confirmations.cancel()
+        await data.store.async_save(data.daikin.export_state())
+        await data.daikin.close()
+
+        if not accounts:
+            from custom_components.daikinone.services import async_remove_services
+
+            async_remove_services(hass)
     return ok
 
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the state saved for the config entry"""
+    await Store[dict[str, Any]](hass, STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}").async_remove()
+
+
 async def async_migrate_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Migrate old entry."""
     log.debug("Migrating from version %s.%s", entry.version, entry.minor_version)
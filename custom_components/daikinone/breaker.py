@@ -0,0 +1,98 @@
+import time
+from dataclasses import dataclass
+from enum import StrEnum
+
+
+class DaikinCircuitState(StrEnum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+@dataclass
+class DaikinCircuitBreakerStats:
+    """Current state, consecutive failures, how often the circuit opened and how many requests it turned away"""
+
+    state: DaikinCircuitState = DaikinCircuitState.CLOSED
+    failures: int = 0
+    opened: int = 0
+    rejected: int = 0
+
+
+class DaikinCircuitBreaker:
+    """
+    Stops sending requests to an API that keeps failing. After `threshold` consecutive failures the circuit opens and
+    every request is turned away until the open period is over. Then a single probe request is let through, which
+    closes the circuit again if it succeeds, or reopens it for twice as long as before if it fails.
+    """
+
+    def __init__(self, threshold: int, open_for: float, max_open_for: float):
+        self._threshold = threshold
+        self._open_for = open_for
+        self._max_open_for = max_open_for
+
+        self._next_open_for = open_for
+        self._retry_at = 0.0
+        self._probing = False
+
+        self.stats = DaikinCircuitBreakerStats()
+
+    def allow(self) -> bool:
+        """Whether a request may be sent now, the caller must report its outcome if so"""
+        match self.stats.state:
+            case DaikinCircuitState.CLOSED:
+                return True
+            case DaikinCircuitState.OPEN if time.monotonic() >= self._retry_at:
+                self.stats.state = DaikinCircuitState.HALF_OPEN
+                self._probing = True
+                return True
+            case DaikinCircuitState.HALF_OPEN if not self._probing:
+                self._probing = True
+                return True
+            case _:
+                self.stats.rejected += 1
+                return False
+
+    def is_open(self) -> bool:
+        """Whether requests are being turned away, without letting a probe through like `allow` does"""
+        return self.stats.state == DaikinCircuitState.OPEN
+
+    def retry_in(self) -> float:
+        """Seconds until the next probe is let through"""
+        return max(self._retry_at - time.monotonic(), 0)
+
+    def on_success(self) -> None:
+        self.stats.state = DaikinCircuitState.CLOSED
+        self.stats.failures = 0
+        self._next_open_for = self._open_for
+        self._probing = False
+
+    def on_failure(self) -> None:
+        self.stats.failures += 1
+
+        # requests that were already in flight when the circuit opened do not extend the open period
+        if self.stats.state == DaikinCircuitState.OPEN:
+            return
+
+        if self.stats.state == DaikinCircuitState.HALF_OPEN or self.stats.failures >= self._threshold:
+            self.__open()
+
+    def on_response(self, status: int) -> None:
+        """Report the response status of a request, anything but throttling and server errors means the API is up"""
+        if status == 429 or status >= 500:
+            self.on_failure()
+        else:
+            self.on_success()
+
+    def on_abort(self) -> None:
+        """The request ended without telling anything about the API, e.g. because it was cancelled"""
+        self._probing = False
+
+    def __open(self) -> None:
+        if self.stats.state != DaikinCircuitState.OPEN:
+            self.stats.opened += 1
+
+        self.stats.state = DaikinCircuitState.OPEN
+        self._retry_at = time.monotonic() + self._next_open_for
+        self._next_open_for = min(self._next_open_for * 2, self._max_open_for)
+        self._probing = False
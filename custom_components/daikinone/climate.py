@@ -1,8 +1,6 @@
 from enum import Enum
 import logging
-from typing import Callable
 
-import backoff
 from homeassistant.components.climate import (
     ClimateEntity,
     ClimateEntityDescription,
@@ -14,15 +12,15 @@ from homeassistant.components.climate import (
 )
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import UnitOfTemperature, ATTR_TEMPERATURE
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers.entity import DeviceInfo
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from custom_components.daikinone import DaikinOneData, DOMAIN
-from custom_components.daikinone.const import MANUFACTURER
+from custom_components.daikinone import DaikinOneCoordinator, DaikinOneData, DOMAIN
 from custom_components.daikinone.daikinone import (
     DaikinThermostat,
     DaikinThermostatCapability,
+    DaikinThermostatCommand,
     DaikinThermostatMode,
     DaikinThermostatStatus,
 )
@@ -37,18 +35,47 @@ async def async_setup_entry(
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Set up Daikin One thermostats"""
-    data: DaikinOneData = hass.data[DOMAIN]
-
-    entities = [
-        DaikinOneThermostat(
-            ClimateEntityDescription(key=device.id, has_entity_name=True, name=None),
-            data,
-            device,
+    data: DaikinOneData = hass.data[DOMAIN][config_entry.entry_id]
+
+    @callback
+    def add_thermostats(thermostats: list[DaikinThermostat]) -> None:
+        async_add_entities(
+            DaikinOneThermostat(
+                ClimateEntityDescription(key=device.id, has_entity_name=True, name=None),
+                data,
+                device,
+            )
+            for device in thermostats
         )
-        for device in data.daikin.get_thermostats().values()
-    ]
 
-    async_add_entities(entities, True)
+    config_entry.async_on_unload(data.async_track_thermostats(add_thermostats))
+
+
+# thermostat fields the entity state is built from, it is only called back when one of them changes
+SUBSCRIBED_FIELDS = (
+    "online",
+    "capabilities",
+    "mode",
+    "status",
+    "schedule",
+    "indoor_temperature",
+    "indoor_humidity",
+    "set_point_heat",
+    "set_point_heat_min",
+    "set_point_heat_max",
+    "set_point_cool",
+    "set_point_cool_min",
+    "set_point_cool_max",
+)
+
+
+# hvac modes that can be set directly, emergency heat is set through the preset mode instead
+HVAC_MODE_TO_THERMOSTAT_MODE = {
+    HVACMode.HEAT_COOL: DaikinThermostatMode.AUTO,
+    HVACMode.HEAT: DaikinThermostatMode.HEAT,
+    HVACMode.COOL: DaikinThermostatMode.COOL,
+    HVACMode.OFF: DaikinThermostatMode.OFF,
+}
 
 
 class DaikinOneThermostatPresetMode(Enum):
@@ -56,14 +83,12 @@ class DaikinOneThermostatPresetMode(Enum):
     EMERGENCY_HEAT = "emergency_heat"
 
 
-class DaikinOneThermostat(ClimateEntity):
+class DaikinOneThermostat(CoordinatorEntity[DaikinOneCoordinator], ClimateEntity):  # type: ignore
     """Thermostat entity for Daikin One"""
 
     _data: DaikinOneData
     _thermostat: DaikinThermostat
 
-    _updates_paused: bool = False
-
     # to be removed in a future version of HA
     _enable_turn_on_off_backwards_compatibility = False
 
@@ -73,9 +98,12 @@ class DaikinOneThermostat(ClimateEntity):
         data: DaikinOneData,
         thermostat: DaikinThermostat,
     ):
+        super().__init__(data.coordinator, context=frozenset((thermostat.id, None, name) for name in SUBSCRIBED_FIELDS))
+
         self.entity_description = description
         self._data = data
         self._thermostat = thermostat
+        self._present = True
 
         self._attr_translation_key = "daikinone_thermostat"
         self._attr_unique_id = f"{self._thermostat.id}-climate"
@@ -88,13 +116,7 @@ class DaikinOneThermostat(ClimateEntity):
         )
         self._attr_hvac_modes = self.get_hvac_modes()
 
-        self._attr_device_info = DeviceInfo(
-            identifiers={(DOMAIN, self._thermostat.id)},
-            name=f"{self._thermostat.name} Thermostat",
-            manufacturer=MANUFACTURER,
-            model=self._thermostat.model,
-            sw_version=self._thermostat.firmware_version,
-        )
+        self._attr_device_info = data.get_thermostat_device_info(self._thermostat.id)
 
         # These attributes must be initialized otherwise HA `CachedProperties` doesn't create a
         # backing prop. If they are not initialized, climate will error during setup because we support
@@ -113,6 +135,8 @@ class DaikinOneThermostat(ClimateEntity):
             self._attr_supported_features |= ClimateEntityFeature.PRESET_MODE
             self._attr_preset_modes += [DaikinOneThermostatPresetMode.EMERGENCY_HEAT.value]
 
+        self.update_entity_attributes()
+
     def get_hvac_modes(self) -> list[HVACMode]:
         modes: list[HVACMode] = []
 
@@ -133,35 +157,16 @@ class DaikinOneThermostat(ClimateEntity):
 
     async def async_set_hvac_mode(self, hvac_mode: HVACMode) -> None:
         """Set new target hvac mode."""
-        target_mode: DaikinThermostatMode
-        match hvac_mode:
-            case HVACMode.HEAT_COOL:
-                target_mode = DaikinThermostatMode.AUTO
-            case HVACMode.HEAT:
-                target_mode = DaikinThermostatMode.HEAT
-            case HVACMode.COOL:
-                target_mode = DaikinThermostatMode.COOL
-            case HVACMode.OFF:
-                target_mode = DaikinThermostatMode.OFF
-            case _:
-                raise ValueError(f"Attempted to set unsupported HVAC mode: {hvac_mode}")
+        target_mode = HVAC_MODE_TO_THERMOSTAT_MODE.get(hvac_mode)
+        if target_mode is None:
+            raise ValueError(f"Attempted to set unsupported HVAC mode: {hvac_mode}")
 
         await self.set_thermostat_mode(target_mode)
 
     async def set_thermostat_mode(self, target_mode: DaikinThermostatMode) -> None:
         log.debug("Setting thermostat mode to %s", target_mode)
 
-        # update thermostat mode
-        await self._data.daikin.set_thermostat_mode(self._thermostat.id, target_mode)
-
-        # update entity state optimistically
-        def update(t: DaikinThermostat):
-            t.mode = target_mode
-
-        await self.update_state_optimistically(
-            update=update,
-            check=lambda t: t.mode == target_mode,
-        )
+        await self.send_command(DaikinThermostatCommand(mode=target_mode))
 
     async def async_set_preset_mode(self, preset_mode: str):
         """Set new target preset mode."""
@@ -200,23 +205,12 @@ class DaikinOneThermostat(ClimateEntity):
 
             log.debug("Setting thermostat set points: heat=%s and cool=%s", heat, cool)
 
-            await self._data.daikin.set_thermostat_home_set_points(
-                self._thermostat.id,
-                heat=heat,
-                cool=cool,
-                override_schedule=self._thermostat.schedule.enabled,
-            )
-
-            # update entity state optimistically
-            def update(t: DaikinThermostat):
-                if heat is not None:
-                    t.set_point_heat = heat
-                if cool is not None:
-                    t.set_point_cool = cool
-
-            await self.update_state_optimistically(
-                update=update,
-                check=lambda t: t.set_point_heat == heat and t.set_point_cool == cool,
+            await self.send_command(
+                DaikinThermostatCommand(
+                    set_point_heat=heat,
+                    set_point_cool=cool,
+                    override_schedule=self._thermostat.schedule.enabled,
+                )
             )
 
         elif temperature:
@@ -228,49 +222,42 @@ class DaikinOneThermostat(ClimateEntity):
                 case DaikinThermostatMode.HEAT | DaikinThermostatMode.AUX_HEAT:
                     log.debug("Setting thermostat set point: heat=%s ", temperature)
 
-                    await self._data.daikin.set_thermostat_home_set_points(self._thermostat.id, heat=temperature)
-
-                    # update entity state optimistically
-                    def update(t: DaikinThermostat):
-                        t.set_point_heat = temperature
-
-                    await self.update_state_optimistically(
-                        update=update,
-                        check=lambda t: t.set_point_heat == temperature,
-                    )
+                    await self.send_command(DaikinThermostatCommand(set_point_heat=temperature))
 
                 case DaikinThermostatMode.COOL:
                     log.debug("Setting thermostat set point: cool=%s ", temperature)
 
-                    await self._data.daikin.set_thermostat_home_set_points(self._thermostat.id, cool=temperature)
-
-                    # update entity state optimistically
-                    def update(t: DaikinThermostat):
-                        t.set_point_cool = temperature
-
-                    await self.update_state_optimistically(
-                        update=update,
-                        check=lambda t: t.set_point_cool == temperature,
-                    )
+                    await self.send_command(DaikinThermostatCommand(set_point_cool=temperature))
 
                 case _:
                     raise ValueError("Invalid thermostat mode and set temperature combination")
         else:
             raise ValueError("Set temperature called with no temperature values")
 
-    async def async_update(self, no_throttle: bool = False) -> None:
-        """Get the latest state of the sensor."""
-        if self._updates_paused:
-            return
+    @property
+    def available(self) -> bool:  # type: ignore
+        return self._present and self.coordinator.is_fresh(self._thermostat.id) and self._thermostat.online
 
+    async def async_update(self) -> None:
+        """Refresh in the background, the last snapshot is shown until the refreshed one is in."""
+        if self.enabled:
+            self.coordinator.async_refresh_in_background()
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Update the entity from the latest coordinator snapshot."""
         log.debug("Updating climate entity for thermostat %s", self._thermostat.id)
-        await self._data.update(no_throttle=no_throttle)
-        self._thermostat = self._data.daikin.get_thermostat(self._thermostat.id)
 
-        self.update_entity_attributes()
+        # a thermostat that was removed from the account keeps its last snapshot and shows as unavailable
+        thermostat = self.coordinator.data.get(self._thermostat.id)
+        self._present = thermostat is not None
+        if thermostat is not None:
+            self._thermostat = thermostat
+            self.update_entity_attributes()
+
+        self.async_write_ha_state()
 
     def update_entity_attributes(self) -> None:
-        self._attr_available = self._thermostat.online
         self._attr_current_temperature = self._thermostat.indoor_temperature.celsius
         self._attr_current_humidity = self._thermostat.indoor_humidity
 
@@ -332,46 +319,10 @@ class DaikinOneThermostat(ClimateEntity):
             self._thermostat.set_point_cool_max.celsius,
         )
 
-    async def update_state_optimistically(
-        self, update: Callable[[DaikinThermostat], None], check: Callable[[DaikinThermostat], bool]
-    ) -> None:
-        """
-        Executes the given state update optimistically, then waits for the API to update the state as well. Regularly
-        scheduled updates are paused while waiting to avoid overwriting the optimistic update with stale data. A full
-        entity update is scheduled at the end regardless of whether updated remote state was found or not.
-        """
-        # pause entity updates
-        _updates_paused = True
-
-        # execute state update optimistically
-        update(self._thermostat)
-        self.update_entity_attributes()
-        self.async_write_ha_state()
-
-        # wait for remote state to be updated
-        await self._wait_for_updated_value(check)
-
-        # resume entity updates
-        _updates_paused = False
-
-        # full entity update to make sure everything is in sync
-        await self.async_update(no_throttle=True)
-        self.async_write_ha_state()
-
-    @backoff.on_predicate(
-        backoff.constant,
-        max_time=10,
-        on_success=lambda _: log.debug("Finished waiting for updated value"),
-        on_giveup=lambda _: log.debug("Gave up waiting for updated value"),
-        logger=log.getChild("backoff"),
-        backoff_log_level=logging.DEBUG,
-        giveup_log_level=logging.DEBUG,
-    )
-    async def _wait_for_updated_value(self, check: Callable[[DaikinThermostat], bool]) -> bool:
+    async def send_command(self, command: DaikinThermostatCommand) -> None:
         """
-        Waits for an updated value from the API. Continually retries until the check passes or max_time has been
-        reached.
+        Sends the command and shows its changes optimistically until the API reports them as well. Commands sent in
+        quick succession are merged into a single update. Only the changed fields are held, everything else keeps
+        updating from regular polls in the meantime.
         """
-
-        await self._data.update(no_throttle=True)
-        return check(self._data.daikin.get_thermostat(self._thermostat.id))
+        await self._data.async_send_command(self._thermostat.id, command)
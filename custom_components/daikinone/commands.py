@@ -0,0 +1,239 @@
+import asyncio
+import time
+from collections.abc import Awaitable, Callable, Iterable
+from contextlib import AsyncExitStack
+from dataclasses import dataclass, field, replace
+from datetime import timedelta
+from functools import partial
+from typing import Any
+
+from custom_components.daikinone.const import COMMAND_DEBOUNCE_DELAY, PENDING_COMMAND_TIMEOUT
+from custom_components.daikinone.daikinone import DaikinFieldKey, DaikinThermostat, DaikinThermostatCommand
+
+
+@dataclass(frozen=True)
+class _PendingField:
+    value: Any
+    expires_at: float
+
+    # fetched values that only mean the command has not shown up yet, the value it replaced and those of earlier
+    # commands to the same field that may still be on their way
+    stale: frozenset[Any]
+
+
+class DaikinPendingCommands:
+    """
+    Ledger of thermostat fields set by commands that the cloud has not confirmed yet. The pending values are overlaid on
+    the fetched snapshots so a stale poll can not roll back what was just set, while every other field keeps updating.
+    A pending field is dropped as soon as a fetched snapshot has the same value, or once its timeout expires and the
+    fetched value takes over again. A fetched value that is neither the pending one nor one of the stale values it
+    replaced means the setting was changed elsewhere, e.g. on the thermostat itself, so it takes over right away.
+    """
+
+    def __init__(self, timeout: timedelta = PENDING_COMMAND_TIMEOUT):
+        self._timeout = timeout.total_seconds()
+        self._pending: dict[str, dict[str, _PendingField]] = {}
+
+        # last overlaid snapshot per thermostat and the fetched one it was made from, so an unchanged snapshot keeps
+        # its identity between calls
+        self._overlaid: dict[str, tuple[DaikinThermostat, DaikinThermostat]] = {}
+        self._overlaid_fields: dict[str, frozenset[str]] = {}
+
+    def add(self, thermostat_id: str, changes: dict[str, Any], fetched: DaikinThermostat | None) -> None:
+        """Hold the given field values over `fetched`, the latest snapshot fetched before the command was sent"""
+        expires_at = time.monotonic() + self._timeout
+        pending = self._pending.setdefault(thermostat_id, {})
+        for name, value in changes.items():
+            stale = {getattr(fetched, name)} if fetched is not None else set[Any]()
+            earlier = pending.get(name)
+            if earlier is not None:
+                stale |= earlier.stale | {earlier.value}
+            pending[name] = _PendingField(value, expires_at, frozenset(stale))
+
+    def discard(self, thermostat_id: str, names: Iterable[str]) -> None:
+        """Stop holding the given fields, e.g. because the command setting them failed"""
+        pending = self._pending.get(thermostat_id, {})
+        for name in names:
+            pending.pop(name, None)
+
+    def get(self, thermostat_id: str) -> dict[str, Any]:
+        """Get the pending field values of the given thermostat"""
+        return {name: pending.value for name, pending in self._pending.get(thermostat_id, {}).items()}
+
+    def apply(
+        self, thermostats: dict[str, DaikinThermostat]
+    ) -> tuple[dict[str, DaikinThermostat], set[DaikinFieldKey]]:
+        """
+        Overlay the pending fields on the given fetched snapshots. Also returns the keys of fields whose overlaid value
+        changed since the last call because a pending field was added, confirmed, overridden or expired.
+        """
+        now = time.monotonic()
+        result = dict(thermostats)
+        changed: set[DaikinFieldKey] = set()
+
+        for thermostat_id in self._pending.keys() | self._overlaid_fields.keys():
+            thermostat = thermostats.get(thermostat_id)
+            if thermostat is None:
+                self._pending.pop(thermostat_id, None)
+                self._overlaid.pop(thermostat_id, None)
+                self._overlaid_fields.pop(thermostat_id, None)
+                continue
+
+            pending = {
+                name: field
+                for name, field in self._pending.get(thermostat_id, {}).items()
+                if field.expires_at > now
+                and getattr(thermostat, name) != field.value
+                and getattr(thermostat, name) in field.stale
+            }
+            if pending:
+                self._pending[thermostat_id] = pending
+            else:
+                self._pending.pop(thermostat_id, None)
+
+            overlaid = self.__overlay(thermostat, pending)
+            result[thermostat_id] = overlaid
+
+            # fields that went in or out of the overlay may now show a different value than last time
+            previous = self._overlaid.get(thermostat_id)
+            for name in self._overlaid_fields.get(thermostat_id, frozenset()) | pending.keys():
+                if previous is None or getattr(previous[1], name) != getattr(overlaid, name):
+                    changed.add((thermostat_id, None, name))
+
+            if pending:
+                self._overlaid[thermostat_id] = (thermostat, overlaid)
+                self._overlaid_fields[thermostat_id] = frozenset(pending)
+            else:
+                self._overlaid.pop(thermostat_id, None)
+                self._overlaid_fields.pop(thermostat_id, None)
+
+        return result, changed
+
+    def __overlay(self, thermostat: DaikinThermostat, pending: dict[str, _PendingField]) -> DaikinThermostat:
+        if not pending:
+            return thermostat
+
+        previous = self._overlaid.get(thermostat.id)
+        if (
+            previous is not None
+            and previous[0] is thermostat
+            and self._overlaid_fields.get(thermostat.id) == frozenset(pending)
+            and all(getattr(previous[1], name) == field.value for name, field in pending.items())
+        ):
+            return previous[1]
+
+        return replace(thermostat, **{name: field.value for name, field in pending.items()})
+
+
+@dataclass
+class DaikinCommandQueueStats:
+    """Commands submitted, updates actually sent for them, and commands merged into another's update or skipped"""
+
+    submitted: int = 0
+    sent: int = 0
+    collapsed: int = 0
+    skipped: int = 0
+
+
+@dataclass
+class _Batch:
+    command: DaikinThermostatCommand
+    sent: asyncio.Future[DaikinThermostatCommand]
+    timer: asyncio.TimerHandle
+    limits: list[asyncio.Semaphore] = field(default_factory=list[asyncio.Semaphore])
+    size: int = 1
+
+
+class DaikinCommandQueue:
+    """
+    Debounces and merges commands per thermostat, so a burst of commands like dragging a set point slider ends up as a
+    single update with the final values. Every command of a batch waits for that one update. Updates to a thermostat
+    are sent one at a time in submission order, so the last write always wins.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[str, DaikinThermostatCommand], Awaitable[None]],
+        delay: timedelta = COMMAND_DEBOUNCE_DELAY,
+    ):
+        self._send = send
+        self._delay = delay.total_seconds()
+        self._batches: dict[str, _Batch] = {}
+        self._sending: dict[str, asyncio.Task[None]] = {}
+        self._tasks: set[asyncio.Task[None]] = set()
+        self.stats = DaikinCommandQueueStats()
+
+    async def submit(
+        self, thermostat_id: str, command: DaikinThermostatCommand, limit: asyncio.Semaphore | None = None
+    ) -> DaikinThermostatCommand:
+        """
+        Queue a command and wait until it was sent, returns the merged command that was actually sent. The update is
+        sent while holding `limit` if given, to bound how many updates a caller has in flight at once. A batch merging
+        the commands of several callers holds the limits of all of them.
+        """
+        self.stats.submitted += 1
+        loop = asyncio.get_running_loop()
+
+        batch = self._batches.get(thermostat_id)
+        if batch is None:
+            batch = _Batch(
+                command=command,
+                sent=loop.create_future(),
+                timer=loop.call_later(self._delay, self.__flush, thermostat_id),
+            )
+            self._batches[thermostat_id] = batch
+        else:
+            batch.command = batch.command.merge(command)
+            batch.size += 1
+            batch.timer.cancel()
+            batch.timer = loop.call_later(self._delay, self.__flush, thermostat_id)
+
+        if limit is not None and limit not in batch.limits:
+            batch.limits.append(limit)
+
+        # shield so one cancelled caller does not cancel the update for the rest of the batch
+        return await asyncio.shield(batch.sent)
+
+    def cancel(self) -> None:
+        """Drop queued commands and stop sending the ones in flight, everyone waiting on them is cancelled"""
+        for batch in self._batches.values():
+            batch.timer.cancel()
+            batch.sent.cancel()
+        self._batches.clear()
+
+        for task in self._tasks:
+            task.cancel()
+
+    def __flush(self, thermostat_id: str) -> None:
+        batch = self._batches.pop(thermostat_id)
+        self.stats.sent += 1
+        self.stats.collapsed += batch.size - 1
+
+        previous = self._sending.get(thermostat_id)
+        task = asyncio.create_task(self.__send(thermostat_id, batch, previous))
+        self._sending[thermostat_id] = task
+        self._tasks.add(task)
+        task.add_done_callback(partial(self.__sent, thermostat_id))
+
+    def __sent(self, thermostat_id: str, task: asyncio.Task[None]) -> None:
+        self._tasks.discard(task)
+        if self._sending.get(thermostat_id) is task:
+            del self._sending[thermostat_id]
+
+    async def __send(self, thermostat_id: str, batch: _Batch, previous: asyncio.Task[None] | None) -> None:
+        try:
+            if previous is not None:
+                await asyncio.wait([previous])
+
+            # always taken in the same order, so batches sharing limits can not deadlock each other
+            async with AsyncExitStack() as stack:
+                for limit in sorted(batch.limits, key=id):
+                    await stack.enter_async_context(limit)
+                await self._send(thermostat_id, batch.command)
+        except asyncio.CancelledError:
+            batch.sent.cancel()
+            raise
+        except Exception as e:  # handed to everyone waiting on the batch
+            batch.sent.set_exception(e)
+        else:
+            batch.sent.set_result(batch.command)
@@ -4,8 +4,23 @@ from typing import Any
 import voluptuous as vol
 from homeassistant import config_entries
 from homeassistant.const import CONF_EMAIL, CONF_PASSWORD
+from homeassistant.core import callback
+from homeassistant.data_entry_flow import FlowResult
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
 
-from .const import DOMAIN, CONF_OPTION_ENTITY_UID_SCHEMA_VERSION_KEY
+from .const import (
+    DOMAIN,
+    CONF_OPTION_ENTITY_UID_SCHEMA_VERSION_KEY,
+    CONF_OPTION_MAX_POLL_INTERVAL_KEY,
+    CONF_OPTION_MIN_POLL_INTERVAL_KEY,
+    CONF_OPTION_STALENESS_LIMIT_KEY,
+    DEFAULT_MAX_POLL_INTERVAL,
+    DEFAULT_MIN_POLL_INTERVAL,
+    DEFAULT_STALENESS_LIMIT,
+    MAX_POLL_INTERVAL_RANGE,
+    MIN_POLL_INTERVAL_RANGE,
+    STALENESS_LIMIT_RANGE,
+)
 from .daikinone import DaikinOne, DaikinUserCredentials
 
 log = logging.getLogger(__name__)
@@ -22,6 +37,11 @@ class DaikinOneConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         """Return current schema."""
         return vol.Schema({vol.Required(CONF_EMAIL): str, vol.Required(CONF_PASSWORD): str})
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry: config_entries.ConfigEntry) -> "DaikinOneOptionsFlow":
+        return DaikinOneOptionsFlow(config_entry)
+
     async def async_step_user(self, user_input: dict[str, Any] | None = None):
         errors: dict[str, str] = {}
 
@@ -30,7 +50,7 @@ class DaikinOneConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             password = user_input[CONF_PASSWORD]
 
             # check auth before finishing setup to ensure credentials work
-            daikin = DaikinOne(DaikinUserCredentials(email, password))
+            daikin = DaikinOne(DaikinUserCredentials(email, password), async_get_clientsession(self.hass))
             ok = await daikin.login()
 
             if ok is False:
@@ -47,3 +67,46 @@ class DaikinOneConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 )
 
         return self.async_show_form(step_id="user", data_schema=self.schema, errors=errors)
+
+
+class DaikinOneOptionsFlow(config_entries.OptionsFlow):
+    """Daikin One options flow."""
+
+    def __init__(self, config_entry: config_entries.ConfigEntry):
+        self.config_entry = config_entry
+
+    @property
+    def schema(self):
+        """Return current schema."""
+        options = self.config_entry.options
+        return vol.Schema(
+            {
+                vol.Required(
+                    CONF_OPTION_MIN_POLL_INTERVAL_KEY,
+                    default=options.get(
+                        CONF_OPTION_MIN_POLL_INTERVAL_KEY, int(DEFAULT_MIN_POLL_INTERVAL.total_seconds())
+                    ),
+                ): vol.All(vol.Coerce(int), vol.Range(*MIN_POLL_INTERVAL_RANGE)),
+                vol.Required(
+                    CONF_OPTION_MAX_POLL_INTERVAL_KEY,
+                    default=options.get(
+                        CONF_OPTION_MAX_POLL_INTERVAL_KEY, int(DEFAULT_MAX_POLL_INTERVAL.total_seconds())
+                    ),
+                ): vol.All(vol.Coerce(int), vol.Range(*MAX_POLL_INTERVAL_RANGE)),
+                vol.Required(
+                    CONF_OPTION_STALENESS_LIMIT_KEY,
+                    default=options.get(CONF_OPTION_STALENESS_LIMIT_KEY, int(DEFAULT_STALENESS_LIMIT.total_seconds())),
+                ): vol.All(vol.Coerce(int), vol.Range(*STALENESS_LIMIT_RANGE)),
+            }
+        )
+
+    async def async_step_init(self, user_input: dict[str, Any] | None = None) -> FlowResult:
+        errors: dict[str, str] = {}
+
+        if user_input is not None:
+            if user_input[CONF_OPTION_MIN_POLL_INTERVAL_KEY] > user_input[CONF_OPTION_MAX_POLL_INTERVAL_KEY]:
+                errors["base"] = "invalid_poll_interval"
+            else:
+                return self.async_create_entry(title="", data=user_input)
+
+        return self.async_show_form(step_id="init", data_schema=self.schema, errors=errors)
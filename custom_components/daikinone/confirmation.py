@@ -0,0 +1,94 @@
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from datetime import timedelta
+
+from aiohttp import ClientError
+
+from custom_components.daikinone.const import CONFIRMATION_POLL_INTERVAL, CONFIRMATION_TIMEOUT
+from custom_components.daikinone.daikinone import DaikinThermostat
+from custom_components.daikinone.exceptions import DaikinServiceException
+
+log = logging.getLogger(__name__)
+
+
+@dataclass
+class _Waiter:
+    check: Callable[[DaikinThermostat], bool]
+    confirmed: asyncio.Future[bool]
+
+
+class DaikinOneConfirmationWaiter:
+    """
+    Waits for sent commands to show up in the cloud state. Commands register a check for their thermostat, and one
+    shared loop polls just the thermostats with pending checks, resolving every check from the same response. The loop
+    only runs while something is waiting.
+    """
+
+    def __init__(
+        self,
+        refresh: Callable[[set[str]], Awaitable[dict[str, DaikinThermostat]]],
+        interval: timedelta = CONFIRMATION_POLL_INTERVAL,
+    ):
+        """`refresh` fetches the given thermostats and returns the latest snapshots"""
+        self._refresh = refresh
+        self._interval = interval.total_seconds()
+        self._waiters: dict[str, list[_Waiter]] = {}
+        self._loop_task: asyncio.Task[None] | None = None
+
+    async def wait(
+        self,
+        thermostat_id: str,
+        check: Callable[[DaikinThermostat], bool],
+        timeout: timedelta = CONFIRMATION_TIMEOUT,
+    ) -> bool:
+        """Wait until the check passes for the given thermostat, returns False if it did not pass before the timeout"""
+        waiter = _Waiter(check, asyncio.get_running_loop().create_future())
+        self._waiters.setdefault(thermostat_id, []).append(waiter)
+
+        if self._loop_task is None:
+            self._loop_task = asyncio.create_task(self._poll())
+
+        try:
+            return await asyncio.wait_for(waiter.confirmed, timeout.total_seconds())
+        except TimeoutError:
+            return False
+        finally:
+            self._remove(thermostat_id, waiter)
+
+    def cancel(self) -> None:
+        """Stop polling, anything still waiting runs into its timeout"""
+        if self._loop_task is not None:
+            self._loop_task.cancel()
+            self._loop_task = None
+
+    def _remove(self, thermostat_id: str, waiter: _Waiter) -> None:
+        waiters = self._waiters.get(thermostat_id)
+        if waiters is not None and waiter in waiters:
+            waiters.remove(waiter)
+            if not waiters:
+                del self._waiters[thermostat_id]
+
+    async def _poll(self) -> None:
+        try:
+            while self._waiters:
+                await asyncio.sleep(self._interval)
+                if not self._waiters:
+                    break
+
+                try:
+                    thermostats = await self._refresh(set(self._waiters))
+                except (DaikinServiceException, ClientError, TimeoutError) as e:
+                    log.debug(f"Failed to refresh thermostats while waiting for confirmation: {e!r}")
+                    continue
+
+                for thermostat_id, waiters in list(self._waiters.items()):
+                    thermostat = thermostats.get(thermostat_id)
+                    if thermostat is None:
+                        continue
+                    for waiter in waiters:
+                        if not waiter.confirmed.done() and waiter.check(thermostat):
+                            waiter.confirmed.set_result(True)
+        finally:
+            self._loop_task = None
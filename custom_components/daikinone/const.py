@@ -12,6 +12,48 @@ PLATFORMS = [
     Platform.SENSOR,
 ]
 
-MIN_TIME_BETWEEN_UPDATES = timedelta(seconds=30)
+# adaptive polling, see DaikinOnePollScheduler
+DEFAULT_MIN_POLL_INTERVAL = timedelta(seconds=15)
+DEFAULT_MAX_POLL_INTERVAL = timedelta(seconds=120)
+MIN_POLL_INTERVAL_RANGE = (5, 300)
+MAX_POLL_INTERVAL_RANGE = (15, 3600)
+MAX_ERROR_POLL_INTERVAL = timedelta(minutes=15)
+COMMAND_ACTIVE_WINDOW = timedelta(minutes=2)
+
+# offset between the polls of each additional account
+POLL_STAGGER = timedelta(seconds=5)
+
+# how old the last successfully fetched snapshot of a thermostat may get before its entities become unavailable
+DEFAULT_STALENESS_LIMIT = timedelta(minutes=10)
+STALENESS_LIMIT_RANGE = (60, 86400)
+
+# how often and for how long to poll for a sent command to show up in the cloud state
+CONFIRMATION_POLL_INTERVAL = timedelta(seconds=1)
+CONFIRMATION_TIMEOUT = timedelta(seconds=10)
+
+# how long to wait for more commands to the same thermostat before sending them as one update
+COMMAND_DEBOUNCE_DELAY = timedelta(milliseconds=500)
+
+# how long values set by a command are shown over what the cloud reports before giving up on the command
+PENDING_COMMAND_TIMEOUT = timedelta(seconds=30)
+
+# how many thermostat updates a bulk set sends at once by default
+BULK_SET_DEFAULT_CONCURRENCY = 4
+
+# how many refresh cycles the profile service profiles by default
+PROFILE_DEFAULT_CYCLES = 3
+
+# how much longer than the cycles take at the current poll interval the profile service waits for them
+PROFILE_TIMEOUT_MARGIN = timedelta(minutes=1)
+
+# metrics label of the work done by the coordinator itself, next to those of the api endpoints
+METRICS_COORDINATOR = "coordinator"
+
+# the last fetched state is saved so the next start can set up entities before reaching the cloud
+STORAGE_VERSION = 1
+STORAGE_SAVE_DELAY = timedelta(minutes=1)
 
 CONF_OPTION_ENTITY_UID_SCHEMA_VERSION_KEY = "entity_uid_schema_version"
+CONF_OPTION_MIN_POLL_INTERVAL_KEY = "min_poll_interval"
+CONF_OPTION_MAX_POLL_INTERVAL_KEY = "max_poll_interval"
+CONF_OPTION_STALENESS_LIMIT_KEY = "staleness_limit"
@@ -1,17 +1,31 @@
-import copy
+import asyncio
+import base64
 import json
 import logging
-from datetime import timedelta
+import time
+from dataclasses import asdict, dataclass, field, fields, replace
+from datetime import datetime, timedelta
+from email.utils import parsedate_to_datetime
 from enum import Enum, auto
-from urllib.parse import urljoin
-from typing import Any
+from fractions import Fraction
+from functools import cache
+from urllib.parse import urljoin, urlparse
+from typing import Any, Callable, Iterable, Mapping
 
 import aiohttp
 from aiohttp import ClientError
-from pydantic import BaseModel
-from pydantic.dataclasses import dataclass
 
 from .exceptions import DaikinServiceException
+from custom_components.daikinone.breaker import DaikinCircuitBreaker, DaikinCircuitBreakerStats
+from custom_components.daikinone.mapping import (
+    EquipmentMapper,
+    EquipmentMetadata,
+    EquipmentSpec,
+    FieldMapper,
+    FieldSpec,
+)
+from custom_components.daikinone.metrics import DaikinMetrics, DaikinPhase
+from custom_components.daikinone.ratelimit import DaikinRateLimiter, DaikinRateLimiterStats, DaikinRequestPriority
 from custom_components.daikinone.utils import Temperature
 
 log = logging.getLogger(__name__)
@@ -24,13 +38,65 @@ DAIKIN_API_URL_DEVICES = urljoin(DAIKIN_API_URL_BASE, "/devices")
 DAIKIN_API_URL_DEVICE_DATA = urljoin(DAIKIN_API_URL_BASE, "/deviceData")
 
 
+def _endpoint(method: str, url: str) -> str:
+    """Metrics label of a request, with the device id left out so there is a single label per endpoint"""
+    path = urlparse(url).path
+    if path.startswith("/deviceData/"):
+        path = "/deviceData/{id}"
+    return f"{method} {path}"
+
+
+DAIKIN_API_ENDPOINT_LOGIN = _endpoint("POST", DAIKIN_API_URL_LOGIN)
+DAIKIN_API_ENDPOINT_REFRESH_TOKEN = _endpoint("POST", DAIKIN_API_URL_REFRESH_TOKEN)
+DAIKIN_API_ENDPOINT_DEVICE_DATA = _endpoint("GET", DAIKIN_API_URL_DEVICE_DATA)
+DAIKIN_API_ENDPOINT_THERMOSTAT_DATA = _endpoint("GET", f"{DAIKIN_API_URL_DEVICE_DATA}/{{id}}")
+
+DAIKIN_API_REQUEST_TIMEOUT = aiohttp.ClientTimeout(total=30)
+DAIKIN_API_KEEPALIVE_TIMEOUT = 120
+
+# refresh the access token in the background once it gets this close to expiring, and block on the refresh once it is
+# about to expire
+DAIKIN_API_TOKEN_REFRESH_AHEAD = timedelta(minutes=5)
+DAIKIN_API_TOKEN_EXPIRY_MARGIN = timedelta(seconds=30)
+
+# request budget shared by everything one client sends, as sustained requests per second and burst size
+DAIKIN_API_RATE_LIMIT = 2.0
+DAIKIN_API_RATE_LIMIT_BURST = 10
+
+# how long to back off when the api is throttling without saying for how long, and the longest back off a request
+# waits out before retrying instead of failing
+DAIKIN_API_DEFAULT_RETRY_AFTER = timedelta(seconds=10)
+DAIKIN_API_MAX_RETRY_AFTER = timedelta(seconds=30)
+
+# consecutive failed requests after which no more requests are sent for a while, and how long that lasts at first and
+# at most while probe requests keep failing
+DAIKIN_API_CIRCUIT_BREAKER_THRESHOLD = 3
+DAIKIN_API_CIRCUIT_BREAKER_OPEN_FOR = timedelta(seconds=30)
+DAIKIN_API_CIRCUIT_BREAKER_MAX_OPEN_FOR = timedelta(minutes=15)
+
+# how often the rarely changing device metadata is fetched again, besides whenever a device shows up or its firmware
+# changes
+DAIKIN_API_METADATA_REFRESH_INTERVAL = timedelta(hours=24)
+
+# how soon fetching the device metadata is tried again after it failed
+DAIKIN_API_METADATA_RETRY_INTERVAL = timedelta(minutes=5)
+
+# device data responses of at least this many bytes are decoded and mapped in the executor instead of on the event
+# loop, that is about 30 thermostats
+DAIKIN_API_OFFLOAD_THRESHOLD = 256 * 1024
+
+
 @dataclass
 class DaikinUserCredentials:
     email: str
     password: str
 
 
-@dataclass
+# Device models are immutable snapshots of the last data fetched from the API. They are shared as-is with every
+# consumer, so any local change must be made on a copy with `dataclasses.replace`. They are plain dataclasses built by
+# the compiled mappers below, which produce already typed values, so no validation is done on construction. Slots keep
+# each snapshot small, as one is kept per thermostat and piece of equipment.
+@dataclass(frozen=True, slots=True)
 class DaikinDevice:
     id: str
     name: str
@@ -38,13 +104,13 @@ class DaikinDevice:
     firmware_version: str
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class DaikinEquipment(DaikinDevice):
     thermostat_id: str
     serial: str
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class DaikinIndoorUnit(DaikinEquipment):
     mode: str
     current_airflow: int
@@ -71,7 +137,7 @@ class DaikinOutdoorUnitHeaterStatus(Enum):
     UNKNOWN = 255
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class DaikinOutdoorUnit(DaikinEquipment):
     inverter_software_version: str | None
     total_runtime: timedelta
@@ -108,7 +174,7 @@ class DaikinOutdoorUnit(DaikinEquipment):
     # compressor reduction mode - ctOutdoorCompressorReductionMode - 1=off, ?
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class DaikinEEVCoil(DaikinEquipment):
     indoor_superheat_temperature: Temperature
     liquid_temperature: Temperature
@@ -138,16 +204,16 @@ class DaikinThermostatStatus(Enum):
     IDLE = 5
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class DaikinThermostatSchedule:
     enabled: bool
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class DaikinThermostat(DaikinDevice):
     location_id: str
     online: bool
-    capabilities: set[DaikinThermostatCapability]
+    capabilities: frozenset[DaikinThermostatCapability]
     mode: DaikinThermostatMode
     status: DaikinThermostatStatus
     schedule: DaikinThermostatSchedule
@@ -159,10 +225,272 @@ class DaikinThermostat(DaikinDevice):
     set_point_cool: Temperature
     set_point_cool_min: Temperature
     set_point_cool_max: Temperature
-    equipment: dict[str, DaikinEquipment]
+    set_point_heat_home: Temperature
+    set_point_cool_home: Temperature
+    equipment: Mapping[str, DaikinEquipment]
+
+
+@dataclass(frozen=True, slots=True)
+class DaikinThermostatMetadata:
+    """Static information on a thermostat, from the devices and locations endpoints"""
+
+    id: str
+    name: str
+    model: str
+    firmware_version: str
+    location_id: str
+    location_name: str | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class DaikinThermostatCommand:
+    """
+    Thermostat settings to change in a single device data update, fields left as None are not changed. Field names
+    match the DaikinThermostat fields they set. Set points are written as the home set points, which the active ones
+    follow while the thermostat is home.
+    """
+
+    mode: DaikinThermostatMode | None = None
+    set_point_heat: Temperature | None = None
+    set_point_cool: Temperature | None = None
+    override_schedule: bool = False
+
+    def merge(self, later: "DaikinThermostatCommand") -> "DaikinThermostatCommand":
+        """Combine with a later command, its settings win"""
+        return DaikinThermostatCommand(
+            mode=later.mode if later.mode is not None else self.mode,
+            set_point_heat=later.set_point_heat if later.set_point_heat is not None else self.set_point_heat,
+            set_point_cool=later.set_point_cool if later.set_point_cool is not None else self.set_point_cool,
+            override_schedule=self.override_schedule or later.override_schedule,
+        )
+
+    def changes(self) -> dict[str, Any]:
+        """Get the thermostat fields this command changes"""
+        changes: dict[str, Any] = {}
+        if self.mode is not None:
+            changes["mode"] = self.mode
+        if self.set_point_heat is not None:
+            changes["set_point_heat"] = self.set_point_heat
+            changes["set_point_heat_home"] = self.set_point_heat
+        if self.set_point_cool is not None:
+            changes["set_point_cool"] = self.set_point_cool
+            changes["set_point_cool_home"] = self.set_point_cool
+        return changes
+
+    def is_applied(self, thermostat: DaikinThermostat) -> bool:
+        """Check whether the thermostat reflects every change of this command"""
+        return all(getattr(thermostat, name) == value for name, value in self.changes().items())
+
+    def without_applied(self, thermostat: DaikinThermostat) -> "DaikinThermostatCommand | None":
+        """
+        Drop the settings the thermostat already has, or get None if there is nothing left to change. Set points are
+        compared with the home set points they are written to, the active ones may come from the schedule instead.
+
+        While the schedule is enabled, overriding it holds the set points until the schedule is resumed, rather than
+        until its next step, so a command that overrides the schedule is kept as a whole. With the schedule disabled the
+        override does nothing and is not a change on its own.
+        """
+        if self.override_schedule and thermostat.schedule.enabled:
+            return self
+
+        command = replace(
+            self,
+            mode=None if self.mode == thermostat.mode else self.mode,
+            set_point_heat=None if self.set_point_heat == thermostat.set_point_heat_home else self.set_point_heat,
+            set_point_cool=None if self.set_point_cool == thermostat.set_point_cool_home else self.set_point_cool,
+        )
+        if command == self:
+            return self
+        return command if command.changes() else None
+
+    def payload(self) -> dict[str, Any]:
+        payload: dict[str, Any] = {}
+        if self.mode is not None:
+            payload["mode"] = self.mode.value
+        if self.set_point_heat is not None:
+            payload["hspHome"] = self.set_point_heat.celsius
+        if self.set_point_cool is not None:
+            payload["cspHome"] = self.set_point_cool.celsius
+        if self.override_schedule:
+            payload["schedOverride"] = 1
+        return payload
+
+
+# Mapping tables from raw device data to models. Each table is compiled once at import into a mapper, adding support
+# for new equipment or telemetry should only need a new entry here.
+
+HALF = Fraction(1, 2)
+TENTH = Fraction(1, 10)
+
+
+def _text(value: str) -> str:
+    return value.strip()
+
+
+def _mode(value: str) -> str:
+    return value.strip().capitalize()
+
+
+def _hours(value: int) -> timedelta:
+    return timedelta(hours=value)
+
+
+def _schedule(value: bool) -> DaikinThermostatSchedule:
+    return DaikinThermostatSchedule(enabled=bool(value))
+
+
+def _outdoor_unit_name(data: Mapping[str, Any]) -> str:
+    # assume it can cool, and if it can also heat it should be a heat pump
+    if data["ctOutdoorHeatMaxRPS"] != 0 and data["ctOutdoorHeatMaxRPS"] != 65535:
+        return "Heat Pump"
+    return "Condensing Unit"
+
+
+THERMOSTAT_FIELDS = FieldMapper(
+    (
+        FieldSpec("mode", "mode", transform=DaikinThermostatMode),
+        FieldSpec("status", "equipmentStatus", transform=DaikinThermostatStatus),
+        FieldSpec("schedule", "schedEnabled", transform=_schedule),
+        FieldSpec("indoor_temperature", "tempIndoor", transform=Temperature.from_celsius),
+        FieldSpec("indoor_humidity", "humIndoor"),
+        FieldSpec("set_point_heat", "hspActive", transform=Temperature.from_celsius),
+        FieldSpec("set_point_heat_min", "EquipProtocolMinHeatSetpoint", transform=Temperature.from_celsius),
+        FieldSpec("set_point_heat_max", "EquipProtocolMaxHeatSetpoint", transform=Temperature.from_celsius),
+        FieldSpec("set_point_cool", "cspActive", transform=Temperature.from_celsius),
+        FieldSpec("set_point_cool_min", "EquipProtocolMinCoolSetpoint", transform=Temperature.from_celsius),
+        FieldSpec("set_point_cool_max", "EquipProtocolMaxCoolSetpoint", transform=Temperature.from_celsius),
+        FieldSpec("set_point_heat_home", "hspHome", transform=Temperature.from_celsius),
+        FieldSpec("set_point_cool_home", "cspHome", transform=Temperature.from_celsius),
+    )
+)
+
+EQUIPMENT_MAPPERS: tuple[EquipmentMapper[DaikinEquipment], ...] = tuple(
+    EquipmentMapper[DaikinEquipment](spec)
+    for spec in (
+        # air handler
+        EquipmentSpec(
+            model=DaikinIndoorUnit,
+            unit_type_key="ctAHUnitType",
+            id_format="{model}-{serial}",
+            name="Air Handler",
+            fields=(
+                FieldSpec("model", "ctAHModelNoCharacter1_15", transform=_text, static=True),
+                FieldSpec("serial", "ctAHSerialNoCharacter1_15", transform=_text, static=True),
+                FieldSpec("firmware_version", "ctAHControlSoftwareVersion", transform=_text, static=True),
+                FieldSpec("mode", "ctAHMode", transform=_mode),
+                FieldSpec("current_airflow", "ctAHCurrentIndoorAirflow"),
+                FieldSpec("fan_demand_requested_percent", "ctAHFanRequestedDemand", HALF, int),
+                FieldSpec("fan_demand_current_percent", "ctAHFanCurrentDemandStatus", HALF, int),
+                FieldSpec("heat_demand_requested_percent", "ctAHHeatRequestedDemand", HALF, int),
+                FieldSpec("heat_demand_current_percent", "ctAHHeatCurrentDemandStatus", HALF, int),
+                FieldSpec("cool_demand_requested_percent", None),
+                FieldSpec("cool_demand_current_percent", None),
+                FieldSpec("humidification_demand_requested_percent", "ctAHHumidificationRequestedDemand", HALF, int),
+                FieldSpec("dehumidification_demand_requested_percent", None),
+                FieldSpec("power_usage", "ctIndoorPower", TENTH),
+            ),
+        ),
+        # furnace
+        EquipmentSpec(
+            model=DaikinIndoorUnit,
+            unit_type_key="ctIFCUnitType",
+            id_format="{model}-{serial}",
+            name="Furnace",
+            fields=(
+                FieldSpec("model", "ctIFCModelNoCharacter1_15", transform=_text, static=True),
+                FieldSpec("serial", "ctIFCSerialNoCharacter1_15", transform=_text, static=True),
+                FieldSpec("firmware_version", "ctIFCControlSoftwareVersion", transform=_text, static=True),
+                FieldSpec("mode", "ctIFCOperatingHeatCoolMode", transform=_mode),
+                FieldSpec("current_airflow", "ctIFCIndoorBlowerAirflow"),
+                FieldSpec("fan_demand_requested_percent", "ctIFCFanRequestedDemandPercent", HALF, int),
+                FieldSpec("fan_demand_current_percent", "ctIFCCurrentFanActualStatus", HALF, int),
+                FieldSpec("heat_demand_requested_percent", "ctIFCHeatRequestedDemandPercent", HALF, int),
+                FieldSpec("heat_demand_current_percent", "ctIFCCurrentHeatActualStatus", HALF, int),
+                FieldSpec("cool_demand_requested_percent", "ctIFCCoolRequestedDemandPercent", HALF, int),
+                FieldSpec("cool_demand_current_percent", "ctIFCCurrentCoolActualStatus", HALF, int),
+                FieldSpec("humidification_demand_requested_percent", "ctIFCHumRequestedDemandPercent", HALF, int),
+                FieldSpec("dehumidification_demand_requested_percent", "ctIFCDehumRequestedDemandPercent", HALF, int),
+                FieldSpec("power_usage", "ctIndoorPower", TENTH),
+            ),
+        ),
+        # outdoor unit
+        EquipmentSpec(
+            model=DaikinOutdoorUnit,
+            unit_type_key="ctOutdoorUnitType",
+            id_format="{model}-{serial}",
+            name=_outdoor_unit_name,
+            name_keys=("ctOutdoorHeatMaxRPS",),
+            fields=(
+                FieldSpec("model", "ctOutdoorModelNoCharacter1_15", transform=_text, static=True),
+                FieldSpec("serial", "ctOutdoorSerialNoCharacter1_15", transform=_text, static=True),
+                FieldSpec("firmware_version", "ctOutdoorControlSoftwareVersion", transform=_text, static=True),
+                FieldSpec(
+                    "inverter_software_version", "ctOutdoorInverterSoftwareVersion", transform=_text, static=True
+                ),
+                FieldSpec("total_runtime", "ctOutdoorCompressorRunTime", transform=_hours),
+                FieldSpec("mode", "ctOutdoorMode", transform=_mode),
+                FieldSpec("compressor_speed_target", "ctTargetCompressorspeed"),
+                FieldSpec("compressor_speed_current", "ctCurrentCompressorRPS"),
+                FieldSpec("outdoor_fan_target_rpm", "ctTargetODFanRPM", 10),
+                FieldSpec("outdoor_fan_rpm", "ctOutdoorFanRPM"),
+                FieldSpec("suction_pressure_psi", "ctOutdoorSuctionPressure"),
+                FieldSpec("eev_opening_percent", "ctOutdoorEEVOpening"),
+                FieldSpec("reversing_valve", "ctReversingValve", transform=DaikinOutdoorUnitReversingValveStatus),
+                FieldSpec("heat_demand_percent", "ctOutdoorHeatRequestedDemand", HALF, int),
+                FieldSpec("cool_demand_percent", "ctOutdoorCoolRequestedDemand", HALF, int),
+                FieldSpec("fan_demand_percent", "ctOutdoorFanRequestedDemandPercentage", HALF, int),
+                FieldSpec("fan_demand_airflow", "ctOutdoorRequestedIndoorAirflow"),
+                FieldSpec("dehumidify_demand_percent", "ctOutdoorDeHumidificationRequestedDemand", HALF, int),
+                FieldSpec("air_temperature", "ctOutdoorAirTemperature", TENTH, Temperature.from_fahrenheit),
+                FieldSpec("coil_temperature", "ctOutdoorCoilTemperature", TENTH, Temperature.from_fahrenheit),
+                FieldSpec("discharge_temperature", "ctOutdoorDischargeTemperature", TENTH, Temperature.from_fahrenheit),
+                FieldSpec("liquid_temperature", "ctOutdoorLiquidTemperature", TENTH, Temperature.from_fahrenheit),
+                FieldSpec(
+                    "defrost_sensor_temperature",
+                    "ctOutdoorDefrostSensorTemperature",
+                    TENTH,
+                    Temperature.from_fahrenheit,
+                ),
+                FieldSpec("inverter_fin_temperature", "ctInverterFinTemp", transform=Temperature.from_celsius),
+                FieldSpec("power_usage", "ctOutdoorPower", 10, float),
+                FieldSpec("compressor_amps", "ctCompressorCurrent", TENTH),
+                FieldSpec("inverter_amps", "ctInverterCurrent", TENTH),
+                FieldSpec("fan_motor_amps", "ctODFanMotorCurrent", TENTH),
+                FieldSpec("crank_case_heater", "ctCrankCaseHeaterOnOff", transform=DaikinOutdoorUnitHeaterStatus),
+                FieldSpec("drain_pan_heater", "ctDrainPanHeaterOnOff", transform=DaikinOutdoorUnitHeaterStatus),
+                FieldSpec("preheat_heater", "ctPreHeatOnOff", transform=DaikinOutdoorUnitHeaterStatus),
+            ),
+        ),
+        # eev coil
+        EquipmentSpec(
+            model=DaikinEEVCoil,
+            unit_type_key="ctCoilUnitType",
+            id_format="eevcoil-{serial}",
+            name="EEV Coil",
+            fields=(
+                FieldSpec("model", None, value="EEV Coil", static=True),
+                FieldSpec("serial", "ctCoilSerialNoCharacter1_15", transform=_text, static=True),
+                FieldSpec("firmware_version", "ctCoilControlSoftwareVersion", transform=_text, static=True),
+                FieldSpec("pressure_psi", "ctEEVCoilPressureSensor"),
+                FieldSpec(
+                    "indoor_superheat_temperature", "ctEEVCoilSuperHeatValue", TENTH, Temperature.from_fahrenheit
+                ),
+                FieldSpec("liquid_temperature", "ctEEVCoilSubCoolValue", TENTH, Temperature.from_fahrenheit),
+                FieldSpec("suction_temperature", "ctEEVCoilSuctionTemperature", TENTH, Temperature.from_fahrenheit),
+            ),
+        ),
+    )
+)
 
 
-class DaikinDeviceDataResponse(BaseModel):
+# raw device data keys read by the thermostat and equipment mappers, every other key is dropped while decoding
+DAIKIN_DEVICE_DATA_KEYS = frozenset({"ctSystemCapHeat", "ctSystemCapCool", "ctSystemCapEmergencyHeat"}).union(
+    THERMOSTAT_FIELDS.keys, *(mapper.keys for mapper in EQUIPMENT_MAPPERS)
+)
+
+
+@dataclass(frozen=True, slots=True)
+class DaikinDeviceDataResponse:
     id: str
     locationId: str
     name: str
@@ -172,6 +500,183 @@ class DaikinDeviceDataResponse(BaseModel):
     data: dict[str, Any]
 
 
+_DEVICE_DATA_RESPONSE_KEYS = frozenset(f.name for f in fields(DaikinDeviceDataResponse))
+_DECODED_KEYS = DAIKIN_DEVICE_DATA_KEYS | _DEVICE_DATA_RESPONSE_KEYS
+
+
+def _keep_decoded_keys(pairs: list[tuple[str, Any]]) -> dict[str, Any]:
+    return {k: v for k, v in pairs if k in _DECODED_KEYS}
+
+
+def _decode_json(body: bytes) -> Any:
+    # like aiohttp's ClientResponse.json, an empty body is None
+    return json.loads(body) if body.strip() else None
+
+
+def _decode_device_data(body: bytes) -> Any:
+    """
+    Decode a device data response, keeping only the keys that are mapped. Each object is filtered as soon as it is
+    parsed, so the hundreds of unused keys per device are never all held at once.
+    """
+    return json.loads(body, object_pairs_hook=_keep_decoded_keys)
+
+
+def _device_data_response(device: Mapping[str, Any]) -> DaikinDeviceDataResponse:
+    return DaikinDeviceDataResponse(
+        id=device["id"],
+        locationId=device["locationId"],
+        name=device["name"],
+        model=device["model"],
+        firmware=device["firmware"],
+        online=device["online"],
+        data={k: v for k, v in device["data"].items() if k in DAIKIN_DEVICE_DATA_KEYS},
+    )
+
+
+type DaikinFieldKey = tuple[str, str | None, str]
+
+
+@dataclass(frozen=True, slots=True)
+class DaikinChanges:
+    """
+    What changed in the cached thermostats during a refresh. Changed fields are keyed by thermostat id, equipment id
+    (None for fields of the thermostat itself) and model field name. If `full` is set there was nothing to diff against,
+    or thermostats or equipment were added or removed, and everything should be treated as changed.
+    """
+
+    full: bool
+    thermostats: frozenset[str] = frozenset()
+    equipment: frozenset[tuple[str, str]] = frozenset()
+    fields: frozenset[DaikinFieldKey] = frozenset()
+
+    def merge(self, other: "DaikinChanges") -> "DaikinChanges":
+        """Combine with the changes of a later refresh"""
+        return DaikinChanges(
+            full=self.full or other.full,
+            thermostats=self.thermostats | other.thermostats,
+            equipment=self.equipment | other.equipment,
+            fields=self.fields | other.fields,
+        )
+
+
+@dataclass
+class _ChangeSet:
+    """Mutable DaikinChanges, collected while applying payloads"""
+
+    full: bool
+    thermostats: set[str] = field(default_factory=set[str])
+    equipment: set[tuple[str, str]] = field(default_factory=set[tuple[str, str]])
+    fields: set[DaikinFieldKey] = field(default_factory=set[DaikinFieldKey])
+
+    def freeze(self) -> DaikinChanges:
+        return DaikinChanges(
+            full=self.full,
+            thermostats=frozenset(self.thermostats),
+            equipment=frozenset(self.equipment),
+            fields=frozenset(self.fields),
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class _CachedDevice:
+    """The last payload of a device and the equipment mapped from it, so the next refresh only remaps what changed"""
+
+    payload: DaikinDeviceDataResponse
+    equipment: tuple[DaikinEquipment | None, ...]
+    equipment_metadata: tuple[EquipmentMetadata | None, ...]
+
+
+@dataclass(slots=True)
+class _MappedDeviceData:
+    """A decoded and mapped full device data response, and how long each took"""
+
+    devices: list[DaikinDeviceDataResponse]
+    thermostats: dict[str, DaikinThermostat]
+    cached: dict[str, _CachedDevice]
+    changes: "_ChangeSet"
+    decode_time: float
+    map_time: float
+
+
+@dataclass
+class DaikinDecodeStats:
+    """
+    How often full device data responses were decoded and mapped, how many of them in the executor, and how long that
+    took. Only work done on the event loop counts as blocking it, compare it with the response sizes to tune the
+    offload threshold.
+    """
+
+    decoded: int = 0
+    offloaded: int = 0
+    last_size: int = 0
+    last_duration: float = 0
+    total_loop_blocked: float = 0
+    max_loop_blocked: float = 0
+
+
+@cache
+def _capabilities(heat: bool, cool: bool, emergency_heat: bool) -> frozenset[DaikinThermostatCapability]:
+    capabilities = set(DaikinThermostatCapability)
+    if heat:
+        capabilities.add(DaikinThermostatCapability.HEAT)
+    if cool:
+        capabilities.add(DaikinThermostatCapability.COOL)
+    if emergency_heat:
+        capabilities.add(DaikinThermostatCapability.EMERGENCY_HEAT)
+    return frozenset(capabilities)
+
+
+_THERMOSTAT_DIFF_FIELDS = tuple(f.name for f in fields(DaikinThermostat) if f.name != "equipment")
+_MISSING = object()
+
+
+@cache
+def _equipment_fields(model: type[DaikinEquipment]) -> tuple[str, ...]:
+    return tuple(f.name for f in fields(model))
+
+
+def _changed_fields(previous: object, current: object, names: Iterable[str]) -> list[str]:
+    return [name for name in names if getattr(previous, name) != getattr(current, name)]
+
+
+def _same_payload(a: DaikinDeviceDataResponse, b: DaikinDeviceDataResponse) -> bool:
+    # compare field by field, model equality would copy both payloads to dicts first
+    return (
+        a.data == b.data
+        and a.online == b.online
+        and a.name == b.name
+        and a.model == b.model
+        and a.firmware == b.firmware
+        and a.locationId == b.locationId
+    )
+
+
+def _token_expiry(token: str) -> float | None:
+    """
+    Read the expiry time from the claims of a JWT access token. The signature is not verified, the token only ever goes
+    back to the API that issued it.
+    """
+    try:
+        claims = token.split(".")[1]
+        return float(json.loads(base64.urlsafe_b64decode(claims + "=" * (-len(claims) % 4)))["exp"])
+    except (IndexError, KeyError, TypeError, ValueError):
+        return None
+
+
+def _retry_after(value: str | None) -> float:
+    """Seconds to wait given a Retry-After header, which holds either a number of seconds or an HTTP date"""
+    if value is not None:
+        try:
+            return max(float(value), 0)
+        except ValueError:
+            pass
+        try:
+            return max((parsedate_to_datetime(value) - datetime.now().astimezone()).total_seconds(), 0)
+        except (TypeError, ValueError):
+            pass
+    return DAIKIN_API_DEFAULT_RETRY_AFTER.total_seconds()
+
+
 class DaikinOne:
     """Manages connection to Daikin API and fetching device data"""
 
@@ -180,16 +685,83 @@ class DaikinOne:
         authenticated: bool = False
         refresh_token: str | None = None
         access_token: str | None = None
+        access_token_expires_at: float | None = None
 
-    __auth = _AuthState()
+        def set_access_token(self, access_token: str) -> None:
+            self.access_token = access_token
+            self.access_token_expires_at = _token_expiry(access_token)
+            self.authenticated = True
 
-    __thermostats: dict[str, DaikinThermostat] = dict()
+        def expires_in(self) -> float | None:
+            """Seconds until the access token expires, or None if unknown"""
+            if self.access_token_expires_at is None:
+                return None
+            return self.access_token_expires_at - time.time()
 
-    def __init__(self, creds: DaikinUserCredentials):
+    def __init__(
+        self,
+        creds: DaikinUserCredentials,
+        session: aiohttp.ClientSession | None = None,
+        timeout: aiohttp.ClientTimeout = DAIKIN_API_REQUEST_TIMEOUT,
+        offload_threshold: int = DAIKIN_API_OFFLOAD_THRESHOLD,
+    ):
+        """
+        Requests are sent over the given session so connections are pooled and kept alive between calls. The session
+        is owned by the caller and is not closed by this client. If no session is given, one is created on first use
+        and closed by `close`.
+
+        Device data responses of at least `offload_threshold` bytes are decoded and mapped in the event loop's default
+        executor.
+        """
         self.creds = creds
+        self.__auth = DaikinOne._AuthState()
+        self.__thermostats: dict[str, DaikinThermostat] = {}
+        self.__devices: dict[str, _CachedDevice] = {}
+        self.__metadata: dict[str, DaikinThermostatMetadata] = {}
+        self.__metadata_due_at: float | None = None
+        self.__changes = DaikinChanges(full=True)
+        self.__session = session
+        self.__owns_session = session is None
+        self.__timeout = timeout
+
+        # login and token refresh are serialized, concurrent callers wait for the one in flight instead of repeating it
+        self.__auth_lock = asyncio.Lock()
+        self.__background_refresh: asyncio.Task[None] | None = None
+
+        self.__limiter = DaikinRateLimiter(DAIKIN_API_RATE_LIMIT, DAIKIN_API_RATE_LIMIT_BURST)
+        self.__breaker = DaikinCircuitBreaker(
+            DAIKIN_API_CIRCUIT_BREAKER_THRESHOLD,
+            DAIKIN_API_CIRCUIT_BREAKER_OPEN_FOR.total_seconds(),
+            DAIKIN_API_CIRCUIT_BREAKER_MAX_OPEN_FOR.total_seconds(),
+        )
+        self.__fetched_at: dict[str, float] = {}
+
+        # cached state is only ever replaced, never changed in place, as mapping may run in the executor. Applying
+        # payloads is serialized so each one is diffed against the state left by the one before
+        self.__apply_lock = asyncio.Lock()
+        self.__offload_threshold = offload_threshold
+        self.__decode_stats = DaikinDecodeStats()
+        self.__metrics = DaikinMetrics()
+
+    def __get_session(self) -> aiohttp.ClientSession:
+        if self.__session is None or self.__session.closed:
+            self.__session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(keepalive_timeout=DAIKIN_API_KEEPALIVE_TIMEOUT)
+            )
+            self.__owns_session = True
+        return self.__session
+
+    async def close(self) -> None:
+        """Close the underlying session if it was created by this client"""
+        if self.__background_refresh is not None:
+            self.__background_refresh.cancel()
+        self.__limiter.cancel()
+        if self.__owns_session and self.__session is not None and not self.__session.closed:
+            await self.__session.close()
+        self.__session = None
 
     async def get_raw_device_data(self, device_id: str) -> dict[str, Any] | None:
-        """Get raw device data"""
+        """Get raw device data, with all keys including the ones that are not mapped"""
         try:
             return await self.__req(f"{DAIKIN_API_URL_DEVICE_DATA}/{device_id}")
         except DaikinServiceException as e:
@@ -197,23 +769,136 @@ class DaikinOne:
                 return None
             raise
 
-    async def update(self) -> None:
+    async def update(self) -> DaikinChanges:
         await self.__refresh_thermostats()
+        if self.__metadata_outdated():
+            await self.__refresh_metadata()
+        return self.__changes
+
+    async def update_thermostat(self, thermostat_id: str) -> DaikinChanges:
+        """
+        Refresh a single thermostat from its own device data endpoint, which is a lot less to download than the whole
+        account. Falls back to a full refresh if the thermostat is not cached yet.
+        """
+        if thermostat_id not in self.__devices:
+            return await self.update()
+
+        data = await self.__req(f"{DAIKIN_API_URL_DEVICE_DATA}/{thermostat_id}", decode=_decode_device_data)
+
+        async with self.__apply_lock:
+            # a full refresh that finished in the meantime may have dropped the thermostat
+            cached = self.__devices.get(thermostat_id)
+            if cached is None:
+                return self.__changes
+
+            # the single device endpoint only returns the device data, the rest is carried over from the last full
+            # refresh
+            device = replace(cached.payload, data=data)
+
+            changes = _ChangeSet(full=False)
+            with self.__metrics.time(DAIKIN_API_ENDPOINT_THERMOSTAT_DATA, DaikinPhase.MAP):
+                thermostat, cached = self.__apply_payload(
+                    device, self.__thermostats.get(thermostat_id), cached, changes
+                )
+            self.__fetched_at[thermostat_id] = time.monotonic()
+
+            self.__thermostats = {**self.__thermostats, thermostat_id: thermostat}
+            self.__devices = {**self.__devices, thermostat_id: cached}
+            self.__changes = changes.freeze()
+
+            return self.__changes
 
     def get_thermostat(self, thermostat_id: str) -> DaikinThermostat:
-        return copy.deepcopy(self.__thermostats[thermostat_id])
+        return self.__thermostats[thermostat_id]
 
     def get_thermostats(self) -> dict[str, DaikinThermostat]:
-        return copy.deepcopy(self.__thermostats)
+        return dict(self.__thermostats)
+
+    def get_metadata(self, thermostat_id: str) -> DaikinThermostatMetadata:
+        """Get the static information on the given thermostat"""
+        return self.__metadata[thermostat_id]
+
+    def get_changes(self) -> DaikinChanges:
+        """Get what changed in the last refresh"""
+        return self.__changes
+
+    def get_request_stats(self) -> DaikinRateLimiterStats:
+        """Get how requests were queued by the rate limiter"""
+        return self.__limiter.stats
+
+    def get_circuit_stats(self) -> DaikinCircuitBreakerStats:
+        """Get the state of the circuit breaker guarding the api"""
+        return self.__breaker.stats
+
+    def get_decode_stats(self) -> DaikinDecodeStats:
+        """Get how long decoding and mapping device data took, and how much of it blocked the event loop"""
+        return self.__decode_stats
+
+    def get_metrics(self) -> DaikinMetrics:
+        """Get the request and refresh counters and latencies"""
+        return self.__metrics
+
+    def get_snapshot_age(self, thermostat_id: str) -> float | None:
+        """Seconds since the given thermostat was last fetched successfully, or None if it never was"""
+        fetched_at = self.__fetched_at.get(thermostat_id)
+        return time.monotonic() - fetched_at if fetched_at is not None else None
+
+    def export_state(self) -> dict[str, Any]:
+        """
+        Get the cached device payloads, when they were fetched and the auth tokens in a JSON serializable form, to be
+        handed to `restore_state` on a later start so the client is usable before the first request.
+        """
+        now = time.time()
+        return {
+            "refresh_token": self.__auth.refresh_token,
+            "access_token": self.__auth.access_token,
+            "devices": [
+                {"payload": asdict(cached.payload), "fetched_at": now - (self.get_snapshot_age(device_id) or 0)}
+                for device_id, cached in self.__devices.items()
+            ],
+        }
+
+    def restore_state(self, state: Mapping[str, Any]) -> None:
+        """
+        Restore what `export_state` returned. Snapshots keep the age they had when exported plus the time since, and
+        the tokens are used until the api rejects them.
+        """
+        now = time.time()
+        devices = [
+            (_device_data_response(device["payload"]), now - device["fetched_at"]) for device in state["devices"]
+        ]
+
+        changes = _ChangeSet(full=True)
+        self.__thermostats, self.__devices = self.__apply_payloads(
+            [device for device, _ in devices], self.__thermostats, self.__devices, changes
+        )
+        self.__fetched_at = {device.id: time.monotonic() - max(age, 0) for device, age in devices}
+        self.__changes = changes.freeze()
+        self.__seed_metadata(device for device, _ in devices)
+
+        if state["refresh_token"] is not None and state["access_token"] is not None:
+            self.__auth.refresh_token = state["refresh_token"]
+            self.__auth.set_access_token(state["access_token"])
+
+        log.info(f"Restored {len(self.__thermostats)} cached thermostats")
+
+    async def set_thermostat(self, thermostat_id: str, command: DaikinThermostatCommand) -> None:
+        """Change all settings of the given command at once"""
+        payload = command.payload()
+        if not payload:
+            raise ValueError("Command does not change any thermostat settings")
 
-    async def set_thermostat_mode(self, thermostat_id: str, mode: DaikinThermostatMode) -> None:
-        """Set thermostat mode"""
         await self.__req(
             url=f"{DAIKIN_API_URL_DEVICE_DATA}/{thermostat_id}",
             method="PUT",
-            body={"mode": mode.value},
+            body=payload,
+            priority=DaikinRequestPriority.COMMAND,
         )
 
+    async def set_thermostat_mode(self, thermostat_id: str, mode: DaikinThermostatMode) -> None:
+        """Set thermostat mode"""
+        await self.set_thermostat(thermostat_id, DaikinThermostatCommand(mode=mode))
+
     async def set_thermostat_home_set_points(
         self,
         thermostat_id: str,
@@ -225,36 +910,220 @@ class DaikinOne:
         if not heat and not cool:
             raise ValueError("At least one of heat or cool set points must be set")
 
-        payload: dict[str, Any] = {}
-        if heat:
-            payload["hspHome"] = heat.celsius
-        if cool:
-            payload["cspHome"] = cool.celsius
-        if override_schedule:
-            payload["schedOverride"] = 1
-
-        await self.__req(
-            url=f"{DAIKIN_API_URL_DEVICE_DATA}/{thermostat_id}",
-            method="PUT",
-            body=payload,
+        await self.set_thermostat(
+            thermostat_id,
+            DaikinThermostatCommand(set_point_heat=heat, set_point_cool=cool, override_schedule=override_schedule),
         )
 
     async def __refresh_thermostats(self):
-        devices = await self.__req(DAIKIN_API_URL_DEVICE_DATA)
-        devices = [DaikinDeviceDataResponse(**device) for device in devices]
+        # the body is decoded later, possibly off the event loop
+        body: bytes = await self.__req(DAIKIN_API_URL_DEVICE_DATA, decode=None)
+
+        async with self.__apply_lock:
+            mapped = await self.__decode_and_map(body)
+            devices, thermostats, changes = mapped.devices, mapped.thermostats, mapped.changes
+
+            fetched_at = time.monotonic()
+            self.__fetched_at = {thermostat_id: fetched_at for thermostat_id in thermostats}
+
+            for removed in self.__thermostats.keys() - thermostats.keys():
+                self.__metadata.pop(removed, None)
+
+            self.__thermostats = thermostats
+            self.__devices = mapped.cached
+            self.__changes = changes.freeze()
+            self.__seed_metadata(devices)
+
+        log.info(f"Cached {len(self.__thermostats)} thermostats, {len(changes.thermostats)} changed")
+
+    def __seed_metadata(self, devices: Iterable[DaikinDeviceDataResponse]) -> None:
+        """Fill in metadata from the device data for thermostats that are new or got a firmware update"""
+        for device in devices:
+            metadata = self.__metadata.get(device.id)
+            if metadata is None or metadata.firmware_version != device.firmware:
+                self.__metadata[device.id] = DaikinThermostatMetadata(
+                    id=device.id,
+                    name=device.name,
+                    model=device.model,
+                    firmware_version=device.firmware,
+                    location_id=device.locationId,
+                    location_name=metadata.location_name if metadata is not None else None,
+                )
+                self.__metadata_due_at = None
+
+    def __metadata_outdated(self) -> bool:
+        return self.__metadata_due_at is None or time.monotonic() >= self.__metadata_due_at
+
+    async def __refresh_metadata(self) -> None:
+        """
+        Fetch names, models and locations of the thermostats. The device data keeps being the source for firmware
+        versions, it is what tells when to fetch again. If fetching or parsing fails, the metadata there is now is kept
+        and fetching is tried again after a short while.
+        """
+        # also keeps updates that come in while fetching from fetching again
+        self.__metadata_due_at = time.monotonic() + DAIKIN_API_METADATA_RETRY_INTERVAL.total_seconds()
+        try:
+            devices = await self.__req(DAIKIN_API_URL_DEVICES)
+            locations = await self.__req(DAIKIN_API_URL_LOCATIONS)
+        except (DaikinServiceException, ClientError, TimeoutError) as e:
+            log.warning(f"Failed to fetch device metadata, using what the device data has: {e!r}")
+            return
 
-        self.__thermostats = {device.id: self.__map_thermostat(device) for device in devices}
+        fetched: dict[str, DaikinThermostatMetadata] = {}
+        try:
+            location_names = {location["id"]: location.get("name") for location in locations}
+            for device in devices:
+                metadata = self.__metadata.get(device["id"])
+                if metadata is None:
+                    continue
+
+                fetched[metadata.id] = replace(
+                    metadata,
+                    name=device.get("name", metadata.name),
+                    model=device.get("model", metadata.model),
+                    location_id=device.get("locationId", metadata.location_id),
+                    location_name=location_names.get(device.get("locationId", metadata.location_id)),
+                )
+        except (KeyError, TypeError, AttributeError) as e:
+            log.warning(f"Failed to parse device metadata, using what the device data has: {e!r}")
+            return
+
+        self.__metadata.update(fetched)
+        self.__metadata_due_at = time.monotonic() + DAIKIN_API_METADATA_REFRESH_INTERVAL.total_seconds()
+        log.info(f"Fetched metadata of {len(devices)} devices in {len(locations)} locations")
+
+    async def __decode_and_map(self, body: bytes) -> _MappedDeviceData:
+        """
+        Decode a full device data response and map it against the cached state. Large responses are handled in the
+        executor so they do not hold up the event loop, the snapshots handed back are immutable either way.
+        """
+        offload = len(body) >= self.__offload_threshold
+        started = time.perf_counter()
+        if offload:
+            result = await asyncio.get_running_loop().run_in_executor(
+                None, self.__map_device_data, body, self.__thermostats, self.__devices
+            )
+        else:
+            result = self.__map_device_data(body, self.__thermostats, self.__devices)
+        duration = time.perf_counter() - started
+
+        self.__metrics.observe(DAIKIN_API_ENDPOINT_DEVICE_DATA, DaikinPhase.DECODE, result.decode_time)
+        self.__metrics.observe(DAIKIN_API_ENDPOINT_DEVICE_DATA, DaikinPhase.MAP, result.map_time)
+
+        stats = self.__decode_stats
+        stats.decoded += 1
+        stats.last_size = len(body)
+        stats.last_duration = duration
+        if offload:
+            stats.offloaded += 1
+        else:
+            stats.total_loop_blocked += duration
+            stats.max_loop_blocked = max(stats.max_loop_blocked, duration)
+
+        return result
+
+    def __map_device_data(
+        self, body: bytes, thermostats: dict[str, DaikinThermostat], cached: dict[str, _CachedDevice]
+    ) -> _MappedDeviceData:
+        started = time.perf_counter()
+        devices = [_device_data_response(device) for device in _decode_device_data(body)]
+        decoded = time.perf_counter()
+
+        changes = _ChangeSet(full=thermostats.keys() != {device.id for device in devices})
+        thermostats, cached = self.__apply_payloads(devices, thermostats, cached, changes)
+
+        return _MappedDeviceData(
+            devices=devices,
+            thermostats=thermostats,
+            cached=cached,
+            changes=changes,
+            decode_time=decoded - started,
+            map_time=time.perf_counter() - decoded,
+        )
 
-        log.info(f"Cached {len(self.__thermostats)} thermostats")
+    def __apply_payloads(
+        self,
+        devices: Iterable[DaikinDeviceDataResponse],
+        thermostats: Mapping[str, DaikinThermostat],
+        cached: Mapping[str, _CachedDevice],
+        changes: "_ChangeSet",
+    ) -> tuple[dict[str, DaikinThermostat], dict[str, _CachedDevice]]:
+        """Get the snapshots and cached state for the given payloads, the given cached state is left as is"""
+        new_thermostats: dict[str, DaikinThermostat] = {}
+        new_cached: dict[str, _CachedDevice] = {}
+        for device in devices:
+            new_thermostats[device.id], new_cached[device.id] = self.__apply_payload(
+                device, thermostats.get(device.id), cached.get(device.id), changes
+            )
+        return new_thermostats, new_cached
 
-    def __map_thermostat(self, payload: DaikinDeviceDataResponse) -> DaikinThermostat:
-        capabilities = set(DaikinThermostatCapability)
-        if payload.data["ctSystemCapHeat"]:
-            capabilities.add(DaikinThermostatCapability.HEAT)
-        if payload.data["ctSystemCapCool"]:
-            capabilities.add(DaikinThermostatCapability.COOL)
-        if payload.data["ctSystemCapEmergencyHeat"]:
-            capabilities.add(DaikinThermostatCapability.EMERGENCY_HEAT)
+    def __apply_payload(
+        self,
+        device: DaikinDeviceDataResponse,
+        previous: DaikinThermostat | None,
+        cached: _CachedDevice | None,
+        changes: "_ChangeSet",
+    ) -> tuple[DaikinThermostat, _CachedDevice]:
+        """
+        Get the snapshot for a freshly fetched device payload, recording what changed since the cached one. Only reads
+        what it is given, so it is safe to run in the executor.
+        """
+        # most of the time nothing has changed, keep the existing snapshot without remapping anything
+        if previous is not None and cached is not None and _same_payload(cached.payload, device):
+            return previous, cached
+
+        changed_keys = None
+        if cached is not None:
+            changed_keys = {k for k, v in device.data.items() if cached.payload.data.get(k, _MISSING) != v}
+            changed_keys |= cached.payload.data.keys() - device.data.keys()
+
+        equipment, equipment_metadata = self.__map_equipment(device, cached, changed_keys)
+        cached = _CachedDevice(payload=device, equipment=equipment, equipment_metadata=equipment_metadata)
+        thermostat = self.__map_thermostat(device, {e.id: e for e in equipment if e is not None})
+
+        if previous is None:
+            changes.full = True
+        else:
+            equipment_changes = self.__diff_equipment(previous, thermostat)
+            if equipment_changes is None:
+                changes.full = True
+            else:
+                changes.equipment.update((thermostat.id, eid) for eid, _ in equipment_changes)
+                changes.fields.update((thermostat.id, eid, name) for eid, name in equipment_changes)
+
+            thermostat_changes = _changed_fields(previous, thermostat, _THERMOSTAT_DIFF_FIELDS)
+            changes.fields.update((thermostat.id, None, name) for name in thermostat_changes)
+
+            if not thermostat_changes and equipment_changes == []:
+                # the payload changed but nothing we map did, keep the existing snapshot
+                return previous, cached
+
+        changes.thermostats.add(thermostat.id)
+        return thermostat, cached
+
+    @staticmethod
+    def __diff_equipment(previous: DaikinThermostat, current: DaikinThermostat) -> list[tuple[str, str]] | None:
+        """Get the changed (equipment id, field) pairs, or None if equipment was added or removed"""
+        if previous.equipment.keys() != current.equipment.keys():
+            return None
+
+        changes: list[tuple[str, str]] = []
+        for eid, equipment in current.equipment.items():
+            before = previous.equipment[eid]
+            if before is not equipment:
+                names = _equipment_fields(type(equipment))
+                changes += [(eid, name) for name in _changed_fields(before, equipment, names)]
+
+        return changes
+
+    @staticmethod
+    def __map_thermostat(
+        payload: DaikinDeviceDataResponse, equipment: Mapping[str, DaikinEquipment]
+    ) -> DaikinThermostat:
+        data = payload.data
+        capabilities = _capabilities(
+            bool(data["ctSystemCapHeat"]), bool(data["ctSystemCapCool"]), bool(data["ctSystemCapEmergencyHeat"])
+        )
 
         thermostat = DaikinThermostat(
             id=payload.id,
@@ -264,256 +1133,281 @@ class DaikinOne:
             firmware_version=payload.firmware,
             online=payload.online,
             capabilities=capabilities,
-            mode=DaikinThermostatMode(payload.data["mode"]),
-            status=DaikinThermostatStatus(payload.data["equipmentStatus"]),
-            schedule=DaikinThermostatSchedule(enabled=payload.data["schedEnabled"]),
-            indoor_temperature=Temperature.from_celsius(payload.data["tempIndoor"]),
-            indoor_humidity=payload.data["humIndoor"],
-            set_point_heat=Temperature.from_celsius(payload.data["hspActive"]),
-            set_point_heat_min=Temperature.from_celsius(payload.data["EquipProtocolMinHeatSetpoint"]),
-            set_point_heat_max=Temperature.from_celsius(payload.data["EquipProtocolMaxHeatSetpoint"]),
-            set_point_cool=Temperature.from_celsius(payload.data["cspActive"]),
-            set_point_cool_min=Temperature.from_celsius(payload.data["EquipProtocolMinCoolSetpoint"]),
-            set_point_cool_max=Temperature.from_celsius(payload.data["EquipProtocolMaxCoolSetpoint"]),
-            equipment=self.__map_equipment(payload),
+            equipment=equipment,
+            **THERMOSTAT_FIELDS(payload.data),
         )
 
         return thermostat
 
-    def __map_equipment(self, payload: DaikinDeviceDataResponse) -> dict[str, DaikinEquipment]:
-        equipment: dict[str, DaikinEquipment] = {}
-
-        # air handler
-        if payload.data["ctAHUnitType"] < 255:
-            model = payload.data["ctAHModelNoCharacter1_15"].strip()
-            serial = payload.data["ctAHSerialNoCharacter1_15"].strip()
-            eid = f"{model}-{serial}"
-            name = "Air Handler"
-
-            equipment[eid] = DaikinIndoorUnit(
-                id=eid,
-                thermostat_id=payload.id,
-                name=name,
-                model=model,
-                firmware_version=payload.data["ctAHControlSoftwareVersion"].strip(),
-                serial=serial,
-                mode=payload.data["ctAHMode"].strip().capitalize(),
-                current_airflow=payload.data["ctAHCurrentIndoorAirflow"],
-                fan_demand_requested_percent=payload.data["ctAHFanRequestedDemand"] / 2,
-                fan_demand_current_percent=payload.data["ctAHFanCurrentDemandStatus"] / 2,
-                heat_demand_requested_percent=payload.data["ctAHHeatRequestedDemand"] / 2,
-                heat_demand_current_percent=payload.data["ctAHHeatCurrentDemandStatus"] / 2,
-                cool_demand_requested_percent=None,
-                cool_demand_current_percent=None,
-                humidification_demand_requested_percent=payload.data["ctAHHumidificationRequestedDemand"] / 2,
-                dehumidification_demand_requested_percent=None,
-                power_usage=payload.data["ctIndoorPower"] / 10,
-            )
-
-        # furnace
-        if payload.data["ctIFCUnitType"] < 255:
-            model = payload.data["ctIFCModelNoCharacter1_15"].strip()
-            serial = payload.data["ctIFCSerialNoCharacter1_15"].strip()
-            eid = f"{model}-{serial}"
-            name = "Furnace"
-
-            equipment[eid] = DaikinIndoorUnit(
-                id=eid,
-                thermostat_id=payload.id,
-                name=name,
-                model=model,
-                firmware_version=payload.data["ctIFCControlSoftwareVersion"].strip(),
-                serial=serial,
-                mode=payload.data["ctIFCOperatingHeatCoolMode"].strip().capitalize(),
-                current_airflow=payload.data["ctIFCIndoorBlowerAirflow"],
-                fan_demand_requested_percent=payload.data["ctIFCFanRequestedDemandPercent"] / 2,
-                fan_demand_current_percent=payload.data["ctIFCCurrentFanActualStatus"] / 2,
-                heat_demand_requested_percent=payload.data["ctIFCHeatRequestedDemandPercent"] / 2,
-                heat_demand_current_percent=payload.data["ctIFCCurrentHeatActualStatus"] / 2,
-                cool_demand_requested_percent=payload.data["ctIFCCoolRequestedDemandPercent"] / 2,
-                cool_demand_current_percent=payload.data["ctIFCCurrentCoolActualStatus"] / 2,
-                humidification_demand_requested_percent=payload.data["ctIFCHumRequestedDemandPercent"] / 2,
-                dehumidification_demand_requested_percent=payload.data["ctIFCDehumRequestedDemandPercent"] / 2,
-                power_usage=payload.data["ctIndoorPower"] / 10,
-            )
-
-        # outdoor unit
-        if payload.data["ctOutdoorUnitType"] < 255:
-            model = payload.data["ctOutdoorModelNoCharacter1_15"].strip()
-            serial = payload.data["ctOutdoorSerialNoCharacter1_15"].strip()
-            eid = f"{model}-{serial}"
-
-            # assume it can cool, and if it can also heat it should be a heat pump
-            name = "Condensing Unit"
-            if payload.data["ctOutdoorHeatMaxRPS"] != 0 and payload.data["ctOutdoorHeatMaxRPS"] != 65535:
-                name = "Heat Pump"
-
-            equipment[eid] = DaikinOutdoorUnit(
-                id=eid,
-                thermostat_id=payload.id,
-                name=name,
-                model=model,
-                serial=serial,
-                firmware_version=payload.data["ctOutdoorControlSoftwareVersion"].strip(),
-                inverter_software_version=payload.data["ctOutdoorInverterSoftwareVersion"].strip(),
-                total_runtime=timedelta(hours=payload.data["ctOutdoorCompressorRunTime"]),
-                mode=payload.data["ctOutdoorMode"].strip().capitalize(),
-                compressor_speed_target=payload.data["ctTargetCompressorspeed"],
-                compressor_speed_current=payload.data["ctCurrentCompressorRPS"],
-                outdoor_fan_target_rpm=payload.data["ctTargetODFanRPM"] * 10,
-                outdoor_fan_rpm=payload.data["ctOutdoorFanRPM"],
-                suction_pressure_psi=payload.data["ctOutdoorSuctionPressure"],
-                eev_opening_percent=payload.data["ctOutdoorEEVOpening"],
-                reversing_valve=DaikinOutdoorUnitReversingValveStatus(payload.data["ctReversingValve"]),
-                heat_demand_percent=round(payload.data["ctOutdoorHeatRequestedDemand"] / 2, 1),
-                cool_demand_percent=round(payload.data["ctOutdoorCoolRequestedDemand"] / 2, 1),
-                fan_demand_percent=round(payload.data["ctOutdoorFanRequestedDemandPercentage"] / 2, 1),
-                fan_demand_airflow=payload.data["ctOutdoorRequestedIndoorAirflow"],
-                dehumidify_demand_percent=round(payload.data["ctOutdoorDeHumidificationRequestedDemand"] / 2, 1),
-                air_temperature=Temperature.from_fahrenheit(payload.data["ctOutdoorAirTemperature"] / 10),
-                coil_temperature=Temperature.from_fahrenheit(payload.data["ctOutdoorCoilTemperature"] / 10),
-                discharge_temperature=Temperature.from_fahrenheit(payload.data["ctOutdoorDischargeTemperature"] / 10),
-                liquid_temperature=Temperature.from_fahrenheit(payload.data["ctOutdoorLiquidTemperature"] / 10),
-                defrost_sensor_temperature=Temperature.from_fahrenheit(
-                    payload.data["ctOutdoorDefrostSensorTemperature"] / 10
-                ),
-                inverter_fin_temperature=Temperature.from_celsius(payload.data["ctInverterFinTemp"]),
-                power_usage=payload.data["ctOutdoorPower"] * 10,
-                compressor_amps=payload.data["ctCompressorCurrent"] / 10,
-                inverter_amps=payload.data["ctInverterCurrent"] / 10,
-                fan_motor_amps=payload.data["ctODFanMotorCurrent"] / 10,
-                crank_case_heater=DaikinOutdoorUnitHeaterStatus(payload.data["ctCrankCaseHeaterOnOff"]),
-                drain_pan_heater=DaikinOutdoorUnitHeaterStatus(payload.data["ctDrainPanHeaterOnOff"]),
-                preheat_heater=DaikinOutdoorUnitHeaterStatus(payload.data["ctPreHeatOnOff"]),
-            )
-
-        # eev coil
-        if payload.data["ctCoilUnitType"] < 255:
-            model = "EEV Coil"
-            serial = payload.data["ctCoilSerialNoCharacter1_15"].strip()
-            eid = f"eevcoil-{serial}"
-            name = "EEV Coil"
-
-            equipment[eid] = DaikinEEVCoil(
-                id=eid,
-                thermostat_id=payload.id,
-                name=name,
-                model=model,
-                serial=serial,
-                firmware_version=payload.data["ctCoilControlSoftwareVersion"].strip(),
-                pressure_psi=payload.data["ctEEVCoilPressureSensor"],
-                indoor_superheat_temperature=Temperature.from_fahrenheit(payload.data["ctEEVCoilSuperHeatValue"] / 10),
-                liquid_temperature=Temperature.from_fahrenheit(payload.data["ctEEVCoilSubCoolValue"] / 10),
-                suction_temperature=Temperature.from_fahrenheit(payload.data["ctEEVCoilSuctionTemperature"] / 10),
-            )
-
-        return equipment
+    @staticmethod
+    def __map_equipment(
+        payload: DaikinDeviceDataResponse, cached: _CachedDevice | None, changed_keys: set[str] | None
+    ) -> tuple[tuple[DaikinEquipment | None, ...], tuple[EquipmentMetadata | None, ...]]:
+        """
+        Map the equipment for the given payload, one slot per equipment mapper. If the raw keys changed since the
+        cached payload are given, equipment that does not read any of them is reused instead of being remapped.
+        """
+        slots: list[DaikinEquipment | None] = []
+        metadata: list[EquipmentMetadata | None] = []
+        for i, mapper in enumerate(EQUIPMENT_MAPPERS):
+            static: EquipmentMetadata | None = None
+            if cached is not None and changed_keys is not None:
+                if mapper.keys.isdisjoint(changed_keys):
+                    slots.append(cached.equipment[i])
+                    metadata.append(cached.equipment_metadata[i])
+                    continue
+
+                # model, serial numbers and firmware versions are only mapped again when one of their raw values changed
+                if mapper.static_keys.isdisjoint(changed_keys):
+                    static = cached.equipment_metadata[i]
+
+            if static is None and mapper.is_present(payload.data):
+                static = mapper.map_metadata(payload.data)
+
+            slots.append(mapper(payload.id, payload.data, static))
+            metadata.append(static)
+
+        return tuple(slots), tuple(metadata)
 
     async def login(self) -> bool:
         """Log in to the Daikin API with the given credentials to auth tokens"""
+        async with self.__auth_lock:
+            return await self.__login()
+
+    async def __login(self) -> bool:
+        if self.__breaker.is_open():
+            log.warning(f"Daikin API is failing, not logging in for another {self.__breaker.retry_in():.0f}s")
+            return False
+
         log.info("Logging in to Daikin API")
+        self.__metrics.increment(DAIKIN_API_ENDPOINT_LOGIN, "requests")
         try:
-            async with aiohttp.ClientSession(
+            await self.__limiter.acquire(DaikinRequestPriority.COMMAND)
+            async with self.__get_session().post(
+                url=DAIKIN_API_URL_LOGIN,
                 headers={
                     "Accept": "application/json",
                     "Content-Type": "application/json",
-                }
-            ) as session:
-                async with session.post(
-                    url=DAIKIN_API_URL_LOGIN,
-                    json={"email": self.creds.email, "password": self.creds.password},
-                ) as response:
-                    if response.status != 200:
-                        log.error(f"Request to login failed: {response}")
-                        return False
-
-                    payload = await response.json()
-                    refresh_token = payload["refreshToken"]
-                    access_token = payload["accessToken"]
-
-                    if refresh_token is None:
-                        log.error("No refresh token found in login response")
-                        return False
-                    if access_token is None:
-                        log.error("No access token found in login response")
-                        return False
-
-                    # save token
-                    self.__auth.refresh_token = refresh_token
-                    self.__auth.access_token = access_token
-                    self.__auth.authenticated = True
-
-                    return True
-
-        except ClientError as e:
-            log.error(f"Request to login failed: {e}")
+                },
+                json={"email": self.creds.email, "password": self.creds.password},
+                timeout=self.__timeout,
+            ) as response:
+                self.__breaker.on_response(response.status)
+                if response.status != 200:
+                    log.error(f"Request to login failed: {response}")
+                    self.__metrics.increment(DAIKIN_API_ENDPOINT_LOGIN, "errors")
+                    return False
+
+                payload = await response.json()
+                refresh_token = payload["refreshToken"]
+                access_token = payload["accessToken"]
+
+                if refresh_token is None:
+                    log.error("No refresh token found in login response")
+                    return False
+                if access_token is None:
+                    log.error("No access token found in login response")
+                    return False
+
+                # save token
+                self.__auth.refresh_token = refresh_token
+                self.__auth.set_access_token(access_token)
+
+                return True
+
+        except (ClientError, TimeoutError) as e:
+            log.error(f"Request to login failed: {e!r}")
+            self.__breaker.on_failure()
+            self.__metrics.increment(DAIKIN_API_ENDPOINT_LOGIN, "errors")
             return False
 
+    async def __ensure_access_token(self) -> None:
+        """
+        Make sure there is an access token that is not about to expire before sending a request. A token that expires
+        soon is refreshed in the background while it is still used, an expired or missing one is waited for.
+        """
+        expires_in = self.__auth.expires_in()
+        if self.__auth.authenticated and (
+            expires_in is None or expires_in > DAIKIN_API_TOKEN_EXPIRY_MARGIN.total_seconds()
+        ):
+            if expires_in is not None and expires_in < DAIKIN_API_TOKEN_REFRESH_AHEAD.total_seconds():
+                self.__refresh_in_background()
+            return
+
+        await self.__refresh_access_token(self.__auth.access_token)
+
+    def __refresh_in_background(self) -> None:
+        if self.__background_refresh is not None:
+            return
+
+        async def refresh() -> None:
+            try:
+                await self.__refresh_access_token(self.__auth.access_token)
+            except (ClientError, TimeoutError) as e:
+                log.warning(f"Background refresh of access token failed: {e!r}")
+            finally:
+                self.__background_refresh = None
+
+        self.__background_refresh = asyncio.create_task(refresh())
+
+    async def __refresh_access_token(self, stale_token: str | None) -> None:
+        """
+        Replace the given stale access token, logging in again if there is no session. Callers that queued up behind
+        a refresh that already replaced the token return right away.
+        """
+        async with self.__auth_lock:
+            if self.__auth.authenticated and self.__auth.access_token != stale_token:
+                return
+
+            if self.__auth.authenticated:
+                await self.__refresh_token()
+            else:
+                await self.__login()
+
     async def __refresh_token(self) -> bool:
+        if self.__breaker.is_open():
+            log.warning(
+                f"Daikin API is failing, not refreshing access token for another {self.__breaker.retry_in():.0f}s"
+            )
+            return False
+
         log.debug("Refreshing access token")
         if self.__auth.authenticated is not True:
-            await self.login()
+            await self.__login()
 
-        async with aiohttp.ClientSession(
-            headers={"Accept": "application/json", "Content-Type": "application/json"}
-        ) as session:
-            async with session.post(
+        self.__metrics.increment(DAIKIN_API_ENDPOINT_REFRESH_TOKEN, "requests")
+        await self.__limiter.acquire(DaikinRequestPriority.COMMAND)
+        try:
+            response = await self.__get_session().post(
                 url=DAIKIN_API_URL_REFRESH_TOKEN,
+                headers={"Accept": "application/json", "Content-Type": "application/json"},
                 json={
                     "email": self.creds.email,
                     "refreshToken": self.__auth.refresh_token,
                 },
-            ) as response:
-                if response.status != 200:
-                    log.error(f"Request to refresh access token: {response}")
-                    self.__auth.authenticated = False
-                    return False
+                timeout=self.__timeout,
+            )
+        except (ClientError, TimeoutError):
+            self.__breaker.on_failure()
+            self.__metrics.increment(DAIKIN_API_ENDPOINT_REFRESH_TOKEN, "errors")
+            raise
 
-                payload = await response.json()
-                access_token = payload["accessToken"]
+        self.__breaker.on_response(response.status)
+        async with response:
+            if response.status != 200:
+                log.error(f"Request to refresh access token: {response}")
+                self.__metrics.increment(DAIKIN_API_ENDPOINT_REFRESH_TOKEN, "errors")
+                self.__auth.authenticated = False
+                return False
 
-                if access_token is None:
-                    log.error("No access token found in refresh response")
-                    self.__auth.authenticated = False
-                    return False
+            payload = await response.json()
+            access_token = payload["accessToken"]
 
-                # save token
-                log.info("Refreshed access token")
-                self.__auth.access_token = access_token
-                self.__auth.authenticated = True
+            if access_token is None:
+                log.error("No access token found in refresh response")
+                self.__auth.authenticated = False
+                return False
 
-                return True
+            # save token
+            log.info("Refreshed access token")
+            self.__auth.set_access_token(access_token)
+
+            return True
 
     async def __req(
         self,
         url: str,
         method: str = "GET",
         body: dict[str, Any] | None = None,
+        priority: DaikinRequestPriority = DaikinRequestPriority.POLL,
         retry: bool = True,
+        decode: Callable[[bytes], Any] | None = _decode_json,
     ) -> Any:
-        if self.__auth.authenticated is not True:
-            await self.login()
-
-        log.debug(f"Sending request to Daikin API: {method} {url}")
-        async with aiohttp.ClientSession(
-            headers={
-                "Accept": "application/json",
-                "Authorization": f"Bearer {self.__auth.access_token}",
-            }
-        ) as session:
-            async with session.request(method, url, json=body) as response:
-                log.debug(f"Got response: {response.status}")
-
-                if response.status == 200:
-                    payload = await response.json()
-                    return payload
+        """
+        Send a request and decode the response body with `decode`, or return the body as is if that is None. While the
+        circuit breaker is open, requests fail right away without authenticating first either.
+        """
+        if not self.__breaker.allow():
+            raise self.__circuit_open_error(method, url)
+
+        try:
+            await self.__ensure_access_token()
+            await self.__limiter.acquire(priority)
+        except BaseException:
+            self.__breaker.on_abort()
+            raise
 
-                if response.status == 401:
-                    if retry:
-                        await self.__refresh_token()
-                        return await self.__req(url, method, body, retry=False)
+        # authenticating may just have found the api failing
+        if self.__breaker.is_open():
+            raise self.__circuit_open_error(method, url)
 
-                raise DaikinServiceException(
-                    f"Failed to send request to Daikin API: method={method} url={url} body={json.dumps(body)}, response_code={response.status} response_body={await response.text()}",
-                    status=response.status,
-                )
+        access_token = self.__auth.access_token
+        endpoint = _endpoint(method, url)
+        self.__metrics.increment(endpoint, "requests")
+        started = time.perf_counter()
+
+        try:
+            log.debug(f"Sending request to Daikin API: {method} {url}")
+            response = await self.__get_session().request(
+                method,
+                url,
+                headers={
+                    "Accept": "application/json",
+                    "Authorization": f"Bearer {access_token}",
+                },
+                json=body,
+                timeout=self.__timeout,
+            )
+        except (ClientError, TimeoutError):
+            self.__breaker.on_failure()
+            self.__metrics.increment(endpoint, "errors")
+            raise
+        except BaseException:
+            self.__breaker.on_abort()
+            raise
+
+        self.__metrics.observe(endpoint, DaikinPhase.CONNECT, time.perf_counter() - started)
+        self.__breaker.on_response(response.status)
+
+        async with response:
+            log.debug(f"Got response: {response.status}")
+
+            if response.status == 200:
+                started = time.perf_counter()
+                payload = await response.read()
+                self.__metrics.observe(endpoint, DaikinPhase.TRANSFER, time.perf_counter() - started)
+                self.__metrics.increment(endpoint, "bytes", len(payload))
+
+                if decode is None:
+                    return payload
+                with self.__metrics.time(endpoint, DaikinPhase.DECODE):
+                    return decode(payload)
+
+            self.__metrics.increment(endpoint, "errors")
+
+            if response.status == 401:
+                self.__metrics.increment(endpoint, "unauthorized")
+                if retry:
+                    await self.__refresh_access_token(access_token)
+                    return await self.__req(url, method, body, priority, retry=False, decode=decode)
+
+            if response.status in (429, 503):
+                self.__metrics.increment(endpoint, "throttled")
+                retry_after = _retry_after(response.headers.get("Retry-After"))
+                log.warning(f"Daikin API is throttling requests, backing off for {retry_after:.0f}s")
+                self.__limiter.block(retry_after)
+
+                # the limiter holds the retry back until the back off is over
+                if retry and retry_after <= DAIKIN_API_MAX_RETRY_AFTER.total_seconds():
+                    return await self.__req(url, method, body, priority, retry=False, decode=decode)
+
+            raise DaikinServiceException(
+                f"Failed to send request to Daikin API: method={method} url={url} body={json.dumps(body)}, response_code={response.status} response_body={await response.text()}",
+                status=response.status,
+            )
+
+    def __circuit_open_error(self, method: str, url: str) -> DaikinServiceException:
+        return DaikinServiceException(
+            f"Daikin API is failing, not sending requests for another {self.__breaker.retry_in():.0f}s: method={method} url={url}",
+            status=503,
+        )
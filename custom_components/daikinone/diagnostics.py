@@ -1,4 +1,5 @@
 import logging
+from dataclasses import asdict
 from typing import Any, Mapping
 
 from homeassistant.core import HomeAssistant
@@ -11,14 +12,27 @@ log = logging.getLogger(__name__)
 
 
 async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict[str, Any]:
-    return {}
+    data: DaikinOneData = hass.data[DOMAIN][entry.entry_id]
+    return {
+        "state_writes": asdict(data.coordinator.write_stats),
+        "commands": asdict(data.commands.stats),
+        "requests": asdict(data.daikin.get_request_stats()),
+        "circuit": asdict(data.daikin.get_circuit_stats()),
+        "decoding": asdict(data.daikin.get_decode_stats()),
+        "metrics": data.daikin.get_metrics().as_dict(),
+    }
 
 
 async def async_get_device_diagnostics(
     hass: HomeAssistant, config_entry: ConfigEntry, device: DeviceEntry
 ) -> Mapping[str, Any]:
-    data: DaikinOneData = hass.data[DOMAIN]
+    data: DaikinOneData = hass.data[DOMAIN][config_entry.entry_id]
     device_id = next(i for i in device.identifiers if i[0] == DOMAIN)[1]
+
+    # the service device of the account holds its integration level sensors, it is not a device in the cloud
+    if device_id == config_entry.entry_id:
+        return await async_get_config_entry_diagnostics(hass, config_entry)
+
     raw = await data.daikin.get_raw_device_data(device_id)
 
     if raw is not None:
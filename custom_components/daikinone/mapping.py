@@ -0,0 +1,132 @@
+from collections.abc import Callable, Mapping
+from dataclasses import dataclass
+from fractions import Fraction
+from typing import Any
+
+type Transform = Callable[[Any], Any]
+
+
+@dataclass(frozen=True)
+class FieldSpec:
+    """
+    Maps one raw device data key to one model field. The raw value is multiplied by `scale` and then passed through
+    `transform`. Fields without a key are constants and always take `value`. Static fields like model and serial
+    numbers are only mapped again when one of their raw values changes.
+    """
+
+    field: str
+    key: str | None
+    scale: Fraction | int = 1
+    transform: Transform | None = None
+    value: Any = None
+    static: bool = False
+
+
+@dataclass(frozen=True)
+class EquipmentSpec[E]:
+    """
+    Describes how to build one kind of equipment from raw device data. The equipment is only present if the value of
+    `unit_type_key` is below 255. Its id is built by formatting `id_format` with the mapped static field values, and its name
+    is either fixed or derived from the raw data keys listed in `name_keys`.
+    """
+
+    model: Callable[..., E]
+    unit_type_key: str
+    id_format: str
+    name: str | Callable[[Mapping[str, Any]], str]
+    fields: tuple[FieldSpec, ...]
+    name_keys: tuple[str, ...] = ()
+
+
+def _compile_scale(scale: Fraction | int) -> Transform | None:
+    scale = Fraction(scale)
+    if scale == 1:
+        return None
+
+    # keep integer scales and simple divisions exact, matching what the equivalent hand-written arithmetic produces
+    numerator, denominator = scale.numerator, scale.denominator
+    if denominator == 1:
+        return lambda v: v * numerator
+    if numerator == 1:
+        return lambda v: v / denominator
+    return lambda v: v * numerator / denominator
+
+
+def _compile_field(spec: FieldSpec) -> Callable[[Mapping[str, Any]], Any]:
+    if spec.key is None:
+        value = spec.value
+        return lambda _: value
+
+    key = spec.key
+    scale = _compile_scale(spec.scale)
+    transform = spec.transform
+
+    if scale is not None and transform is not None:
+        return lambda data: transform(scale(data[key]))
+    if scale is not None:
+        return lambda data: scale(data[key])
+    if transform is not None:
+        return lambda data: transform(data[key])
+    return lambda data: data[key]
+
+
+class FieldMapper:
+    """A field table compiled into a single function from raw device data to model field values"""
+
+    def __init__(self, fields: tuple[FieldSpec, ...]):
+        self.keys = frozenset(f.key for f in fields if f.key is not None)
+        self._getters = tuple((f.field, _compile_field(f)) for f in fields)
+
+    def __call__(self, data: Mapping[str, Any]) -> dict[str, Any]:
+        return {field: getter(data) for field, getter in self._getters}
+
+
+@dataclass(frozen=True)
+class EquipmentMetadata:
+    """The id, name and static field values of one piece of equipment"""
+
+    id: str
+    name: str
+    values: Mapping[str, Any]
+
+
+class EquipmentMapper[E]:
+    """
+    An equipment spec compiled into a mapper that builds the model without any validation. The static part is mapped
+    separately into EquipmentMetadata, which callers can keep and pass back in for as long as none of `static_keys`
+    changed.
+    """
+
+    def __init__(self, spec: EquipmentSpec[E]):
+        self.spec = spec
+        self._static = FieldMapper(tuple(f for f in spec.fields if f.static))
+        self._dynamic = FieldMapper(tuple(f for f in spec.fields if not f.static))
+        self.static_keys = self._static.keys | {spec.unit_type_key, *spec.name_keys}
+        self.keys = self.static_keys | self._dynamic.keys
+
+        name = spec.name
+        self._name: Callable[[Mapping[str, Any]], str] = (lambda _: name) if isinstance(name, str) else name
+
+    def is_present(self, data: Mapping[str, Any]) -> bool:
+        return data[self.spec.unit_type_key] < 255
+
+    def map_metadata(self, data: Mapping[str, Any]) -> EquipmentMetadata:
+        values = self._static(data)
+        return EquipmentMetadata(id=self.spec.id_format.format(**values), name=self._name(data), values=values)
+
+    def __call__(
+        self, thermostat_id: str, data: Mapping[str, Any], metadata: EquipmentMetadata | None = None
+    ) -> E | None:
+        if not self.is_present(data):
+            return None
+
+        if metadata is None:
+            metadata = self.map_metadata(data)
+
+        return self.spec.model(
+            id=metadata.id,
+            thermostat_id=thermostat_id,
+            name=metadata.name,
+            **metadata.values,
+            **self._dynamic(data),
+        )
@@ -0,0 +1,113 @@
+import time
+from bisect import bisect_left
+from collections.abc import Generator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from enum import StrEnum
+from typing import Any
+
+# upper bounds of the latency histogram buckets in seconds, anything slower lands in one more bucket past the last
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class DaikinPhase(StrEnum):
+    """Timed parts of a request or refresh"""
+
+    # sending the request until the response headers are in
+    CONNECT = "connect"
+    # reading the response body
+    TRANSFER = "transfer"
+    DECODE = "decode"
+    # mapping device data to snapshots
+    MAP = "map"
+    # calling back entities with new snapshots
+    DISPATCH = "dispatch"
+
+
+@dataclass
+class DaikinHistogram:
+    """Latencies in seconds, counted per bucket of LATENCY_BUCKETS, with their count, sum, max and last value"""
+
+    buckets: list[int] = field(default_factory=lambda: [0] * (len(LATENCY_BUCKETS) + 1))
+    count: int = 0
+    total: float = 0
+    max: float = 0
+    last: float = 0
+
+    def observe(self, seconds: float) -> None:
+        self.buckets[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.last = seconds
+
+    def quantile(self, q: float) -> float | None:
+        """Upper bound of the bucket the given quantile falls in, or the max if that is the last bucket"""
+        if not self.count:
+            return None
+
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS, self.buckets):
+            seen += count
+            if seen >= q * self.count:
+                return min(bound, self.max)
+        return self.max
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else None,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "max": self.max,
+            "last": self.last,
+        }
+
+
+class DaikinMetrics:
+    """
+    Counters and latency histograms of one client, keyed by endpoint and counter or phase name. Endpoints are labels
+    like "GET /deviceData", with ids replaced by placeholders so they stay few. Updating them is a few arithmetic
+    operations, they are always on.
+    """
+
+    def __init__(self) -> None:
+        self.counters: dict[tuple[str, str], int] = {}
+        self.histograms: dict[tuple[str, str], DaikinHistogram] = {}
+
+    def increment(self, endpoint: str, counter: str, value: int = 1) -> None:
+        key = (endpoint, counter)
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, endpoint: str, phase: DaikinPhase, seconds: float) -> None:
+        histogram = self.histograms.get((endpoint, phase))
+        if histogram is None:
+            histogram = self.histograms[(endpoint, phase)] = DaikinHistogram()
+        histogram.observe(seconds)
+
+    @contextmanager
+    def time(self, endpoint: str, phase: DaikinPhase) -> Generator[None, None, None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(endpoint, phase, time.perf_counter() - started)
+
+    def counter(self, endpoint: str, counter: str) -> int:
+        return self.counters.get((endpoint, counter), 0)
+
+    def total(self, counter: str) -> int:
+        """Sum of the given counter over all endpoints"""
+        return sum(value for (_, name), value in self.counters.items() if name == counter)
+
+    def histogram(self, endpoint: str, phase: DaikinPhase) -> DaikinHistogram | None:
+        return self.histograms.get((endpoint, phase))
+
+    def as_dict(self) -> dict[str, Any]:
+        """Counters and histogram summaries grouped by endpoint"""
+        endpoints: dict[str, Any] = {}
+        for (endpoint, counter), value in sorted(self.counters.items()):
+            endpoints.setdefault(endpoint, {}).setdefault("counters", {})[counter] = value
+        for (endpoint, phase), histogram in sorted(self.histograms.items()):
+            endpoints.setdefault(endpoint, {}).setdefault("latency", {})[phase] = histogram.summary()
+        return endpoints
@@ -0,0 +1,141 @@
+import asyncio
+import cProfile
+import io
+import pstats
+import time
+import tracemalloc
+from collections.abc import Generator
+from contextlib import contextmanager
+
+# how many functions each profile section of the report lists, and how many allocation sites
+PROFILE_REPORT_FUNCTIONS = 40
+PROFILE_REPORT_ALLOCATIONS = 25
+
+
+class DaikinOneProfiler:
+    """
+    Profiles the next `cycles` refresh cycles of the account whose coordinator it is handed to, with cProfile and
+    tracemalloc. A cycle is a coordinator refresh from fetching the data to calling back the entities with it.
+
+    Both only run while a cycle does, but then see everything on the event loop, including other integrations while a
+    request is awaited. Work done in executor threads, like decoding large responses, is not profiled, its allocations
+    are traced though. Coordinators only check whether a profiler is set, so none of this costs anything while there is
+    none.
+    """
+
+    def __init__(self, cycles: int):
+        """Raises ValueError if another profiler is already running"""
+        self.cycles = cycles
+        self.completed = 0
+
+        # fail now rather than in the middle of a refresh if the profiler cannot be enabled
+        self._profile = cProfile.Profile()
+        self._profile.enable()
+        self._profile.disable()
+
+        self._running = 0
+        self._profiled = 0.0
+        self._cycle_started = 0.0
+        self._started = time.monotonic()
+        self._done: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+
+        # allocations still held at the end of each cycle, summed up per line, and the highest peak of any cycle
+        self._owns_tracemalloc = False
+        self._cycle_allocations: tracemalloc.Snapshot | None = None
+        self._allocated: dict[tracemalloc.Traceback, tuple[int, int]] = {}
+        self._peak = 0
+
+    @contextmanager
+    def cycle(self) -> Generator[None, None, None]:
+        """Profile what runs until the block exits, overlapping cycles are profiled as one"""
+        if self._done.done():
+            yield
+            return
+
+        if not self._running:
+            self._start_tracing()
+            self._cycle_started = time.perf_counter()
+            self._profile.enable()
+        self._running += 1
+
+        try:
+            yield
+        finally:
+            self._running -= 1
+            if not self._running:
+                self._profile.disable()
+                self._profiled += time.perf_counter() - self._cycle_started
+                self._stop_tracing()
+
+            self.completed += 1
+            if self.completed >= self.cycles and not self._running and not self._done.done():
+                self._done.set_result(None)
+
+    async def wait(self) -> None:
+        """Wait until the requested number of cycles was profiled, or the profiler was closed"""
+        try:
+            await asyncio.shield(self._done)
+        except asyncio.CancelledError:
+            # only closing cancels the future, the waiting task being cancelled leaves it alone
+            if not self._done.cancelled():
+                raise
+
+    def close(self) -> None:
+        """Stop profiling and tracing without writing a report, e.g. because waiting for the cycles was cancelled"""
+        self._profile.disable()
+        self._stop_tracing()
+        if not self._done.done():
+            self._done.cancel()
+
+    def write_report(self, path: str) -> None:
+        """
+        Write a readable report to `path`.txt and the raw profile to `path`.prof, for use with pstats or tools like
+        snakeviz. Blocks while writing files, so it is meant to run in the executor.
+        """
+        report = io.StringIO()
+        report.write(
+            f"Daikin One profile of {self.completed} refresh cycles over {time.monotonic() - self._started:.1f}s, "
+            f"{self._profiled:.3f}s of which were profiled\n"
+        )
+        if self._owns_tracemalloc:
+            report.write(f"Traced memory peaked at {self._peak / 1024:.0f} KiB during a cycle\n")
+        report.write("\n")
+
+        stats = pstats.Stats(self._profile, stream=report)
+        report.write("All functions by cumulative time\n")
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(PROFILE_REPORT_FUNCTIONS)
+        report.write("Daikin One functions by own time\n")
+        stats.sort_stats(pstats.SortKey.TIME).print_stats("daikinone", PROFILE_REPORT_FUNCTIONS)
+
+        report.write("Memory allocated during the cycles and still held at their end, by line\n")
+        allocated = sorted(self._allocated.items(), key=lambda item: item[1][0], reverse=True)
+        for traceback, (size, count) in allocated[:PROFILE_REPORT_ALLOCATIONS]:
+            report.write(f"{traceback}: {size / 1024:+.1f} KiB in {count:+d} blocks\n")
+
+        stats.dump_stats(f"{path}.prof")
+        with open(f"{path}.txt", "w", encoding="utf-8") as f:
+            f.write(report.getvalue())
+
+    def _start_tracing(self) -> None:
+        # allocations are traced by whoever already does, compared to what is allocated when the cycle starts
+        self._owns_tracemalloc = not tracemalloc.is_tracing()
+        if self._owns_tracemalloc:
+            tracemalloc.start()
+        self._cycle_allocations = tracemalloc.take_snapshot()
+
+    def _stop_tracing(self) -> None:
+        if self._cycle_allocations is None or not tracemalloc.is_tracing():
+            return
+
+        own_traces = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+        allocations = tracemalloc.take_snapshot().filter_traces(own_traces)
+        for stat in allocations.compare_to(self._cycle_allocations.filter_traces(own_traces), "lineno"):
+            if not stat.size_diff and not stat.count_diff:
+                continue
+            size, count = self._allocated.get(stat.traceback, (0, 0))
+            self._allocated[stat.traceback] = (size + stat.size_diff, count + stat.count_diff)
+        self._cycle_allocations = None
+
+        if self._owns_tracemalloc:
+            self._peak = max(self._peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
@@ -0,0 +1,142 @@
+import asyncio
+import heapq
+import itertools
+import time
+from dataclasses import dataclass
+from enum import IntEnum
+
+
+class DaikinRequestPriority(IntEnum):
+    """Order in which queued requests are let through, lower goes first"""
+
+    COMMAND = 0
+    POLL = 1
+
+
+@dataclass
+class DaikinRateLimiterStats:
+    """Requests let through, how many of them had to queue and for how long, and how often the cloud pushed back"""
+
+    requests: int = 0
+    queued: int = 0
+    queue_depth: int = 0
+    max_queue_depth: int = 0
+    total_wait: float = 0
+    max_wait: float = 0
+    throttled: int = 0
+
+
+class DaikinRateLimiter:
+    """
+    Token bucket shared by every request of a client. Requests go through right away while there are tokens left, and
+    queue by priority, then arrival, once the bucket is empty, so commands overtake background polls. When the cloud
+    asks to back off, nothing goes through until the given time has passed.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        """`rate` is the sustained number of requests per second, `burst` how many can go out at once after a pause"""
+        self._rate = rate
+        self._burst = burst
+        self._tokens = float(burst)
+        self._updated_at = time.monotonic()
+        self._blocked_until = 0.0
+
+        self._waiters: list[tuple[int, int, asyncio.Future[None]]] = []
+        self._sequence = itertools.count()
+        self._timer: asyncio.TimerHandle | None = None
+
+        self.stats = DaikinRateLimiterStats()
+
+    async def acquire(self, priority: DaikinRequestPriority) -> None:
+        """Wait until a request of the given priority may be sent"""
+        self.stats.requests += 1
+        if not self._waiters and self.__take():
+            return
+
+        started = time.monotonic()
+        waiter = (priority, next(self._sequence), asyncio.get_running_loop().create_future())
+        heapq.heappush(self._waiters, waiter)
+        self.stats.queued += 1
+        self.__set_queue_depth()
+        self.__schedule()
+
+        try:
+            await waiter[2]
+        except asyncio.CancelledError:
+            if waiter[2].done() and not waiter[2].cancelled():
+                # let through but cancelled before it could send, the token goes to the next one in line
+                self._tokens += 1
+                self.__schedule()
+            raise
+        finally:
+            # a cancelled waiter leaves the queue right away, so later requests are not kept off the fast path
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+                heapq.heapify(self._waiters)
+                self.__set_queue_depth()
+
+        waited = time.monotonic() - started
+        self.stats.total_wait += waited
+        self.stats.max_wait = max(self.stats.max_wait, waited)
+
+    def block(self, seconds: float) -> None:
+        """Let nothing through for the given number of seconds, e.g. because the cloud answered with Retry-After"""
+        self.stats.throttled += 1
+        self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+    def cancel(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        for _, _, future in self._waiters:
+            future.cancel()
+        self._waiters.clear()
+        self.__set_queue_depth()
+
+    def __refill(self, now: float) -> None:
+        self._tokens = min(self._burst, self._tokens + (now - self._updated_at) * self._rate)
+        self._updated_at = now
+
+    def __take(self) -> bool:
+        now = time.monotonic()
+        if now < self._blocked_until:
+            return False
+
+        self.__refill(now)
+        if self._tokens < 1:
+            return False
+
+        self._tokens -= 1
+        return True
+
+    def __schedule(self) -> None:
+        if self._timer is not None:
+            return
+
+        while self._waiters:
+            _, _, future = self._waiters[0]
+            if future.done():
+                heapq.heappop(self._waiters)
+                continue
+            if not self.__take():
+                break
+
+            heapq.heappop(self._waiters)
+            future.set_result(None)
+
+        self.__set_queue_depth()
+        if not self._waiters:
+            return
+
+        now = time.monotonic()
+        delay = max(self._blocked_until - now, (1 - self._tokens) / self._rate, 0)
+        self._timer = asyncio.get_running_loop().call_later(delay, self.__wake)
+
+    def __wake(self) -> None:
+        self._timer = None
+        self.__schedule()
+
+    def __set_queue_depth(self) -> None:
+        depth = sum(1 for _, _, future in self._waiters if not future.done())
+        self.stats.queue_depth = depth
+        self.stats.max_queue_depth = max(self.stats.max_queue_depth, depth)
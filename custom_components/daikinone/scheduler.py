@@ -0,0 +1,60 @@
+import time
+from collections.abc import Iterable
+from datetime import timedelta
+
+from custom_components.daikinone.const import COMMAND_ACTIVE_WINDOW, MAX_ERROR_POLL_INTERVAL
+from custom_components.daikinone.daikinone import DaikinOutdoorUnit, DaikinThermostat, DaikinThermostatStatus
+
+
+class DaikinOnePollScheduler:
+    """
+    Picks the interval until the next poll. Polls as fast as allowed while any equipment is running or shortly after a
+    command was sent, as slow as allowed once every thermostat is idle or offline, and backs off exponentially beyond
+    that while the cloud keeps failing.
+    """
+
+    def __init__(self, min_interval: timedelta, max_interval: timedelta):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = min_interval
+
+        self._active_until: float = 0
+        self._failures = 0
+
+    def note_command(self) -> None:
+        """Poll fast for a while, the command usually kicks off equipment activity worth following closely"""
+        self._active_until = time.monotonic() + COMMAND_ACTIVE_WINDOW.total_seconds()
+        self.interval = self.min_interval
+
+    def on_success(self, thermostats: Iterable[DaikinThermostat]) -> timedelta:
+        self._failures = 0
+
+        if time.monotonic() < self._active_until or any(self.__is_active(t) for t in thermostats):
+            self.interval = self.min_interval
+        else:
+            self.interval = self.max_interval
+
+        return self.interval
+
+    def on_failure(self) -> timedelta:
+        self._failures += 1
+
+        # first retry at the usual pace, then keep doubling
+        if self._failures > 1:
+            self.interval = min(self.interval * 2, max(self.max_interval, MAX_ERROR_POLL_INTERVAL))
+
+        return self.interval
+
+    @staticmethod
+    def __is_active(thermostat: DaikinThermostat) -> bool:
+        if not thermostat.online:
+            return False
+
+        if thermostat.status != DaikinThermostatStatus.IDLE:
+            return True
+
+        # the compressor can keep running after the thermostat went idle, e.g. while defrosting
+        return any(
+            isinstance(equipment, DaikinOutdoorUnit) and equipment.compressor_speed_current > 0
+            for equipment in thermostat.equipment.values()
+        )
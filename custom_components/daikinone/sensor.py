@@ -1,5 +1,5 @@
 import logging
-from typing import Callable
+from typing import Any, Callable, Iterable, cast
 
 from homeassistant.components.sensor import SensorEntity, SensorEntityDescription, SensorDeviceClass, SensorStateClass
 from homeassistant.config_entries import ConfigEntry
@@ -11,15 +11,25 @@ from homeassistant.const import (
     UnitOfTime,
     UnitOfPressure,
     UnitOfElectricCurrent,
+    UnitOfInformation,
 )
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.device_registry import DeviceEntryType
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity import DeviceInfo
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.typing import StateType
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from custom_components.daikinone import DOMAIN, DaikinOneData
-from custom_components.daikinone.const import CONF_OPTION_ENTITY_UID_SCHEMA_VERSION_KEY, MANUFACTURER
+from custom_components.daikinone import DOMAIN, DaikinOneCoordinator, DaikinOneData
+from custom_components.daikinone.const import (
+    CONF_OPTION_ENTITY_UID_SCHEMA_VERSION_KEY,
+    MANUFACTURER,
+    METRICS_COORDINATOR,
+)
 from custom_components.daikinone.daikinone import (
+    DAIKIN_API_ENDPOINT_DEVICE_DATA,
+    DAIKIN_API_ENDPOINT_REFRESH_TOKEN,
     DaikinDevice,
     DaikinEEVCoil,
     DaikinOutdoorUnitReversingValveStatus,
@@ -27,8 +37,10 @@ from custom_components.daikinone.daikinone import (
     DaikinThermostat,
     DaikinIndoorUnit,
     DaikinEquipment,
+    DaikinFieldKey,
     DaikinOutdoorUnit,
 )
+from custom_components.daikinone.metrics import DaikinPhase
 
 log = logging.getLogger(__name__)
 
@@ -39,9 +51,18 @@ async def async_setup_entry(
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Set up Daikin One sensors"""
-    data: DaikinOneData = hass.data[DOMAIN]
-    thermostats = data.daikin.get_thermostats().values()
+    data: DaikinOneData = hass.data[DOMAIN][config_entry.entry_id]
+
+    @callback
+    def add_thermostats(thermostats: list[DaikinThermostat]) -> None:
+        async_add_entities(get_thermostat_sensors(data, thermostats))
+
+    config_entry.async_on_unload(data.async_track_thermostats(add_thermostats))
+    async_add_entities(get_account_sensors(data))
 
+
+def get_thermostat_sensors(data: DaikinOneData, thermostats: Iterable[DaikinThermostat]) -> list[SensorEntity]:
+    """Create the sensors of the given thermostats and their equipment"""
     entities: list[SensorEntity] = []
     for thermostat in thermostats:
         # thermostat sensors
@@ -692,22 +713,277 @@ async def async_setup_entry(
                 case _:
                     log.warning(f"unexpected equipment: {equipment}")
 
-    async_add_entities(entities, True)
+    return entities
+
+
+def get_account_sensors(data: DaikinOneData) -> list[SensorEntity]:
+    """Create the integration level sensors of the account"""
+    entities: list[SensorEntity] = [
+        DaikinOnePollIntervalSensor(
+            description=SensorEntityDescription(
+                key="poll_interval",
+                name="Poll Interval",
+                has_entity_name=True,
+                state_class=SensorStateClass.MEASUREMENT,
+                device_class=SensorDeviceClass.DURATION,
+                native_unit_of_measurement=UnitOfTime.SECONDS,
+                entity_category=EntityCategory.DIAGNOSTIC,
+                icon="mdi:timer-sync-outline",
+            ),
+            data=data,
+        ),
+    ]
+
+    # request and refresh metrics, for troubleshooting slow or failing cloud requests
+    entities += [
+        DaikinOneMetricSensor(
+            description=SensorEntityDescription(
+                key="api_requests",
+                name="API Requests",
+                has_entity_name=True,
+                state_class=SensorStateClass.TOTAL_INCREASING,
+                entity_category=EntityCategory.DIAGNOSTIC,
+                entity_registry_enabled_default=False,
+                icon="mdi:api",
+            ),
+            data=data,
+            value=lambda d: d.daikin.get_metrics().total("requests"),
+        ),
+        DaikinOneMetricSensor(
+            description=SensorEntityDescription(
+                key="api_errors",
+                name="API Errors",
+                has_entity_name=True,
+                state_class=SensorStateClass.TOTAL_INCREASING,
+                entity_category=EntityCategory.DIAGNOSTIC,
+                entity_registry_enabled_default=False,
+                icon="mdi:api-off",
+            ),
+            data=data,
+            value=lambda d: d.daikin.get_metrics().total("errors"),
+        ),
+        DaikinOneMetricSensor(
+            description=SensorEntityDescription(
+                key="token_refreshes",
+                name="Token Refreshes",
+                has_entity_name=True,
+                state_class=SensorStateClass.TOTAL_INCREASING,
+                entity_category=EntityCategory.DIAGNOSTIC,
+                entity_registry_enabled_default=False,
+                icon="mdi:key-change",
+            ),
+            data=data,
+            value=lambda d: d.daikin.get_metrics().counter(DAIKIN_API_ENDPOINT_REFRESH_TOKEN, "requests"),
+        ),
+        DaikinOneMetricSensor(
+            description=SensorEntityDescription(
+                key="device_data_size",
+                name="Device Data Size",
+                has_entity_name=True,
+                state_class=SensorStateClass.MEASUREMENT,
+                device_class=SensorDeviceClass.DATA_SIZE,
+                native_unit_of_measurement=UnitOfInformation.BYTES,
+                entity_category=EntityCategory.DIAGNOSTIC,
+                entity_registry_enabled_default=False,
+                icon="mdi:file-download-outline",
+            ),
+            data=data,
+            value=lambda d: d.daikin.get_decode_stats().last_size or None,
+        ),
+    ]
+    entities += [
+        DaikinOneLatencySensor(
+            description=SensorEntityDescription(
+                key=f"{key}_latency",
+                name=f"{name} Latency",
+                has_entity_name=True,
+                state_class=SensorStateClass.MEASUREMENT,
+                device_class=SensorDeviceClass.DURATION,
+                native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+                suggested_display_precision=1,
+                entity_category=EntityCategory.DIAGNOSTIC,
+                entity_registry_enabled_default=False,
+                icon="mdi:timer-outline",
+            ),
+            data=data,
+            endpoint=endpoint,
+            phase=phase,
+        )
+        for key, name, endpoint, phase in (
+            ("device_data_connect", "Device Data Connect", DAIKIN_API_ENDPOINT_DEVICE_DATA, DaikinPhase.CONNECT),
+            ("device_data_transfer", "Device Data Transfer", DAIKIN_API_ENDPOINT_DEVICE_DATA, DaikinPhase.TRANSFER),
+            ("device_data_decode", "Device Data Decode", DAIKIN_API_ENDPOINT_DEVICE_DATA, DaikinPhase.DECODE),
+            ("device_data_map", "Device Data Map", DAIKIN_API_ENDPOINT_DEVICE_DATA, DaikinPhase.MAP),
+            ("dispatch", "Dispatch", METRICS_COORDINATOR, DaikinPhase.DISPATCH),
+        )
+    ]
+
+    return entities
+
+
+def get_account_device_info(data: DaikinOneData) -> DeviceInfo:
+    """Return device information for the account itself, which holds integration level sensors."""
+    return DeviceInfo(
+        identifiers={(DOMAIN, data.entry.entry_id)},
+        name=data.entry.title,
+        manufacturer=MANUFACTURER,
+        entry_type=DeviceEntryType.SERVICE,
+    )
+
+
+class DaikinOnePollIntervalSensor(SensorEntity):
+    """The interval the coordinator currently waits between polls"""
 
+    _attr_should_poll = False
+
+    def __init__(self, description: SensorEntityDescription, data: DaikinOneData) -> None:
+        self.entity_description = description
+        self._data = data
+
+        self._attr_unique_id = f"{data.entry.entry_id}-{description.key}"
+        self._attr_device_info = get_account_device_info(data)
+        self._attr_native_value = self.get_interval()
+
+    async def async_added_to_hass(self) -> None:
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass, self._data.coordinator.poll_interval_signal, self._handle_interval_update
+            )
+        )
+
+    @callback
+    def _handle_interval_update(self) -> None:
+        self._attr_native_value = self.get_interval()
+        self.async_write_ha_state()
+
+    def get_interval(self) -> float | None:
+        interval = self._data.coordinator.update_interval
+        return interval.total_seconds() if interval is not None else None
+
+
+class DaikinOneMetricSensor(SensorEntity):
+    """
+    A request or refresh metric of the account. Metrics change with every request rather than with the thermostat
+    data, so they are read when polled instead of on coordinator updates.
+    """
 
-class DaikinOneSensor[D: DaikinDevice](SensorEntity):
+    def __init__(
+        self, description: SensorEntityDescription, data: DaikinOneData, value: Callable[[DaikinOneData], StateType]
+    ) -> None:
+        self.entity_description = description
+        self._data = data
+        self._value = value
+
+        self._attr_unique_id = f"{data.entry.entry_id}-{description.key}"
+        self._attr_device_info = get_account_device_info(data)
+        self._attr_native_value = value(data)
+
+    async def async_update(self) -> None:
+        self._attr_native_value = self._value(self._data)
+
+
+class DaikinOneLatencySensor(DaikinOneMetricSensor):
+    """The last latency of an endpoint and phase in milliseconds, with the summary of all of them as attributes"""
+
+    def __init__(
+        self, description: SensorEntityDescription, data: DaikinOneData, endpoint: str, phase: DaikinPhase
+    ) -> None:
+        self._endpoint = endpoint
+        self._phase = phase
+        super().__init__(description, data, lambda _: self._get_summary().get("last"))
+
+    async def async_update(self) -> None:
+        await super().async_update()
+        self._attr_extra_state_attributes = self._get_summary()
+
+    def _get_summary(self) -> dict[str, Any]:
+        histogram = self._data.daikin.get_metrics().histogram(self._endpoint, self._phase)
+        if histogram is None:
+            return {}
+
+        return {
+            name: round(value * 1000, 3) if isinstance(value, float) else value
+            for name, value in histogram.summary().items()
+        }
+
+
+class _FieldRecorder:
+    """Stands in for a device while an attribute getter runs, recording which model fields it reads"""
+
+    def __init__(self, device: DaikinDevice):
+        self._device = device
+        self.fields: set[str] = set()
+
+    def __getattr__(self, name: str) -> Any:
+        self.fields.add(name)
+        return getattr(self._device, name)
+
+
+class DaikinOneSensor[D: DaikinDevice](CoordinatorEntity[DaikinOneCoordinator], SensorEntity):  # type: ignore
     def __init__(
         self, description: SensorEntityDescription, data: DaikinOneData, device: D, attribute: Callable[[D], StateType]
     ) -> None:
         """Initialize the sensor."""
+        super().__init__(data.coordinator)
 
         self.entity_description = description
         self._data = data
         self._device: D = device
         self._attribute = attribute
+        self._present = True
 
         self._attr_device_info = self.get_device_info()
 
+        # subscribe to exactly the fields the attribute getter reads so we are only called back when those change
+        recorder = _FieldRecorder(device)
+        self._attr_native_value = self._attribute(cast(D, recorder))
+        if recorder.fields:
+            self.coordinator_context = frozenset(self.get_field_key(name) for name in recorder.fields)
+
+        self._published: tuple[object, bool] | None = None
+
+    @callback
+    def async_write_ha_state(self) -> None:
+        self._published = (self._attr_native_value, self.available)
+        super().async_write_ha_state()
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """
+        Update the sensor from the latest coordinator snapshot. The state is only written if the value or availability
+        changed since it was last published, most sensors are static between polls.
+        """
+        # a device that was removed from the account keeps its last value and shows as unavailable
+        device = self.get_device(self.coordinator.data)
+        self._present = device is not None
+        if device is not None:
+            self._device = device
+            self._attr_native_value = self._attribute(device)
+
+        if self._published == (self._attr_native_value, self.available):
+            self.coordinator.write_stats.record(written=False)
+            return
+
+        self.coordinator.write_stats.record(written=True)
+        self.async_write_ha_state()
+
+    @property
+    def available(self) -> bool:  # type: ignore
+        return self._present and self.coordinator.is_fresh(self.thermostat_id)
+
+    async def async_update(self) -> None:
+        """Refresh in the background, the last snapshot is shown until the refreshed one is in."""
+        if self.enabled:
+            self.coordinator.async_refresh_in_background()
+
+    def get_device(self, thermostats: dict[str, DaikinThermostat]) -> D | None:
+        """Return this sensor's device from the given thermostat snapshot, or None if it is no longer there."""
+        raise NotImplementedError("Sensor subclass did not implement get_device")
+
+    def get_field_key(self, name: str) -> DaikinFieldKey:
+        """Return the change key of the given field of this sensor's device."""
+        raise NotImplementedError("Sensor subclass did not implement get_field_key")
+
     def get_device_info(self) -> DeviceInfo | None:
         """Return device information for this sensor."""
 
@@ -729,6 +1005,11 @@ class DaikinOneSensor[D: DaikinDevice](SensorEntity):
         """Return the name of the device."""
         raise NotImplementedError("Sensor subclass did not implement device_name")
 
+    @property
+    def thermostat_id(self) -> str:
+        """Return the id of the thermostat this sensor's device belongs to."""
+        raise NotImplementedError("Sensor subclass did not implement thermostat_id")
+
     @property
     def device_parent(self) -> str | None:
         """Return the name of the device."""
@@ -757,11 +1038,18 @@ class DaikinOneThermostatSensor(DaikinOneSensor[DaikinThermostat]):
     def device_name(self) -> str:
         return f"{self._device.name} Thermostat"
 
-    async def async_update(self) -> None:
-        """Get the latest state of the sensor."""
-        await self._data.update()
-        self._device = self._data.daikin.get_thermostat(self._device.id)
-        self._attr_native_value = self._attribute(self._device)
+    @property
+    def thermostat_id(self) -> str:
+        return self._device.id
+
+    def get_device_info(self) -> DeviceInfo | None:
+        return self._data.get_thermostat_device_info(self._device.id)
+
+    def get_device(self, thermostats: dict[str, DaikinThermostat]) -> DaikinThermostat | None:
+        return thermostats.get(self._device.id)
+
+    def get_field_key(self, name: str) -> DaikinFieldKey:
+        return self._device.id, None, name
 
 
 class DaikinOneEquipmentSensor[E: DaikinEquipment](DaikinOneSensor[E]):
@@ -783,9 +1071,13 @@ class DaikinOneEquipmentSensor[E: DaikinEquipment](DaikinOneSensor[E]):
         thermostat = self._data.daikin.get_thermostat(self._device.thermostat_id)
         return f"{thermostat.name} {self._device.name}"
 
-    async def async_update(self) -> None:
-        """Get the latest state of the sensor."""
-        await self._data.update()
-        thermostat = self._data.daikin.get_thermostat(self._device.thermostat_id)
-        self._device = thermostat.equipment[self._device.id]
-        self._attr_native_value = self._attribute(self._device)
+    @property
+    def thermostat_id(self) -> str:
+        return self._device.thermostat_id
+
+    def get_device(self, thermostats: dict[str, DaikinThermostat]) -> E | None:
+        thermostat = thermostats.get(self._device.thermostat_id)
+        return thermostat.equipment.get(self._device.id) if thermostat is not None else None  # type: ignore
+
+    def get_field_key(self, name: str) -> DaikinFieldKey:
+        return self._device.thermostat_id, self._device.id, name
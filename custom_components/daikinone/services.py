@@ -0,0 +1,189 @@
+import asyncio
+import logging
+import time
+from typing import Any
+
+import voluptuous as vol
+from aiohttp import ClientError
+from homeassistant.components.climate import ATTR_HVAC_MODE, ATTR_TARGET_TEMP_HIGH, ATTR_TARGET_TEMP_LOW, HVACMode
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse
+from homeassistant.exceptions import HomeAssistantError, ServiceValidationError
+import homeassistant.helpers.config_validation as cv
+from homeassistant.util import dt as dt_util
+
+from custom_components.daikinone import DaikinOneData
+from custom_components.daikinone.climate import HVAC_MODE_TO_THERMOSTAT_MODE
+from custom_components.daikinone.const import (
+    BULK_SET_DEFAULT_CONCURRENCY,
+    DOMAIN,
+    PROFILE_DEFAULT_CYCLES,
+    PROFILE_TIMEOUT_MARGIN,
+)
+from custom_components.daikinone.daikinone import DaikinThermostat, DaikinThermostatCommand
+from custom_components.daikinone.exceptions import DaikinServiceException
+from custom_components.daikinone.profiler import DaikinOneProfiler
+from custom_components.daikinone.utils import Temperature
+
+log = logging.getLogger(__name__)
+
+SERVICE_BULK_SET = "bulk_set"
+SERVICE_PROFILE = "profile"
+
+ATTR_THERMOSTAT_IDS = "thermostat_ids"
+ATTR_MAX_CONCURRENCY = "max_concurrency"
+ATTR_CYCLES = "cycles"
+ATTR_CONFIG_ENTRY_ID = "config_entry_id"
+
+BULK_SET_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_THERMOSTAT_IDS): vol.All(cv.ensure_list, [cv.string], vol.Length(min=1)),
+        vol.Optional(ATTR_HVAC_MODE): vol.In([mode.value for mode in HVAC_MODE_TO_THERMOSTAT_MODE]),
+        vol.Optional(ATTR_TARGET_TEMP_LOW): vol.Coerce(float),
+        vol.Optional(ATTR_TARGET_TEMP_HIGH): vol.Coerce(float),
+        vol.Optional(ATTR_MAX_CONCURRENCY): vol.All(vol.Coerce(int), vol.Range(min=1, max=20)),
+    }
+)
+
+PROFILE_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_CONFIG_ENTRY_ID): cv.string,
+        vol.Optional(ATTR_CYCLES): vol.All(vol.Coerce(int), vol.Range(min=1, max=100)),
+    }
+)
+
+
+def async_register_services(hass: HomeAssistant) -> None:
+    """Register the integration services, once for all config entries"""
+    if hass.services.has_service(DOMAIN, SERVICE_BULK_SET):
+        return
+
+    async def bulk_set(call: ServiceCall) -> ServiceResponse:
+        return await _bulk_set(hass, call)
+
+    async def profile(call: ServiceCall) -> ServiceResponse:
+        return await _profile(hass, call)
+
+    hass.services.async_register(
+        DOMAIN, SERVICE_BULK_SET, bulk_set, schema=BULK_SET_SCHEMA, supports_response=SupportsResponse.OPTIONAL
+    )
+    hass.services.async_register(
+        DOMAIN, SERVICE_PROFILE, profile, schema=PROFILE_SCHEMA, supports_response=SupportsResponse.OPTIONAL
+    )
+
+
+def async_remove_services(hass: HomeAssistant) -> None:
+    hass.services.async_remove(DOMAIN, SERVICE_BULK_SET)
+    hass.services.async_remove(DOMAIN, SERVICE_PROFILE)
+
+
+async def _bulk_set(hass: HomeAssistant, call: ServiceCall) -> ServiceResponse:
+    """
+    Set the mode and/or set points of many thermostats at once, across all accounts. Updates are sent concurrently, at
+    most `max_concurrency` at a time, and confirmed together by each account's confirmation poll loop. Returns the
+    outcome and latency per thermostat, and the latency of the whole call.
+    """
+    # thermostats can belong to any of the configured accounts
+    accounts: dict[str, DaikinOneData] = hass.data[DOMAIN]
+    owners: dict[str, DaikinOneData] = {}
+    thermostats: dict[str, DaikinThermostat] = {}
+    for data in accounts.values():
+        for thermostat_id, thermostat in data.get_thermostats().items():
+            owners[thermostat_id] = data
+            thermostats[thermostat_id] = thermostat
+
+    # a thermostat listed twice is set once, and has one result
+    thermostat_ids: list[str] = list(dict.fromkeys(call.data[ATTR_THERMOSTAT_IDS]))
+    unknown = [thermostat_id for thermostat_id in thermostat_ids if thermostat_id not in thermostats]
+    if unknown:
+        raise ServiceValidationError(f"Unknown thermostats: {', '.join(unknown)}")
+
+    hvac_mode = call.data.get(ATTR_HVAC_MODE)
+    heat = call.data.get(ATTR_TARGET_TEMP_LOW)
+    cool = call.data.get(ATTR_TARGET_TEMP_HIGH)
+    if hvac_mode is None and heat is None and cool is None:
+        raise ServiceValidationError("Nothing to set, give a mode and/or set points")
+
+    limit = asyncio.Semaphore(call.data.get(ATTR_MAX_CONCURRENCY, BULK_SET_DEFAULT_CONCURRENCY))
+    started = time.monotonic()
+
+    async def set_thermostat(thermostat_id: str) -> dict[str, Any]:
+        command = DaikinThermostatCommand(
+            mode=HVAC_MODE_TO_THERMOSTAT_MODE[HVACMode(hvac_mode)] if hvac_mode is not None else None,
+            set_point_heat=Temperature.from_celsius(heat) if heat is not None else None,
+            set_point_cool=Temperature.from_celsius(cool) if cool is not None else None,
+            override_schedule=thermostats[thermostat_id].schedule.enabled and (heat is not None or cool is not None),
+        )
+
+        thermostat_started = time.monotonic()
+        result: dict[str, Any]
+        try:
+            confirmed = await owners[thermostat_id].async_send_command(thermostat_id, command, write_limit=limit)
+            result = {"success": True, "confirmed": confirmed}
+        except (DaikinServiceException, ClientError, TimeoutError) as e:
+            log.warning(f"Failed to set thermostat {thermostat_id}: {e!r}")
+            result = {"success": False, "confirmed": False, "error": str(e)}
+
+        result["latency"] = round(time.monotonic() - thermostat_started, 3)
+        return result
+
+    results = await asyncio.gather(*(set_thermostat(thermostat_id) for thermostat_id in thermostat_ids))
+
+    return {
+        "thermostats": dict(zip(thermostat_ids, results)),
+        "latency": round(time.monotonic() - started, 3),
+    }
+
+
+async def _profile(hass: HomeAssistant, call: ServiceCall) -> ServiceResponse:
+    """
+    Profile the next refresh cycles of an account with cProfile and tracemalloc, and write a report to the config
+    directory. The account's config entry can be left out if there is only one. Returns once the cycles are done, with
+    the paths of the report and the raw profile. If they are not done in time or the account is unloaded in the
+    meantime, the cycles profiled until then are reported.
+    """
+    accounts: dict[str, DaikinOneData] = hass.data[DOMAIN]
+    entry_id: str | None = call.data.get(ATTR_CONFIG_ENTRY_ID)
+    if entry_id is None:
+        if len(accounts) != 1:
+            raise ServiceValidationError("There are several Daikin One accounts, give the config entry to profile")
+        entry_id = next(iter(accounts))
+    elif entry_id not in accounts:
+        raise ServiceValidationError(f"Unknown Daikin One config entry: {entry_id}")
+
+    coordinator = accounts[entry_id].coordinator
+    if coordinator.profiler is not None:
+        raise ServiceValidationError("Already profiling this account, wait for the running profile to finish")
+
+    try:
+        profiler = DaikinOneProfiler(call.data.get(ATTR_CYCLES, PROFILE_DEFAULT_CYCLES))
+    except ValueError as e:
+        raise ServiceValidationError(f"Cannot profile while another profiler is running: {e}") from e
+
+    title = accounts[entry_id].entry.title
+    timeout = profiler.cycles * (coordinator.update_interval or coordinator.scheduler.max_interval)
+    timeout += PROFILE_TIMEOUT_MARGIN
+
+    log.info(f"Profiling the next {profiler.cycles} refresh cycles of {title}")
+    coordinator.profiler = profiler
+    try:
+        async with asyncio.timeout(timeout.total_seconds()):
+            await profiler.wait()
+    except TimeoutError:
+        log.warning(f"Refresh cycles of {title} did not finish within {timeout}")
+    finally:
+        profiler.close()
+        coordinator.profiler = None
+
+    if not profiler.completed:
+        raise HomeAssistantError(f"No refresh cycle of {title} was profiled")
+
+    path = hass.config.path(f"{DOMAIN}_profile_{entry_id}_{dt_util.now():%Y%m%d_%H%M%S}")
+    await hass.async_add_executor_job(profiler.write_report, path)
+    log.info(f"Wrote profile of {profiler.completed} refresh cycles to {path}.txt")
+
+    return {
+        "config_entry_id": entry_id,
+        "report": f"{path}.txt",
+        "profile": f"{path}.prof",
+        "cycles": profiler.completed,
+    }
@@ -1,4 +1,4 @@
-from typing import Any
+from functools import lru_cache
 
 
 class Temperature:
@@ -12,57 +12,71 @@ class Temperature:
     Example usage:
         temp = Temperature.from_celsius(0)
         print(temp.fahrenheit)  # Prints the temperature in Fahrenheit
+
+    Values are kept to a tenth of a degree Celsius and converted to the other units once, when created. Instances are
+    immutable and shared between equal values, as the same few readings come back on every refresh. Integer and float
+    values are shared apart, so a value keeps the type it was read with.
     """
 
+    __slots__ = ("_temp_c", "_temp_f", "_temp_k")
+
+    _temp_c: float
+    _temp_f: float
+    _temp_k: float
+
     @staticmethod
     def from_celsius(temp_c: float) -> "Temperature":
-        temp = Temperature()
-        temp._init(temp_c)
-        return temp
+        return Temperature._shared(round(temp_c, 1))
 
     @staticmethod
     def from_fahrenheit(temp_f: float) -> "Temperature":
-        temp = Temperature()
-        temp._init((temp_f - 32) * 5 / 9)
-        return temp
+        return Temperature._shared(round((temp_f - 32) * 5 / 9, 1))
 
     @staticmethod
     def from_kelvin(temp_k: float) -> "Temperature":
+        return Temperature._shared(round(temp_k - 273.15, 1))
+
+    @staticmethod
+    @lru_cache(maxsize=2048, typed=True)
+    def _shared(temp_c: float) -> "Temperature":
         temp = Temperature()
-        temp._init(temp_k - 273.15)
+        temp._init(temp_c)
         return temp
 
     def _init(self, temp_c: float) -> None:
-        self._temp_c: float = round(temp_c, 1)
+        object.__setattr__(self, "_temp_c", temp_c)
+        object.__setattr__(self, "_temp_f", round(temp_c * 9 / 5 + 32, 1))
+        object.__setattr__(self, "_temp_k", round(temp_c + 273.15, 1))
 
     @property
     def celsius(self) -> float:
-        return round(self._temp_c, 1)
+        return self._temp_c
 
     @property
     def fahrenheit(self) -> float:
-        return round(self._temp_c * 9 / 5 + 32, 1)
+        return self._temp_f
 
     @property
     def kelvin(self) -> float:
-        return round(self._temp_c + 273.15, 1)
+        return self._temp_k
 
-    @classmethod
-    def __get_validators__(cls):
-        yield cls.validate
+    def __setattr__(self, name: str, value: object) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable")
 
-    @classmethod
-    def validate(cls, v: Any) -> "Temperature":
-        if not isinstance(v, cls):
-            raise TypeError(f"Expected an instance of Temperature, received {type(v)}")
+    def __copy__(self) -> "Temperature":
+        return self
 
-        if not hasattr(v, "_temp_c") or getattr(v, "_temp_c") is None:
-            raise TypeError("Temperature instance is not initialized")
-
-        return v
+    def __deepcopy__(self, memo: dict[int, object]) -> "Temperature":
+        return self
 
     def __eq__(self, o: object) -> bool:
         return isinstance(o, Temperature) and self._temp_c == o._temp_c
 
+    def __hash__(self) -> int:
+        return hash(self._temp_c)
+
+    def __repr__(self) -> str:
+        return f"Temperature({self._temp_c}°C)"
+
     def __str__(self) -> str:
         return f"{self.celsius}°C"
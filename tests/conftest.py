@@ -0,0 +1,295 @@
+import asyncio
+import base64
+import itertools
+import json
+import time
+from collections import Counter
+from collections.abc import AsyncGenerator
+from typing import Any
+
+import pytest
+from aiohttp import web
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.daikinone import daikinone
+from custom_components.daikinone.const import CONF_OPTION_ENTITY_UID_SCHEMA_VERSION_KEY, DOMAIN
+
+
+def thermostat_data(index: int) -> dict[str, Any]:
+    """Device data of a thermostat with an air handler, heat pump and eev coil, plus keys the integration ignores"""
+    data: dict[str, Any] = {
+        "mode": 3,
+        "equipmentStatus": 5,
+        "schedEnabled": True,
+        "tempIndoor": 21.3,
+        "humIndoor": 45,
+        "hspActive": 20.0,
+        "cspActive": 24.5,
+        "hspHome": 20.0,
+        "cspHome": 24.5,
+        "EquipProtocolMinHeatSetpoint": 10.0,
+        "EquipProtocolMaxHeatSetpoint": 32.0,
+        "EquipProtocolMinCoolSetpoint": 10.0,
+        "EquipProtocolMaxCoolSetpoint": 32.0,
+        "ctSystemCapHeat": True,
+        "ctSystemCapCool": True,
+        "ctSystemCapEmergencyHeat": True,
+        # air handler
+        "ctAHUnitType": 1,
+        "ctAHModelNoCharacter1_15": "MBVC2000 ",
+        "ctAHSerialNoCharacter1_15": f"AH{index:05d} ",
+        "ctAHControlSoftwareVersion": " 1.2 ",
+        "ctAHMode": "FAN ",
+        "ctAHCurrentIndoorAirflow": 600,
+        "ctAHFanRequestedDemand": 100,
+        "ctAHFanCurrentDemandStatus": 101,
+        "ctAHHeatRequestedDemand": 0,
+        "ctAHHeatCurrentDemandStatus": 0,
+        "ctAHHumidificationRequestedDemand": 0,
+        "ctIndoorPower": 123,
+        # no furnace
+        "ctIFCUnitType": 255,
+        # heat pump
+        "ctOutdoorUnitType": 1,
+        "ctOutdoorHeatMaxRPS": 100,
+        "ctOutdoorModelNoCharacter1_15": "DZ9VC ",
+        "ctOutdoorSerialNoCharacter1_15": f"OD{index:05d}",
+        "ctOutdoorControlSoftwareVersion": "2.0",
+        "ctOutdoorInverterSoftwareVersion": "3.0 ",
+        "ctOutdoorCompressorRunTime": 1234,
+        "ctOutdoorMode": "HEAT",
+        "ctTargetCompressorspeed": 0,
+        "ctCurrentCompressorRPS": 0,
+        "ctTargetODFanRPM": 50,
+        "ctOutdoorFanRPM": 0,
+        "ctOutdoorSuctionPressure": 120,
+        "ctOutdoorEEVOpening": 33,
+        "ctReversingValve": 1,
+        "ctOutdoorHeatRequestedDemand": 51,
+        "ctOutdoorCoolRequestedDemand": 0,
+        "ctOutdoorFanRequestedDemandPercentage": 3,
+        "ctOutdoorRequestedIndoorAirflow": 500,
+        "ctOutdoorDeHumidificationRequestedDemand": 0,
+        "ctOutdoorAirTemperature": 451,
+        "ctOutdoorCoilTemperature": 400,
+        "ctOutdoorDischargeTemperature": 900,
+        "ctOutdoorLiquidTemperature": 700,
+        "ctOutdoorDefrostSensorTemperature": 410,
+        "ctInverterFinTemp": 30,
+        "ctOutdoorPower": 12,
+        "ctCompressorCurrent": 55,
+        "ctInverterCurrent": 44,
+        "ctODFanMotorCurrent": 11,
+        "ctCrankCaseHeaterOnOff": 0,
+        "ctDrainPanHeaterOnOff": 255,
+        "ctPreHeatOnOff": 1,
+        # eev coil
+        "ctCoilUnitType": 1,
+        "ctCoilSerialNoCharacter1_15": f"C{index}",
+        "ctCoilControlSoftwareVersion": "1.0",
+        "ctEEVCoilPressureSensor": 100,
+        "ctEEVCoilSubCoolValue": 50,
+        "ctEEVCoilSuctionTemperature": 450,
+        "ctEEVCoilSuperHeatValue": 80,
+    }
+    data.update({f"ctUnused{key}": key for key in range(100)})
+    return data
+
+
+def access_token(expires_in: float, token_id: int) -> str:
+    """An unsigned JWT, the integration only reads its expiry"""
+
+    def encode(claims: dict[str, Any]) -> str:
+        return base64.urlsafe_b64encode(json.dumps(claims).encode()).rstrip(b"=").decode()
+
+    claims = {"exp": int(time.time() + expires_in), "jti": token_id}
+    return f"{encode({'alg': 'none'})}.{encode(claims)}.signature"
+
+
+class FakeDaikinCloud:
+    """
+    Serves the parts of the Daikin API the integration uses from in-memory devices, counting requests per endpoint
+    like "GET /deviceData" in `requests`, in the order they came in in `history`, and keeping the connections they
+    came in on. Responses can be delayed by `latency` to keep requests in flight. Requests are only answered for
+    access tokens it issued and did not revoke since, others get a 401.
+
+    While `status` is set, every request is answered with it instead. The next `throttle` requests are turned away
+    with `throttle_status` and `retry_after` as their Retry-After header. Requests for a single thermostat whose id is
+    in `broken` fail with a 500. The locations devices are in are listed as given in `locations`.
+    """
+
+    def __init__(self, thermostats: int):
+        self.devices: list[dict[str, Any]] = [
+            {
+                "id": f"thermostat-{i}",
+                "locationId": "location-1",
+                "name": f"Room {i}",
+                "model": "ONEPLUS",
+                "firmware": "3.1.0",
+                "online": True,
+                "data": thermostat_data(i),
+            }
+            for i in range(thermostats)
+        ]
+        self.locations: list[Any] = [{"id": "location-1", "name": "Home"}]
+        self.requests: Counter[str] = Counter()
+        self.history: list[str] = []
+        self.connections: set[Any] = set()
+        self.latency = 0.0
+        self.status: int | None = None
+        self.broken: set[str] = set()
+        self.throttle = 0
+        self.throttle_status = 429
+        self.retry_after = "1"
+        self.token_expires_in = 3600.0
+        self.tokens: set[str] = set()
+        self._token_ids = itertools.count()
+
+    def app(self) -> web.Application:
+        app = web.Application(middlewares=[self._count])
+        app.router.add_post("/users/auth/login", self._login)
+        app.router.add_post("/users/auth/token", self._refresh_token)
+        app.router.add_get("/deviceData", self._device_data)
+        app.router.add_get("/deviceData/{id}", self._thermostat_data)
+        app.router.add_put("/deviceData/{id}", self._set_thermostat)
+        app.router.add_get("/devices", self._devices)
+        app.router.add_get("/locations", self._locations)
+        return app
+
+    @web.middleware
+    async def _count(self, request: web.Request, handler: Any) -> web.StreamResponse:
+        route = request.match_info.route.resource
+        endpoint = f"{request.method} {route.canonical if route else request.path}"
+        self.requests[endpoint] += 1
+        self.history.append(endpoint)
+        self.connections.add(request.transport)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.status is not None:
+            return web.Response(status=self.status)
+        if self.throttle:
+            self.throttle -= 1
+            return web.Response(status=self.throttle_status, headers={"Retry-After": self.retry_after})
+        if not request.path.startswith("/users/auth/"):
+            if request.headers.get("Authorization", "").removeprefix("Bearer ") not in self.tokens:
+                raise web.HTTPUnauthorized()
+        return await handler(request)
+
+    def revoke_tokens(self) -> None:
+        self.tokens.clear()
+
+    def _issue_token(self) -> str:
+        token = access_token(self.token_expires_in, next(self._token_ids))
+        self.tokens.add(token)
+        return token
+
+    async def _login(self, _: web.Request) -> web.Response:
+        return web.json_response({"accessToken": self._issue_token(), "refreshToken": "refresh"})
+
+    async def _refresh_token(self, _: web.Request) -> web.Response:
+        return web.json_response({"accessToken": self._issue_token()})
+
+    async def _device_data(self, _: web.Request) -> web.Response:
+        return web.json_response(self.devices)
+
+    def _device(self, request: web.Request) -> dict[str, Any]:
+        if request.match_info["id"] in self.broken:
+            raise web.HTTPInternalServerError()
+        for device in self.devices:
+            if device["id"] == request.match_info["id"]:
+                return device
+        raise web.HTTPNotFound()
+
+    async def _thermostat_data(self, request: web.Request) -> web.Response:
+        return web.json_response(self._device(request)["data"])
+
+    async def _set_thermostat(self, request: web.Request) -> web.Response:
+        data = self._device(request)["data"]
+        update = await request.json()
+        data.update(update)
+
+        # the thermostat is always home, so it follows its home set points
+        for home, active in (("hspHome", "hspActive"), ("cspHome", "cspActive")):
+            if home in update:
+                data[active] = update[home]
+        return web.json_response({})
+
+    async def _devices(self, _: web.Request) -> web.Response:
+        return web.json_response(
+            [
+                {
+                    "id": device["id"],
+                    "locationId": device["locationId"],
+                    "name": device["name"],
+                    "model": device["model"],
+                    "firmwareVersion": device["firmware"],
+                }
+                for device in self.devices
+            ]
+        )
+
+    async def _locations(self, _: web.Request) -> web.Response:
+        return web.json_response(self.locations)
+
+
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(enable_custom_integrations: None) -> None:
+    return
+
+
+@pytest.fixture
+def thermostats() -> int:
+    """Number of thermostats on the fake account, override to test larger accounts"""
+    return 2
+
+
+@pytest.fixture
+async def cloud(
+    socket_enabled: None, monkeypatch: pytest.MonkeyPatch, thermostats: int
+) -> AsyncGenerator[FakeDaikinCloud, None]:
+    """A fake Daikin cloud on localhost, with the client pointed at it"""
+    fake = FakeDaikinCloud(thermostats)
+    runner = web.AppRunner(fake.app())
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = runner.addresses[0][1]
+
+    base = f"http://127.0.0.1:{port}"
+    for name, path in (
+        ("DAIKIN_API_URL_LOGIN", "/users/auth/login"),
+        ("DAIKIN_API_URL_REFRESH_TOKEN", "/users/auth/token"),
+        ("DAIKIN_API_URL_LOCATIONS", "/locations"),
+        ("DAIKIN_API_URL_DEVICES", "/devices"),
+        ("DAIKIN_API_URL_DEVICE_DATA", "/deviceData"),
+    ):
+        monkeypatch.setattr(daikinone, name, base + path)
+
+    yield fake
+    await runner.cleanup()
+
+
+@pytest.fixture
+def config_entry(hass: HomeAssistant) -> MockConfigEntry:
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        version=1,
+        minor_version=2,
+        data={"email": "user@example.com", "password": "password", CONF_OPTION_ENTITY_UID_SCHEMA_VERSION_KEY: 1},
+    )
+    entry.add_to_hass(hass)
+    return entry
+
+
+@pytest.fixture
+def second_config_entry(hass: HomeAssistant) -> MockConfigEntry:
+    """Another account, on the same fake cloud"""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        version=1,
+        minor_version=2,
+        data={"email": "other@example.com", "password": "password", CONF_OPTION_ENTITY_UID_SCHEMA_VERSION_KEY: 1},
+    )
+    entry.add_to_hass(hass)
+    return entry
@@ -0,0 +1,148 @@
+import copy
+import gc
+import json
+import time
+import tracemalloc
+from collections.abc import Callable
+
+import pytest
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.daikinone import daikinone
+from custom_components.daikinone.daikinone import DaikinOne, DaikinUserCredentials
+from custom_components.daikinone.daikinone import _decode_device_data, _decode_json  # type: ignore
+from custom_components.daikinone.daikinone import _device_data_response  # type: ignore
+
+from .conftest import FakeDaikinCloud
+
+BENCHMARK_REQUESTS = 100
+
+# round trip of every request to the fake cloud, about what a request to the real one takes
+CLOUD_LATENCY = 0.2
+
+# how often each thermostat is read per refresh cycle, about once per entity
+READS_PER_THERMOSTAT = 45
+
+# keys a real device data payload has on top of the fake ones that the integration does not read
+UNUSED_KEYS = 300
+
+
+@pytest.fixture(autouse=True)
+def unlimited_requests(monkeypatch: pytest.MonkeyPatch) -> None:
+    # benchmarks measure the client, not the pacing of requests to the cloud
+    monkeypatch.setattr(daikinone, "DAIKIN_API_RATE_LIMIT_BURST", 100 * BENCHMARK_REQUESTS)
+
+
+def traced_memory(run: Callable[[], object]) -> tuple[int, int]:
+    """Bytes still allocated for what `run` returned, and the peak bytes allocated while it ran"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        kept = run()
+        gc.collect()
+        retained, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del kept
+    return retained, peak
+
+
+async def time_requests(daikin: DaikinOne, close_after_each: bool) -> float:
+    """Mean seconds per sequential single thermostat request"""
+    started = time.perf_counter()
+    for _ in range(BENCHMARK_REQUESTS):
+        assert await daikin.get_raw_device_data("thermostat-0") is not None
+        if close_after_each:
+            await daikin.close()
+    return (time.perf_counter() - started) / BENCHMARK_REQUESTS
+
+
+async def test_pooled_session_benchmark(cloud: FakeDaikinCloud) -> None:
+    daikin = DaikinOne(DaikinUserCredentials("user@example.com", "password"))
+    try:
+        assert await daikin.login()
+
+        # the client creates its own session again after closing it, like every request used to
+        cloud.connections.clear()
+        per_call = await time_requests(daikin, close_after_each=True)
+        per_call_connections = len(cloud.connections)
+
+        cloud.connections.clear()
+        pooled = await time_requests(daikin, close_after_each=False)
+        pooled_connections = len(cloud.connections)
+    finally:
+        await daikin.close()
+
+    assert per_call_connections == BENCHMARK_REQUESTS
+    assert pooled_connections == 1
+    assert (
+        pooled < per_call
+    ), f"{pooled * 1000:.2f}ms per request pooled, {per_call * 1000:.2f}ms with a session per call"
+
+
+@pytest.mark.parametrize("thermostats", [10])
+async def test_shared_snapshot_benchmark(cloud: FakeDaikinCloud) -> None:
+    daikin = DaikinOne(DaikinUserCredentials("user@example.com", "password"))
+    try:
+        await daikin.update()
+    finally:
+        await daikin.close()
+    thermostat_ids = list(daikin.get_thermostats())
+
+    def read_copies() -> None:
+        for thermostat_id in thermostat_ids:
+            for _ in range(READS_PER_THERMOSTAT):
+                copy.deepcopy(daikin.get_thermostat(thermostat_id))
+
+    def read_shared() -> None:
+        for thermostat_id in thermostat_ids:
+            for _ in range(READS_PER_THERMOSTAT):
+                daikin.get_thermostat(thermostat_id)
+
+    _, copied = traced_memory(read_copies)
+    _, shared = traced_memory(read_shared)
+
+    assert all(daikin.get_thermostat(t) is daikin.get_thermostat(t) for t in thermostat_ids)
+    assert shared * 100 < copied, f"{shared / 1024:.1f} KiB per cycle shared, {copied / 1024:.1f} KiB copied"
+
+
+async def test_warm_setup_benchmark(hass: HomeAssistant, cloud: FakeDaikinCloud, config_entry: MockConfigEntry) -> None:
+    cloud.latency = CLOUD_LATENCY
+
+    started = time.perf_counter()
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    cold = time.perf_counter() - started
+    await hass.async_block_till_done()
+
+    # unloading saves the state the next setup starts from
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    started = time.perf_counter()
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    warm = time.perf_counter() - started
+    assert hass.states.get("climate.room_0_thermostat") is not None
+    await hass.async_block_till_done()
+
+    assert cold > CLOUD_LATENCY
+    assert warm < CLOUD_LATENCY, f"set up in {warm * 1000:.0f}ms warm, {cold * 1000:.0f}ms cold"
+
+
+@pytest.mark.parametrize("thermostats", [10, 50, 200])
+def test_whitelisted_decode_benchmark(thermostats: int) -> None:
+    cloud = FakeDaikinCloud(thermostats)
+    for device in cloud.devices:
+        device["data"].update({f"ctUnread{key}": key for key in range(UNUSED_KEYS)})
+    body = json.dumps(cloud.devices).encode()
+
+    # the decoded body is held on to while it is mapped
+    full, full_peak = traced_memory(lambda: _decode_json(body))
+    whitelisted, whitelisted_peak = traced_memory(lambda: _decode_device_data(body))
+
+    records = [_device_data_response(device) for device in _decode_json(body)]
+    assert [_device_data_response(device) for device in _decode_device_data(body)] == records
+    assert whitelisted * 2 < full and whitelisted_peak < full_peak, (
+        f"{len(body) / 1024:.0f} KiB body decoded to {whitelisted / 1024:.0f} KiB, {whitelisted_peak / 1024:.0f} KiB "
+        f"peak whitelisted, {full / 1024:.0f} KiB, {full_peak / 1024:.0f} KiB peak in full"
+    )
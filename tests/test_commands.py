@@ -0,0 +1,153 @@
+import asyncio
+from collections.abc import AsyncGenerator
+from datetime import timedelta
+
+import pytest
+
+from custom_components.daikinone.commands import DaikinCommandQueue, DaikinPendingCommands
+from custom_components.daikinone.daikinone import (
+    DaikinOne,
+    DaikinThermostatCommand,
+    DaikinThermostatMode,
+    DaikinUserCredentials,
+)
+from custom_components.daikinone.utils import Temperature
+
+from .conftest import FakeDaikinCloud
+
+PENDING_TIMEOUT = timedelta(milliseconds=100)
+
+
+class FakeSender:
+    """Records sent commands, sends block until `release` is set"""
+
+    def __init__(self) -> None:
+        self.sent: list[DaikinThermostatCommand] = []
+        self.started = asyncio.Event()
+        self.release = asyncio.Event()
+        self.release.set()
+
+    async def __call__(self, thermostat_id: str, command: DaikinThermostatCommand) -> None:
+        self.started.set()
+        await self.release.wait()
+        self.sent.append(command)
+
+
+async def test_burst_is_sent_as_one_update() -> None:
+    sender = FakeSender()
+    queue = DaikinCommandQueue(sender, delay=timedelta(milliseconds=10))
+
+    results = await asyncio.gather(
+        queue.submit("thermostat-0", DaikinThermostatCommand(mode=DaikinThermostatMode.HEAT)),
+        queue.submit("thermostat-0", DaikinThermostatCommand(set_point_heat=Temperature.from_celsius(20))),
+        queue.submit("thermostat-0", DaikinThermostatCommand(set_point_heat=Temperature.from_celsius(21))),
+    )
+
+    assert sender.sent == [
+        DaikinThermostatCommand(mode=DaikinThermostatMode.HEAT, set_point_heat=Temperature.from_celsius(21))
+    ]
+    assert results == [sender.sent[0]] * 3
+    assert queue.stats.sent == 1 and queue.stats.collapsed == 2
+
+
+async def test_cancel_stops_updates_in_flight() -> None:
+    sender = FakeSender()
+    sender.release.clear()
+    queue = DaikinCommandQueue(sender, delay=timedelta(milliseconds=10))
+
+    submitted = asyncio.create_task(
+        queue.submit("thermostat-0", DaikinThermostatCommand(mode=DaikinThermostatMode.OFF))
+    )
+    await sender.started.wait()
+    queue.cancel()
+
+    # the caller is not left waiting on an update that will never be sent
+    with pytest.raises(asyncio.CancelledError):
+        await asyncio.wait_for(submitted, timeout=1)
+
+    sender.release.set()
+    await asyncio.sleep(0)
+    assert sender.sent == []
+
+
+async def test_merged_batch_holds_every_limit() -> None:
+    sender = FakeSender()
+    sender.release.clear()
+    queue = DaikinCommandQueue(sender, delay=timedelta(milliseconds=10))
+    first, second = asyncio.Semaphore(1), asyncio.Semaphore(1)
+
+    submitted = asyncio.gather(
+        queue.submit("thermostat-0", DaikinThermostatCommand(mode=DaikinThermostatMode.HEAT), first),
+        queue.submit("thermostat-0", DaikinThermostatCommand(set_point_heat=Temperature.from_celsius(21)), second),
+    )
+    await sender.started.wait()
+    assert first.locked() and second.locked()
+
+    sender.release.set()
+    await submitted
+    assert not first.locked() and not second.locked()
+
+
+@pytest.fixture
+async def daikin(cloud: FakeDaikinCloud) -> AsyncGenerator[DaikinOne, None]:
+    client = DaikinOne(DaikinUserCredentials("user@example.com", "password"))
+    await client.update()
+    yield client
+    await client.close()
+
+
+async def test_pending_field_holds_until_it_expires(daikin: DaikinOne, cloud: FakeDaikinCloud) -> None:
+    pending = DaikinPendingCommands(PENDING_TIMEOUT)
+    pending.add("thermostat-0", {"mode": DaikinThermostatMode.HEAT}, daikin.get_thermostat("thermostat-0"))
+
+    thermostats, changed = pending.apply(daikin.get_thermostats())
+    assert thermostats["thermostat-0"].mode == DaikinThermostatMode.HEAT
+    assert changed == {("thermostat-0", None, "mode")}
+
+    # a poll that does not have the command yet keeps the pending value, other fields keep updating
+    cloud.devices[0]["data"]["tempIndoor"] = 22.5
+    await daikin.update()
+    thermostats, changed = pending.apply(daikin.get_thermostats())
+    assert thermostats["thermostat-0"].mode == DaikinThermostatMode.HEAT
+    assert thermostats["thermostat-0"].indoor_temperature == Temperature.from_celsius(22.5)
+    assert changed == set()
+
+    await asyncio.sleep(PENDING_TIMEOUT.total_seconds())
+    thermostats, changed = pending.apply(daikin.get_thermostats())
+    assert thermostats["thermostat-0"].mode == DaikinThermostatMode.AUTO
+    assert changed == {("thermostat-0", None, "mode")}
+    assert pending.get("thermostat-0") == {}
+
+
+async def test_pending_field_is_cleared_once_confirmed(daikin: DaikinOne, cloud: FakeDaikinCloud) -> None:
+    pending = DaikinPendingCommands(PENDING_TIMEOUT)
+    pending.add("thermostat-0", {"mode": DaikinThermostatMode.HEAT}, daikin.get_thermostat("thermostat-0"))
+    pending.apply(daikin.get_thermostats())
+
+    cloud.devices[0]["data"]["mode"] = DaikinThermostatMode.HEAT.value
+    await daikin.update()
+    thermostats, _ = pending.apply(daikin.get_thermostats())
+
+    assert thermostats["thermostat-0"] is daikin.get_thermostat("thermostat-0")
+    assert pending.get("thermostat-0") == {}
+
+
+async def test_pending_field_does_not_mask_a_change_on_the_device(daikin: DaikinOne, cloud: FakeDaikinCloud) -> None:
+    pending = DaikinPendingCommands(PENDING_TIMEOUT)
+    pending.add("thermostat-0", {"mode": DaikinThermostatMode.HEAT}, daikin.get_thermostat("thermostat-0"))
+    pending.add("thermostat-0", {"mode": DaikinThermostatMode.OFF}, daikin.get_thermostat("thermostat-0"))
+    pending.apply(daikin.get_thermostats())
+
+    # the earlier command showing up first only means the later one is still on its way
+    cloud.devices[0]["data"]["mode"] = DaikinThermostatMode.HEAT.value
+    await daikin.update()
+    thermostats, _ = pending.apply(daikin.get_thermostats())
+    assert thermostats["thermostat-0"].mode == DaikinThermostatMode.OFF
+
+    # someone set the thermostat to something else in the meantime
+    cloud.devices[0]["data"]["mode"] = DaikinThermostatMode.COOL.value
+    await daikin.update()
+    thermostats, changed = pending.apply(daikin.get_thermostats())
+    assert thermostats["thermostat-0"].mode == DaikinThermostatMode.COOL
+    assert changed == {("thermostat-0", None, "mode")}
+    assert pending.get("thermostat-0") == {}
@@ -0,0 +1,49 @@
+import asyncio
+from datetime import timedelta
+
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.daikinone import DaikinOneData
+from custom_components.daikinone.confirmation import DaikinOneConfirmationWaiter
+from custom_components.daikinone.const import CONFIRMATION_POLL_INTERVAL, DOMAIN
+from custom_components.daikinone.daikinone import DaikinThermostat, DaikinThermostatCommand, DaikinThermostatMode
+
+from .conftest import FakeDaikinCloud
+
+
+async def test_command_is_confirmed_from_its_thermostat(
+    hass: HomeAssistant, cloud: FakeDaikinCloud, config_entry: MockConfigEntry
+) -> None:
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    data: DaikinOneData = hass.data[DOMAIN][config_entry.entry_id]
+    cloud.requests.clear()
+
+    command = DaikinThermostatCommand(mode=DaikinThermostatMode.HEAT)
+    assert await data.async_send_command("thermostat-0", command)
+
+    assert cloud.requests["PUT /deviceData/{id}"] == 1
+    assert cloud.requests["GET /deviceData/{id}"] == 1
+    assert cloud.requests["GET /deviceData"] == 0
+
+    # nothing is polled once the command is confirmed
+    await asyncio.sleep(2 * CONFIRMATION_POLL_INTERVAL.total_seconds())
+    assert cloud.requests["GET /deviceData/{id}"] == 1
+
+
+async def test_waiter_polls_until_confirmed() -> None:
+    refreshed: list[set[str]] = []
+    confirmed = asyncio.Event()
+
+    async def refresh(thermostat_ids: set[str]) -> dict[str, DaikinThermostat]:
+        refreshed.append(thermostat_ids)
+        if len(refreshed) == 3:
+            confirmed.set()
+        return {thermostat_id: object() for thermostat_id in thermostat_ids}  # type: ignore
+
+    waiter = DaikinOneConfirmationWaiter(refresh, interval=timedelta(milliseconds=10))
+    assert await waiter.wait("thermostat-0", lambda _: confirmed.is_set())
+
+    await asyncio.sleep(0.05)
+    assert refreshed == [{"thermostat-0"}] * 3
@@ -0,0 +1,39 @@
+from homeassistant.const import STATE_UNAVAILABLE
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.daikinone import DaikinOneData
+from custom_components.daikinone.const import DOMAIN
+
+from .conftest import FakeDaikinCloud
+
+
+def state_of(hass: HomeAssistant, entity_id: str) -> str:
+    state = hass.states.get(entity_id)
+    assert state is not None, entity_id
+    return state.state
+
+
+async def test_removed_devices_do_not_block_dispatch(
+    hass: HomeAssistant, cloud: FakeDaikinCloud, config_entry: MockConfigEntry
+) -> None:
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    data: DaikinOneData = hass.data[DOMAIN][config_entry.entry_id]
+
+    # the first thermostat leaves the account, the second one loses its eev coil and reports a new temperature
+    del cloud.devices[0]
+    cloud.devices[0]["data"]["ctCoilUnitType"] = 255
+    cloud.devices[0]["data"]["tempIndoor"] = 19.7
+    await data.coordinator.async_refresh()
+    await hass.async_block_till_done()
+
+    assert state_of(hass, "climate.room_0_thermostat") == STATE_UNAVAILABLE
+    assert state_of(hass, "sensor.room_0_thermostat_indoor_temperature") == STATE_UNAVAILABLE
+    assert state_of(hass, "sensor.room_0_heat_pump_mode") == STATE_UNAVAILABLE
+    assert state_of(hass, "sensor.room_1_eev_coil_pressure") == STATE_UNAVAILABLE
+
+    assert state_of(hass, "sensor.room_1_thermostat_indoor_temperature") == "19.7"
+    climate = hass.states.get("climate.room_1_thermostat")
+    assert climate is not None and climate.attributes["current_temperature"] == 19.7  # type: ignore
+    assert state_of(hass, "sensor.room_1_heat_pump_mode") != STATE_UNAVAILABLE
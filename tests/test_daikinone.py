@@ -0,0 +1,195 @@
+import asyncio
+from collections.abc import AsyncGenerator
+from datetime import timedelta
+
+import pytest
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.daikinone import DaikinOneData, daikinone
+from custom_components.daikinone.breaker import DaikinCircuitState
+from custom_components.daikinone.const import DOMAIN
+from custom_components.daikinone.daikinone import DaikinOne, DaikinThermostatCommand, DaikinUserCredentials
+from custom_components.daikinone.exceptions import DaikinServiceException
+from custom_components.daikinone.utils import Temperature
+
+from .conftest import FakeDaikinCloud
+
+CONCURRENT_REQUESTS = 100
+
+
+@pytest.fixture
+async def daikin(
+    hass: HomeAssistant, cloud: FakeDaikinCloud, monkeypatch: pytest.MonkeyPatch
+) -> AsyncGenerator[DaikinOne, None]:
+    # these tests are about authentication, let every request through the rate limiter right away
+    monkeypatch.setattr(daikinone, "DAIKIN_API_RATE_LIMIT_BURST", 10 * CONCURRENT_REQUESTS)
+    client = DaikinOne(DaikinUserCredentials("user@example.com", "password"), async_get_clientsession(hass))
+    yield client
+    await client.close()
+
+
+async def fetch_concurrently(daikin: DaikinOne) -> None:
+    results = await asyncio.gather(*(daikin.get_raw_device_data("thermostat-0") for _ in range(CONCURRENT_REQUESTS)))
+    assert all(result is not None for result in results)
+
+
+async def test_concurrent_requests_log_in_once(daikin: DaikinOne, cloud: FakeDaikinCloud) -> None:
+    cloud.latency = 0.05
+    await fetch_concurrently(daikin)
+
+    assert cloud.requests["POST /users/auth/login"] == 1
+    assert cloud.requests["POST /users/auth/token"] == 0
+    assert cloud.requests["GET /deviceData/{id}"] == CONCURRENT_REQUESTS
+
+
+async def test_concurrent_unauthorized_requests_refresh_once(daikin: DaikinOne, cloud: FakeDaikinCloud) -> None:
+    await daikin.login()
+    cloud.revoke_tokens()
+    cloud.requests.clear()
+
+    cloud.latency = 0.05
+    await fetch_concurrently(daikin)
+
+    assert cloud.requests["POST /users/auth/login"] == 0
+    assert cloud.requests["POST /users/auth/token"] == 1
+    # every request was turned away once and retried with the refreshed token
+    assert cloud.requests["GET /deviceData/{id}"] == 2 * CONCURRENT_REQUESTS
+
+
+async def test_expiring_token_is_refreshed_ahead_once(
+    hass: HomeAssistant, daikin: DaikinOne, cloud: FakeDaikinCloud
+) -> None:
+    # inside the refresh ahead window, but not close enough to expiry to hold requests back
+    cloud.token_expires_in = 120
+    await daikin.login()
+    cloud.requests.clear()
+
+    cloud.latency = 0.05
+    await fetch_concurrently(daikin)
+    await hass.async_block_till_done()
+
+    assert cloud.requests["POST /users/auth/login"] == 0
+    assert cloud.requests["POST /users/auth/token"] == 1
+    assert cloud.requests["GET /deviceData/{id}"] == CONCURRENT_REQUESTS
+
+
+async def test_open_circuit_stops_authenticating(daikin: DaikinOne, cloud: FakeDaikinCloud) -> None:
+    # the token is always too close to expiry to be used, every request has to refresh it first
+    cloud.token_expires_in = 10
+    await daikin.login()
+    cloud.requests.clear()
+
+    cloud.status = 500
+    while daikin.get_circuit_stats().state != DaikinCircuitState.OPEN:
+        with pytest.raises(DaikinServiceException):
+            await daikin.get_raw_device_data("thermostat-0")
+
+    # failed logins and refreshes opened the circuit along with the failed requests
+    assert cloud.requests["POST /users/auth/token"] + cloud.requests["POST /users/auth/login"] > 0
+    sent = cloud.requests.copy()
+
+    for _ in range(5):
+        with pytest.raises(DaikinServiceException):
+            await daikin.get_raw_device_data("thermostat-0")
+
+    assert cloud.requests == sent
+    assert daikin.get_circuit_stats().rejected == 5
+
+
+async def test_metadata_is_fetched_again_soon_after_a_bad_response(
+    daikin: DaikinOne, cloud: FakeDaikinCloud, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(daikinone, "DAIKIN_API_METADATA_RETRY_INTERVAL", timedelta())
+    cloud.locations = [{"name": "Home"}]
+    await daikin.update()
+
+    # the metadata from the device data is kept
+    metadata = daikin.get_metadata("thermostat-0")
+    assert metadata.name == "Room 0" and metadata.location_name is None
+
+    cloud.locations = [{"id": "location-1", "name": "Home"}]
+    await daikin.update()
+    assert daikin.get_metadata("thermostat-0").location_name == "Home"
+
+    # once fetched, not again before the regular refresh
+    await daikin.update()
+    assert cloud.requests["GET /locations"] == 2
+
+
+@pytest.mark.parametrize("thermostats", [10])
+async def test_large_device_data_is_mapped_in_the_executor(
+    hass: HomeAssistant, daikin: DaikinOne, cloud: FakeDaikinCloud
+) -> None:
+    await daikin.update()
+    size = daikin.get_decode_stats().last_size
+    assert daikin.get_decode_stats().offloaded == 0
+
+    for offload_threshold, offloaded in ((size + 1, 0), (size, 1), (size // 2, 1)):
+        client = DaikinOne(
+            DaikinUserCredentials("user@example.com", "password"),
+            async_get_clientsession(hass),
+            offload_threshold=offload_threshold,
+        )
+        try:
+            await client.update()
+        finally:
+            await client.close()
+
+        stats = client.get_decode_stats()
+        assert (stats.decoded, stats.offloaded) == (1, offloaded)
+        assert (stats.total_loop_blocked == 0) == bool(offloaded)
+        assert client.get_thermostats() == daikin.get_thermostats()
+
+
+async def test_schedule_override_is_not_dropped_while_the_schedule_runs(
+    daikin: DaikinOne, cloud: FakeDaikinCloud
+) -> None:
+    await daikin.update()
+    thermostat = daikin.get_thermostat("thermostat-0")
+    assert thermostat.schedule.enabled
+
+    # holding the current set point keeps the schedule from changing it at its next step
+    hold = DaikinThermostatCommand(set_point_heat=thermostat.set_point_heat_home, override_schedule=True)
+    assert hold.without_applied(thermostat) == hold
+
+    # without a schedule there is nothing to hold the set point against
+    cloud.devices[0]["data"]["schedEnabled"] = False
+    await daikin.update()
+    assert hold.without_applied(daikin.get_thermostat("thermostat-0")) is None
+
+
+async def test_set_points_are_compared_with_the_home_set_points(daikin: DaikinOne, cloud: FakeDaikinCloud) -> None:
+    # the active set points come from somewhere else than the home ones, e.g. an away period
+    cloud.devices[0]["data"].update({"schedEnabled": False, "hspActive": 16.0, "cspActive": 28.0})
+    await daikin.update()
+    thermostat = daikin.get_thermostat("thermostat-0")
+
+    to_active = DaikinThermostatCommand(set_point_heat=Temperature.from_celsius(16.0))
+    assert to_active.without_applied(thermostat) == to_active
+
+    partly_home = DaikinThermostatCommand(
+        set_point_heat=Temperature.from_celsius(20.0), set_point_cool=Temperature.from_celsius(28.0)
+    )
+    assert partly_home.without_applied(thermostat) == DaikinThermostatCommand(
+        set_point_cool=Temperature.from_celsius(28.0)
+    )
+
+
+async def test_hold_of_the_current_set_point_is_sent(
+    hass: HomeAssistant, cloud: FakeDaikinCloud, config_entry: MockConfigEntry
+) -> None:
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    data: DaikinOneData = hass.data[DOMAIN][config_entry.entry_id]
+    cloud.requests.clear()
+
+    same = DaikinThermostatCommand(set_point_heat=Temperature.from_celsius(20.0))
+    assert await data.async_send_command("thermostat-0", same)
+    assert cloud.requests["PUT /deviceData/{id}"] == 0
+
+    hold = DaikinThermostatCommand(set_point_heat=Temperature.from_celsius(20.0), override_schedule=True)
+    assert await data.async_send_command("thermostat-0", hold)
+    assert cloud.requests["PUT /deviceData/{id}"] == 1
+    assert cloud.devices[0]["data"]["schedOverride"] == 1
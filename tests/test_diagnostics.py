@@ -0,0 +1,28 @@
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import device_registry as dr
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.daikinone.const import DOMAIN
+from custom_components.daikinone.diagnostics import async_get_device_diagnostics
+
+from .conftest import FakeDaikinCloud
+
+
+async def test_device_diagnostics(hass: HomeAssistant, cloud: FakeDaikinCloud, config_entry: MockConfigEntry) -> None:
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    registry = dr.async_get(hass)
+    cloud.requests.clear()
+
+    thermostat = registry.async_get_device(identifiers={(DOMAIN, "thermostat-0")})
+    assert thermostat is not None
+    diagnostics = await async_get_device_diagnostics(hass, config_entry, thermostat)
+    assert diagnostics["raw"]["tempIndoor"] == 21.3
+    assert cloud.requests["GET /deviceData/{id}"] == 1
+
+    # the account's service device is not a device in the cloud, it gets the account diagnostics
+    account = registry.async_get_device(identifiers={(DOMAIN, config_entry.entry_id)})
+    assert account is not None
+    diagnostics = await async_get_device_diagnostics(hass, config_entry, account)
+    assert "metrics" in diagnostics and "requests" in diagnostics
+    assert cloud.requests["GET /deviceData/{id}"] == 1
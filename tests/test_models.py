@@ -0,0 +1,94 @@
+import gc
+import random
+import time
+import tracemalloc
+from collections.abc import Callable
+
+from custom_components.daikinone.daikinone import (
+    DAIKIN_DEVICE_DATA_KEYS,
+    DaikinDeviceDataResponse,
+    DaikinOne,
+    DaikinUserCredentials,
+)
+from custom_components.daikinone.utils import Temperature
+
+from .conftest import FakeDaikinCloud
+
+FLEET_SIZE = 200
+
+# what a thermostat with an air handler, heat pump and eev coil may take in the client's cache, on top of its payload
+SNAPSHOT_BYTES_BUDGET = 4096
+
+
+def test_temperature_is_shared() -> None:
+    temperature = Temperature.from_celsius(20.0)
+
+    assert Temperature.from_celsius(20.04) is temperature
+    assert Temperature.from_fahrenheit(68) is temperature
+    assert Temperature.from_kelvin(293.15) is temperature
+    assert (temperature.celsius, temperature.fahrenheit, temperature.kelvin) == (20.0, 68.0, 293.1)
+
+
+def test_temperature_keeps_value_type() -> None:
+    # whichever is created first, the other does not get its cached instance
+    assert isinstance(Temperature.from_celsius(21).celsius, int)
+    assert isinstance(Temperature.from_celsius(21.0).celsius, float)
+    assert isinstance(Temperature.from_celsius(22.0).celsius, float)
+    assert isinstance(Temperature.from_celsius(22).celsius, int)
+    assert Temperature.from_celsius(21) == Temperature.from_celsius(21.0)
+
+
+def traced_bytes_per_device(build: Callable[[], object]) -> float:
+    """Memory still allocated once `build` returned, per device of the fleet"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        kept = build()
+        gc.collect()
+        retained = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    del kept
+    return retained / FLEET_SIZE
+
+
+def test_snapshot_memory() -> None:
+    random_values = random.Random(0)
+    cloud = FakeDaikinCloud(FLEET_SIZE)
+    for device in cloud.devices:
+        device["data"]["tempIndoor"] = round(random_values.uniform(15, 28), 1)
+        device["data"]["ctOutdoorAirTemperature"] = random_values.randint(100, 1000)
+        device["data"]["ctOutdoorCoilTemperature"] = random_values.randint(100, 1000)
+    state = {
+        "refresh_token": None,
+        "access_token": None,
+        "devices": [{"payload": device, "fetched_at": time.time()} for device in cloud.devices],
+    }
+
+    def restore() -> DaikinOne:
+        daikin = DaikinOne(DaikinUserCredentials("user@example.com", "password"))
+        daikin.restore_state(state)
+        return daikin
+
+    def payloads() -> list[DaikinDeviceDataResponse]:
+        return [
+            DaikinDeviceDataResponse(
+                id=device["id"],
+                locationId=device["locationId"],
+                name=device["name"],
+                model=device["model"],
+                firmware=device["firmware"],
+                online=device["online"],
+                data={k: v for k, v in device["data"].items() if k in DAIKIN_DEVICE_DATA_KEYS},
+            )
+            for device in cloud.devices
+        ]
+
+    # the first restore fills the shared temperature cache, like earlier refreshes would have
+    assert len(restore().get_thermostats()) == FLEET_SIZE
+
+    snapshot_bytes = traced_bytes_per_device(restore) - traced_bytes_per_device(payloads)
+    assert (
+        0 < snapshot_bytes < SNAPSHOT_BYTES_BUDGET
+    ), f"{snapshot_bytes:.0f} bytes per thermostat snapshot, for a fleet of {FLEET_SIZE}"
@@ -0,0 +1,77 @@
+import asyncio
+import time
+from collections.abc import AsyncGenerator
+
+import pytest
+
+from custom_components.daikinone import daikinone
+from custom_components.daikinone.daikinone import (
+    DaikinOne,
+    DaikinThermostatCommand,
+    DaikinThermostatMode,
+    DaikinUserCredentials,
+)
+from custom_components.daikinone.ratelimit import DaikinRateLimiter, DaikinRequestPriority
+
+from .conftest import FakeDaikinCloud
+
+RATE = 20.0
+
+
+@pytest.fixture
+async def daikin(cloud: FakeDaikinCloud, monkeypatch: pytest.MonkeyPatch) -> AsyncGenerator[DaikinOne, None]:
+    # one request at a time, quickly enough to keep the tests short
+    monkeypatch.setattr(daikinone, "DAIKIN_API_RATE_LIMIT", RATE)
+    monkeypatch.setattr(daikinone, "DAIKIN_API_RATE_LIMIT_BURST", 1)
+    client = DaikinOne(DaikinUserCredentials("user@example.com", "password"))
+    assert await client.login()
+    yield client
+    await client.close()
+
+
+async def test_commands_overtake_queued_polls(daikin: DaikinOne, cloud: FakeDaikinCloud) -> None:
+    cloud.history.clear()
+
+    polls = [asyncio.create_task(daikin.get_raw_device_data("thermostat-0")) for _ in range(3)]
+    await asyncio.sleep(0)
+    command = asyncio.create_task(
+        daikin.set_thermostat("thermostat-1", DaikinThermostatCommand(mode=DaikinThermostatMode.HEAT))
+    )
+    await asyncio.gather(*polls, command)
+
+    # the polls were queued first, the command still went out before all but the one already let through
+    assert cloud.history.index("PUT /deviceData/{id}") <= 1
+    assert daikin.get_request_stats().queued >= 3
+
+
+@pytest.mark.parametrize("status", [429, 503])
+async def test_throttled_request_waits_for_retry_after(daikin: DaikinOne, cloud: FakeDaikinCloud, status: int) -> None:
+    cloud.throttle = 1
+    cloud.throttle_status = status
+    cloud.retry_after = "0.5"
+    cloud.requests.clear()
+
+    started = time.monotonic()
+    assert await daikin.get_raw_device_data("thermostat-0") is not None
+
+    assert time.monotonic() - started >= 0.5
+    assert cloud.requests["GET /deviceData/{id}"] == 2
+    assert daikin.get_request_stats().throttled == 1
+
+
+async def test_cancelled_waiter_leaves_the_queue() -> None:
+    limiter = DaikinRateLimiter(RATE, 1)
+    await limiter.acquire(DaikinRequestPriority.POLL)
+
+    waiting = asyncio.create_task(limiter.acquire(DaikinRequestPriority.POLL))
+    await asyncio.sleep(0)
+    waiting.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiting
+    assert limiter.stats.queue_depth == 0
+
+    # once the bucket refilled, the next request goes straight through instead of queueing behind the cancelled one
+    await asyncio.sleep(1 / RATE)
+    await limiter.acquire(DaikinRequestPriority.POLL)
+    assert limiter.stats.queued == 1
+    limiter.cancel()
@@ -0,0 +1,171 @@
+import asyncio
+import tracemalloc
+from datetime import timedelta
+from pathlib import Path
+from typing import Any
+
+import pytest
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError, ServiceValidationError
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.daikinone import DaikinOneData, services
+from custom_components.daikinone.const import DOMAIN
+from custom_components.daikinone.daikinone import DaikinThermostatMode
+from custom_components.daikinone.services import ATTR_CONFIG_ENTRY_ID
+
+from .conftest import FakeDaikinCloud
+
+
+async def bulk_set(hass: HomeAssistant, thermostat_ids: list[str]) -> dict[str, Any]:
+    response = await hass.services.async_call(
+        DOMAIN,
+        "bulk_set",
+        {"thermostat_ids": thermostat_ids, "hvac_mode": "heat", "target_temp_low": 18.5, "max_concurrency": 2},
+        blocking=True,
+        return_response=True,
+    )
+    assert response is not None
+    return response["thermostats"]  # type: ignore
+
+
+async def test_profile_counts_cycles_of_one_account(
+    hass: HomeAssistant,
+    tmp_path: Path,
+    cloud: FakeDaikinCloud,
+    config_entry: MockConfigEntry,
+    second_config_entry: MockConfigEntry,
+) -> None:
+    hass.config.config_dir = str(tmp_path)
+    # both accounts are on the same fake cloud, setting up one entry sets up the whole integration
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    profiled: DaikinOneData = hass.data[DOMAIN][config_entry.entry_id]
+    other: DaikinOneData = hass.data[DOMAIN][second_config_entry.entry_id]
+
+    with pytest.raises(ServiceValidationError):
+        await hass.services.async_call(DOMAIN, "profile", {"cycles": 2}, blocking=True, return_response=True)
+
+    profile = hass.async_create_task(
+        hass.services.async_call(
+            DOMAIN,
+            "profile",
+            {ATTR_CONFIG_ENTRY_ID: config_entry.entry_id, "cycles": 2},
+            blocking=True,
+            return_response=True,
+        )
+    )
+    await asyncio.sleep(0)
+    assert profiled.coordinator.profiler is not None
+    assert other.coordinator.profiler is None
+    was_tracing = tracemalloc.is_tracing()
+
+    # refreshes of the other account do not count, and memory is only traced during the profiled ones
+    await other.coordinator.async_refresh()
+    await other.coordinator.async_refresh()
+    await profiled.coordinator.async_refresh()
+    assert not profile.done()
+    assert tracemalloc.is_tracing() == was_tracing
+    await profiled.coordinator.async_refresh()
+
+    response = await profile
+    assert response is not None
+    assert response["config_entry_id"] == config_entry.entry_id
+    assert response["cycles"] == 2
+    assert profiled.coordinator.profiler is None
+    assert tracemalloc.is_tracing() == was_tracing
+
+    report = Path(str(response["report"])).read_text(encoding="utf-8")
+    assert "Daikin One profile of 2 refresh cycles" in report
+    assert "Daikin One functions by own time" in report
+    assert Path(str(response["profile"])).exists()
+
+
+async def test_profile_reports_the_cycles_done_in_time(
+    hass: HomeAssistant,
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    cloud: FakeDaikinCloud,
+    config_entry: MockConfigEntry,
+) -> None:
+    hass.config.config_dir = str(tmp_path)
+    monkeypatch.setattr(services, "PROFILE_TIMEOUT_MARGIN", timedelta(milliseconds=100))
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    data: DaikinOneData = hass.data[DOMAIN][config_entry.entry_id]
+
+    # no refresh within two poll intervals and the margin
+    data.coordinator.update_interval = timedelta(milliseconds=50)
+    with pytest.raises(HomeAssistantError, match="No refresh cycle"):
+        await hass.services.async_call(DOMAIN, "profile", {"cycles": 2}, blocking=True, return_response=True)
+    assert data.coordinator.profiler is None
+
+    data.coordinator.update_interval = timedelta(milliseconds=50)
+    profile = hass.async_create_task(
+        hass.services.async_call(DOMAIN, "profile", {"cycles": 2}, blocking=True, return_response=True)
+    )
+    await asyncio.sleep(0)
+    await data.coordinator.async_refresh()
+
+    response = await profile
+    assert response is not None and response["cycles"] == 1
+    assert data.coordinator.profiler is None
+    assert Path(str(response["report"])).exists()
+
+
+async def test_profile_ends_when_the_account_is_unloaded(
+    hass: HomeAssistant, tmp_path: Path, cloud: FakeDaikinCloud, config_entry: MockConfigEntry
+) -> None:
+    hass.config.config_dir = str(tmp_path)
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    data: DaikinOneData = hass.data[DOMAIN][config_entry.entry_id]
+
+    profile = hass.async_create_task(
+        hass.services.async_call(DOMAIN, "profile", {"cycles": 3}, blocking=True, return_response=True)
+    )
+    await asyncio.sleep(0)
+    await data.coordinator.async_refresh()
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+
+    response = await asyncio.wait_for(profile, 1)
+    assert response is not None and response["cycles"] == 1
+    assert data.coordinator.profiler is None
+
+
+@pytest.mark.parametrize("thermostats", [4])
+async def test_bulk_set_reports_each_thermostat(
+    hass: HomeAssistant, cloud: FakeDaikinCloud, config_entry: MockConfigEntry
+) -> None:
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    cloud.broken.add("thermostat-2")
+    cloud.requests.clear()
+
+    results = await bulk_set(hass, ["thermostat-0", "thermostat-1", "thermostat-2", "thermostat-3"])
+
+    assert results.keys() == {"thermostat-0", "thermostat-1", "thermostat-2", "thermostat-3"}
+    assert results["thermostat-2"]["success"] is False and "500" in results["thermostat-2"]["error"]
+    for thermostat_id in ("thermostat-0", "thermostat-1", "thermostat-3"):
+        assert results[thermostat_id]["success"] is True and results[thermostat_id]["confirmed"] is True
+
+    data: DaikinOneData = hass.data[DOMAIN][config_entry.entry_id]
+    thermostats = data.get_thermostats()
+    assert thermostats["thermostat-0"].mode == DaikinThermostatMode.HEAT
+    assert thermostats["thermostat-2"].mode == DaikinThermostatMode.AUTO
+    assert cloud.requests["PUT /deviceData/{id}"] == 4
+
+
+async def test_bulk_set_sets_listed_thermostats_once(
+    hass: HomeAssistant, cloud: FakeDaikinCloud, config_entry: MockConfigEntry
+) -> None:
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    cloud.requests.clear()
+
+    results = await bulk_set(hass, ["thermostat-0", "thermostat-1", "thermostat-0"])
+
+    assert list(results) == ["thermostat-0", "thermostat-1"]
+    data: DaikinOneData = hass.data[DOMAIN][config_entry.entry_id]
+    assert data.commands.stats.submitted == 2
+    assert cloud.requests["PUT /deviceData/{id}"] == 2
@@ -0,0 +1,75 @@
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.daikinone import DaikinOneData
+from custom_components.daikinone.const import DOMAIN
+
+from .conftest import FakeDaikinCloud, thermostat_data
+
+
+async def test_warm_start_adds_thermostats_new_since_the_save(
+    hass: HomeAssistant, cloud: FakeDaikinCloud, config_entry: MockConfigEntry
+) -> None:
+    # a cold start fetches the account, unloading saves it for the next start
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    cloud.devices.append(
+        {
+            "id": "thermostat-2",
+            "locationId": "location-1",
+            "name": "Room 2",
+            "model": "ONEPLUS",
+            "firmware": "3.1.0",
+            "online": True,
+            "data": thermostat_data(2),
+        }
+    )
+
+    # entities of the saved thermostats come up before the first refresh, the new one with it
+    cloud.latency = 0.1
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    assert config_entry.state is ConfigEntryState.LOADED
+    assert hass.states.get("climate.room_0_thermostat") is not None
+    assert hass.states.get("climate.room_2_thermostat") is None
+
+    await hass.async_block_till_done()
+    assert hass.states.get("climate.room_2_thermostat") is not None
+    assert hass.states.get("sensor.room_2_thermostat_indoor_temperature") is not None
+    assert len(hass.states.async_entity_ids("climate")) == 3
+
+
+async def test_accounts_are_kept_apart(
+    hass: HomeAssistant,
+    hass_storage: dict[str, Any],
+    cloud: FakeDaikinCloud,
+    config_entry: MockConfigEntry,
+    second_config_entry: MockConfigEntry,
+) -> None:
+    # both accounts are on the same fake cloud, setting up one entry sets up the whole integration
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    first: DaikinOneData = hass.data[DOMAIN][config_entry.entry_id]
+    second: DaikinOneData = hass.data[DOMAIN][second_config_entry.entry_id]
+
+    assert first.daikin is not second.daikin
+    assert cloud.requests["POST /users/auth/login"] == 2
+
+    # refreshing one account leaves the cached thermostats of the other alone
+    cloud.devices[0]["data"]["tempIndoor"] = 25.0
+    await first.coordinator.async_refresh()
+    assert first.daikin.get_thermostat("thermostat-0").indoor_temperature.celsius == 25.0
+    assert second.daikin.get_thermostat("thermostat-0").indoor_temperature.celsius != 25.0
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+    assert await hass.config_entries.async_unload(second_config_entry.entry_id)
+    first_state = hass_storage[f"{DOMAIN}.{config_entry.entry_id}"]["data"]
+    second_state = hass_storage[f"{DOMAIN}.{second_config_entry.entry_id}"]["data"]
+    assert first_state["access_token"] in cloud.tokens
+    assert second_state["access_token"] in cloud.tokens
+    assert first_state["access_token"] != second_state["access_token"]
@@ -0,0 +1,53 @@
+import asyncio
+
+import pytest
+from homeassistant.components.homeassistant import SERVICE_UPDATE_ENTITY
+from homeassistant.const import ATTR_ENTITY_ID
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.setup import async_setup_component
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.daikinone import DaikinOneData
+from custom_components.daikinone.daikinone import DaikinOne, DaikinUserCredentials
+
+from .conftest import FakeDaikinCloud
+
+
+async def test_concurrent_updates_share_one_request(
+    hass: HomeAssistant, cloud: FakeDaikinCloud, config_entry: MockConfigEntry
+) -> None:
+    data = DaikinOneData(
+        hass,
+        config_entry,
+        DaikinOne(DaikinUserCredentials("user@example.com", "password"), async_get_clientsession(hass)),
+    )
+
+    # keep the request in flight while every caller arrives
+    cloud.latency = 0.1
+    await asyncio.gather(*(data.update() for _ in range(500)))
+
+    assert cloud.requests["GET /deviceData"] == 1
+    assert set(data.get_thermostats()) == {"thermostat-0", "thermostat-1"}
+
+
+@pytest.mark.parametrize("thermostats", [10])
+async def test_entities_updating_at_once_share_one_request(
+    hass: HomeAssistant, cloud: FakeDaikinCloud, config_entry: MockConfigEntry
+) -> None:
+    assert await async_setup_component(hass, "homeassistant", {})
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    entity_ids = hass.states.async_entity_ids(["climate", "sensor"])
+    assert len(entity_ids) > 400
+
+    cloud.requests.clear()
+    cloud.latency = 0.1
+    cloud.devices[0]["data"]["tempIndoor"] = 22.0
+    await hass.services.async_call("homeassistant", SERVICE_UPDATE_ENTITY, {ATTR_ENTITY_ID: entity_ids}, blocking=True)
+    await hass.async_block_till_done()
+
+    assert cloud.requests["GET /deviceData"] == 1
+    state = hass.states.get("sensor.room_0_thermostat_indoor_temperature")
+    assert state is not None and state.state == "22.0"